@@ -1,12 +1,42 @@
 """Assignee Recommendation Agent — recommends developers for issue assignment."""
 
 from services import llm_service
-from utils.scoring_utils import score_assignee
+from utils.scoring_utils import rank_assignees
+from schemas.github_models import Issue, Contributor
+from utils import tracing
 
 
-async def recommend(issue_data: dict, contributors: list[dict]) -> dict:
+def _is_valid(result) -> bool:
+    return isinstance(result, dict) and "recommended_assignees" in result
+
+
+@tracing.traced("agent.assignee_recommendation.rank")
+def rank(contributors: list[Contributor], ownerships: list[dict[str, float]], k: int = 3) -> list[list[dict]]:
+    """Top-k scored candidates for many issues at once (one scoring matrix)."""
+    return [
+        [
+            {
+                "developer_name": contributors[j].login,
+                "score": score,
+                "total_commits": contributors[j].total_commits,
+                "ownership": shares.get(contributors[j].login, 0.0),
+            }
+            for j, score in row
+        ]
+        for shares, row in zip(ownerships, rank_assignees(contributors, ownerships, k))
+    ]
+
+
+@tracing.traced("agent.assignee_recommendation")
+async def recommend(issue_data: Issue, contributors: list[Contributor],
+                    ownership: dict[str, float] | None = None,
+                    candidates: list[dict] | None = None) -> dict:
     """Recommend assignees using hybrid scoring + LLM reasoning.
 
+    ``ownership`` maps logins to their share (0-1) of recent changes to the
+    code the issue touches (see ownership_service.shares). ``candidates``
+    are this issue's precomputed ``rank`` results, which skips scoring.
+
     Returns:
         {
             "recommended_assignees": [
@@ -17,28 +47,18 @@ async def recommend(issue_data: dict, contributors: list[dict]) -> dict:
     if not contributors:
         return {"recommended_assignees": []}
 
-    issue_title = issue_data.get("title", "")
-    issue_body = issue_data.get("body", "") or ""
-    issue_labels = [l.get("name", "") for l in issue_data.get("labels", [])]
+    issue_title = issue_data.title
+    issue_body = issue_data.body
+    issue_labels = list(issue_data.labels)
 
-    # Step 1: Rule-based scoring
-    scored = []
-    for c in contributors:
-        score = score_assignee(c, issue_labels, [])
-        scored.append({
-            "developer_name": c.get("login", "unknown"),
-            "score": score,
-            "total_commits": c.get("total_commits", 0),
-        })
-
-    # Sort by score descending, take top 3
-    scored.sort(key=lambda x: x["score"], reverse=True)
-    top_candidates = scored[:3]
+    # Step 1: Rule-based scoring, top 3
+    top_candidates = candidates if candidates is not None else rank(contributors, [ownership or {}])[0]
 
     # Step 2: LLM enrichment for reasoning
     if llm_service.is_available() and top_candidates:
         candidates_text = "\n".join(
-            f"- {c['developer_name']}: score={c['score']}, commits={c['total_commits']}"
+            f"- {c['developer_name']}: score={c['score']}, commits={c['total_commits']}, "
+            f"owns {c['ownership']:.0%} of recent changes to the affected code"
             for c in top_candidates
         )
         prompt = f"""You are a engineering team assistant. For each candidate, provide a brief reasoning
@@ -57,17 +77,25 @@ Respond with ONLY a JSON object:
         {{"developer_name": "<name>", "score": <score>, "reasoning": "<1-2 sentence reasoning>"}}
     ]
 }}"""
-        result = await llm_service.generate(prompt, expect_json=True)
-        if result and isinstance(result, dict) and "recommended_assignees" in result:
+        result = await llm_service.generate(
+            prompt, expect_json=True, template="assignee_recommendation.v1", validate=_is_valid,
+        )
+        if _is_valid(result):
             return result
 
     # Fallback — generate simple reasoning
+    if top_candidates:
+        llm_service.record_fallback("assignee_recommendation")
     return {
         "recommended_assignees": [
             {
                 "developer_name": c["developer_name"],
                 "score": c["score"],
-                "reasoning": f"Has {c['total_commits']} total commits. Activity-based score: {c['score']}/100."
+                "reasoning": (
+                    f"Has {c['total_commits']} total commits"
+                    + (f" and {c['ownership']:.0%} of recent changes to the affected code" if c["ownership"] else "")
+                    + f". Activity-based score: {c['score']}/100."
+                )
             }
             for c in top_candidates
         ]
@@ -1,9 +1,34 @@
 """Issue Classification Agent — classifies issues by type, priority, and labels."""
 
+import json
+import asyncio
 from services import llm_service
+from utils.batching import pack_batches
 from utils.scoring_utils import classify_issue_rule_based
+from utils.constants import LLM_BATCH_MAX_ITEMS, LLM_BATCH_MAX_CHARS, LLM_BATCH_ITEM_CHARS
+from schemas.github_models import Issue
+from utils import tracing
 
+VALID_CLASSIFICATIONS = {"Bug", "Feature", "Refactor", "Question"}
+VALID_PRIORITIES = {"Low", "Medium", "High"}
 
+
+def _is_valid(result) -> bool:
+    return (isinstance(result, dict) and
+            result.get("classification") in VALID_CLASSIFICATIONS and
+            result.get("priority") in VALID_PRIORITIES)
+
+
+def _batch_answers(result) -> dict[str, dict]:
+    """Batch answers keyed by item id."""
+    if isinstance(result, dict):
+        result = result.get("results", [])
+    if not isinstance(result, list):
+        return {}
+    return {str(r.get("id")): r for r in result if isinstance(r, dict)}
+
+
+@tracing.traced("agent.issue_classification")
 async def classify(issue_title: str, issue_body: str) -> dict:
     """Classify an issue using LLM (with rule-based fallback).
 
@@ -40,14 +65,98 @@ Rules:
 - suggested_labels should include relevant tags like "frontend", "backend", "security", "priority:high"
 - confidence_score is your confidence from 0.0 to 1.0"""
 
-        result = await llm_service.generate(prompt, expect_json=True)
-        if result and isinstance(result, dict):
-            # Validate required fields
-            valid_classifications = {"Bug", "Feature", "Refactor", "Question"}
-            valid_priorities = {"Low", "Medium", "High"}
-            if (result.get("classification") in valid_classifications and
-                    result.get("priority") in valid_priorities):
-                return result
+        result = await llm_service.generate(
+            prompt, expect_json=True, template="issue_classification.v1", validate=_is_valid,
+        )
+        # Validate required fields
+        if _is_valid(result):
+            return result
 
     # Fallback to rule-based
+    llm_service.record_fallback("issue_classification")
     return classify_issue_rule_based(issue_title, issue_body or "")
+
+
+def pack(issues: list[Issue]) -> list[list[Issue]]:
+    """Split issues into size-bounded batches that each fit one ``classify_batch`` prompt."""
+    return pack_batches(
+        issues,
+        size_of=lambda i: len(i.title) + len(i.body[:LLM_BATCH_ITEM_CHARS]),
+        max_items=LLM_BATCH_MAX_ITEMS,
+        max_chars=LLM_BATCH_MAX_CHARS,
+    )
+
+
+@tracing.traced("agent.issue_classification.batch")
+async def classify_batch(issues: list[Issue]) -> list[dict]:
+    """Classify a batch of issues (see ``pack``) with one LLM prompt.
+
+    The prompt is answered with a JSON array keyed by item id. Items missing
+    from the answer or failing validation fall back to the single-item path.
+
+    Args:
+        issues: Issues to classify.
+
+    Returns:
+        One classification dict (same shape as ``classify``) per issue, in order.
+    """
+    if not llm_service.is_available():
+        llm_service.record_fallback("issue_classification", len(issues))
+        return [classify_issue_rule_based(i.title, i.body) for i in issues]
+
+    items = [
+        {
+            "id": str(idx),
+            "title": i.title,
+            "body": i.body[:LLM_BATCH_ITEM_CHARS],
+        }
+        for idx, i in enumerate(issues)
+    ]
+    answers = await _classify_llm_batch(items)
+
+    async def resolve(idx: int, issue: Issue) -> dict:
+        result = answers.get(str(idx))
+        if _is_valid(result):
+            result.pop("id", None)
+            return result
+        return await classify(issue.title, issue.body)
+
+    return list(await asyncio.gather(*(resolve(idx, i) for idx, i in enumerate(issues))))
+
+
+async def _classify_llm_batch(items: list[dict]) -> dict[str, dict]:
+    """Send one batch prompt and return the answers keyed by item id."""
+    prompt = f"""You are a GitHub issue classifier for an engineering team.
+
+Classify EACH issue below. Respond with ONLY a JSON array (no markdown, no explanation)
+containing exactly one object per issue, using the issue's "id":
+
+Issues:
+{json.dumps(items, ensure_ascii=False)}
+
+Required JSON format:
+[
+    {{
+        "id": "<issue id>",
+        "classification": "<Bug|Feature|Refactor|Question>",
+        "priority": "<Low|Medium|High>",
+        "suggested_labels": ["label1", "label2"],
+        "reasoning": "<brief explanation>",
+        "confidence_score": <0.0 to 1.0>
+    }}
+]
+
+Rules:
+- classification MUST be exactly one of: Bug, Feature, Refactor, Question
+- priority MUST be exactly one of: Low, Medium, High
+- suggested_labels should include relevant tags like "frontend", "backend", "security", "priority:high"
+- confidence_score is your confidence from 0.0 to 1.0"""
+
+    def complete(result) -> bool:
+        answers = _batch_answers(result)
+        return all(_is_valid(answers.get(item["id"])) for item in items)
+
+    result = await llm_service.generate(
+        prompt, expect_json=True, template="issue_classification_batch.v1", validate=complete,
+    )
+    return _batch_answers(result)
@@ -4,7 +4,20 @@ The planner contains NO LLM prompts. It only orchestrates
 the flow between GitHub service and specialized agents.
 """
 
-from services import github_service
+import time
+import asyncio
+import functools
+import contextvars
+from services import github_service, llm_service, sync_service, ownership_service
+from utils.batching import MicroBatcher
+from utils.singleflight import SingleFlight
+from utils.request_utils import to_http_exception
+from utils import tracing
+from schemas.github_models import Issue, PullRequest
+from utils.constants import (
+    AGENT_MAX_CONCURRENCY, LLM_BATCH_MAX_ITEMS, LLM_BATCH_MAX_CHARS,
+    LLM_BATCH_ITEM_CHARS, LLM_BATCH_LINGER, ANALYSIS_REUSE_SECONDS, BATCH_MAX_CONCURRENCY,
+)
 from agents import (
     issue_classification_agent,
     assignee_recommendation_agent,
@@ -14,159 +27,338 @@ from agents import (
 )
 
 
-async def analyze_issues(owner: str, repo: str) -> dict:
-    """Orchestrate issue analysis pipeline.
+# Concurrent identical analyses (same kind + owner/repo) share one pipeline run
+_singleflight = SingleFlight(reuse_seconds=ANALYSIS_REUSE_SECONDS)
 
-    Flow:
-    1. Fetch issues from GitHub
-    2. Call Issue Classification Agent for each issue
-    3. Fetch contributor data
-    4. Call Assignee Recommendation Agent for each issue
-    5. Aggregate structured output
-    """
-    # Step 1: Fetch issues
-    issues = await github_service.get_issues(owner, repo, state="open", per_page=10)
+# Analysis slots shared by every multi-repo batch; waiters are served first come, first served
+_batch_slots = asyncio.Semaphore(BATCH_MAX_CONCURRENCY)
 
-    if not issues:
-        return {
-            "repo": f"{owner}/{repo}",
-            "issues_analyzed": 0,
-            "classifications": [],
-            "assignee_recommendations": [],
-        }
+# Set by callers that want item progress (e.g. background jobs): called with (done, total)
+progress_hook: contextvars.ContextVar = contextvars.ContextVar("analysis_progress", default=None)
+
+
+def _coalesce(kind: str):
+    """Route an entry point through the single-flight layer, keyed by kind and repo."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        async def wrapper(owner: str, repo: str) -> dict:
+            key = (kind, owner.lower(), repo.lower())
+            with tracing.span(f"planner.{kind}", repo=f"{owner}/{repo}"):
+                return await _singleflight.do(key, lambda: fn(owner, repo))
+        return wrapper
+    return decorator
+
+
+def forget_results(owner: str, repo: str) -> int:
+    """Drop reusable analysis results for a repository."""
+    owner, repo = owner.lower(), repo.lower()
+    return _singleflight.forget(lambda key: key[1] == owner and key[2] == repo)
+
+
+def get_coalescing_stats() -> dict:
+    """Return how many analyses ran, were coalesced, or were reused."""
+    return {**_singleflight.stats, "reuse_seconds": ANALYSIS_REUSE_SECONDS}
+
+
+def _with_llm_usage(fn):
+    """Report the request's LLM calls and cache hits under "llm_usage" in the result."""
+    @functools.wraps(fn)
+    async def wrapper(owner: str, repo: str) -> dict:
+        with llm_service.track_usage() as usage:
+            result = await fn(owner, repo)
+        return {**result, "llm_usage": dict(usage)}
+    return wrapper
+
+
+async def _contributors(owner: str, repo: str):
+    """Contributor snapshot, timed as its own planner step."""
+    with tracing.span("planner.contributors"):
+        return await sync_service.get_contributors(owner, repo)
+
+
+def _in_order(items: list[dict], numbers: list[int], key: str) -> list[dict]:
+    position = {n: i for i, n in enumerate(numbers)}
+    return sorted(items, key=lambda item: position.get(item.get(key), len(position)))
 
-    # Step 2: Classify each issue
-    classifications = []
-    for issue in issues:
-        analysis = await issue_classification_agent.classify(
-            issue_title=issue.get("title", ""),
-            issue_body=issue.get("body", ""),
-        )
-        classifications.append({
-            "issue_number": issue.get("number", 0),
-            "issue_title": issue.get("title", ""),
-            "analysis": analysis,
-        })
-
-    # Step 3: Fetch contributors
-    contributors = await github_service.get_contributors(owner, repo)
-
-    # Step 4: Recommend assignees for each issue
-    assignee_recs = []
-    for issue in issues:
-        rec = await assignee_recommendation_agent.recommend(
-            issue_data=issue,
-            contributors=contributors,
-        )
-        assignee_recs.append({
-            "issue_number": issue.get("number", 0),
-            "issue_title": issue.get("title", ""),
-            **rec,
-        })
 
-    # Step 5: Aggregate
+async def _collect(pipeline, owner: str, repo: str, fields: dict[str, str], number_key: str) -> dict:
+    """Run an emitting pipeline and aggregate its items into one result.
+
+    ``fields`` maps each item event to its result field; items are ordered
+    like the numbers announced in the "start" event. Progress is reported
+    to ``progress_hook`` when one is set.
+    """
+    results: dict[str, list] = {event: [] for event in fields}
+    numbers: list[int] = []
+    progress = progress_hook.get()
+
+    def collect(event: str, data: dict):
+        if event == "start":
+            numbers.extend(data[f"{number_key}s"])
+        else:
+            results[event].append(data)
+        if progress is not None:
+            progress(sum(len(items) for items in results.values()), len(numbers) * len(fields))
+
+    summary = await pipeline(owner, repo, collect)
     return {
-        "repo": f"{owner}/{repo}",
-        "issues_analyzed": len(issues),
-        "classifications": classifications,
-        "assignee_recommendations": assignee_recs,
+        **summary,
+        **{field: _in_order(results[event], numbers, number_key) for event, field in fields.items()},
     }
 
 
-async def analyze_prs(owner: str, repo: str) -> dict:
-    """Orchestrate PR analysis pipeline.
+async def _stream(pipeline, owner: str, repo: str):
+    """Run an emitting pipeline in its own task and yield (event, data) as items are ready.
+
+    The last event is ("summary", ...) carrying the pipeline's totals and LLM
+    usage. Pipeline errors are re-raised to the consumer; closing the
+    generator cancels the pipeline.
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+    step = f"planner.{pipeline.__name__.strip('_').removesuffix('_pipeline')}"
+
+    def emit(event: str, data: dict):
+        queue.put_nowait((event, data))
+
+    async def produce():
+        try:
+            with llm_service.track_usage() as usage, tracing.span(step, repo=f"{owner}/{repo}"):
+                summary = await pipeline(owner, repo, emit)
+            emit("summary", {**summary, "llm_usage": dict(usage)})
+        finally:
+            queue.put_nowait((None, None))
+
+    task = asyncio.create_task(produce())
+    try:
+        while True:
+            event, data = await queue.get()
+            if event is None:
+                break
+            yield event, data
+        await task
+    finally:
+        task.cancel()
+
+
+async def _issues_pipeline(owner: str, repo: str, emit) -> dict:
+    """Issue pipeline; emits each classification and assignee recommendation when ready.
 
     Flow:
-    1. Fetch PRs from GitHub
-    2. For each PR, fetch changed files
-    3. Call PR Intelligence Agent
-    4. Fetch contributor file history
-    5. Call Reviewer Recommendation Agent
-    6. Aggregate output
+    1. Sync the repo's issue deltas and read open issues from the local store
+    2. Call Issue Classification Agent per batch of issues (one LLM prompt each)
+    3. Fetch contributor data (overlapped with step 2)
+    4. Once contributors arrive, score all issues × contributors in one matrix (ownership
+       of the paths each issue mentions, repo-wide when none), then call the
+       Assignee Recommendation Agent per issue
     """
-    # Step 1: Fetch PRs
-    pulls = await github_service.get_pulls(owner, repo, state="all", per_page=10)
+    # Step 1: Sync and read issues
+    with tracing.span("planner.sync"):
+        await sync_service.sync_repo(owner, repo)
+        issues = await sync_service.list_issues(owner, repo, state="open", limit=10)
+    emit("start", {
+        "repo": f"{owner}/{repo}",
+        "issues_analyzed": len(issues),
+        "issue_numbers": [i.number for i in issues],
+    })
+    if not issues:
+        return {"repo": f"{owner}/{repo}", "issues_analyzed": 0}
+
+    sem = asyncio.Semaphore(AGENT_MAX_CONCURRENCY)
+
+    # Step 3 runs in the background while issues are classified
+    contributors_task = asyncio.create_task(_contributors(owner, repo))
+
+    # Step 2: Classify issues, emitting each batch as its prompt returns
+    async def classify(batch: list[Issue]):
+        analyses = await issue_classification_agent.classify_batch(batch)
+        for issue, analysis in zip(batch, analyses):
+            emit("classification", {
+                "issue_number": issue.number,
+                "issue_title": issue.title,
+                "analysis": analysis,
+            })
+
+    # Step 4: Score every issue against every contributor in one matrix, then
+    # enrich each issue's top candidates
+    async def recommend_all():
+        with tracing.span("planner.ownership"):
+            ownerships = await asyncio.gather(*(
+                ownership_service.shares(owner, repo, ownership_service.paths_in_text(f"{i.title} {i.body}"))
+                for i in issues
+            ))
+        contributors = await contributors_task
+        ranked = assignee_recommendation_agent.rank(contributors, list(ownerships))
+
+        async def recommend(issue: Issue, candidates: list[dict]):
+            async with sem:
+                rec = await assignee_recommendation_agent.recommend(
+                    issue_data=issue,
+                    contributors=contributors,
+                    candidates=candidates,
+                )
+            emit("assignee_recommendation", {
+                "issue_number": issue.number,
+                "issue_title": issue.title,
+                **rec,
+            })
+
+        await asyncio.gather(*(recommend(issue, c) for issue, c in zip(issues, ranked)))
+
+    try:
+        await asyncio.gather(
+            *(classify(batch) for batch in issue_classification_agent.pack(issues)),
+            recommend_all(),
+        )
+    finally:
+        contributors_task.cancel()
+
+    return {"repo": f"{owner}/{repo}", "issues_analyzed": len(issues)}
 
+
+@_coalesce("issues")
+@_with_llm_usage
+async def analyze_issues(owner: str, repo: str) -> dict:
+    """Orchestrate issue analysis pipeline and aggregate its structured output."""
+    return await _collect(_issues_pipeline, owner, repo, {
+        "classification": "classifications",
+        "assignee_recommendation": "assignee_recommendations",
+    }, "issue_number")
+
+
+def stream_issues(owner: str, repo: str):
+    """Issue analysis as an async stream of (event, data) pairs.
+
+    Events: "start", then "classification" and "assignee_recommendation" as
+    each is ready, then "summary".
+    """
+    return _stream(_issues_pipeline, owner, repo)
+
+
+async def _prs_pipeline(owner: str, repo: str, emit) -> dict:
+    """PR pipeline; emits each PR analysis and reviewer recommendation when ready.
+
+    Flow:
+    1. Sync the repo's PR deltas and read recent PRs from the local store
+    2. Load changed files (fetched only for PRs whose head commit changed); each
+       PR continues as soon as its own list is ready
+    3. Call PR Intelligence Agent per PR concurrently (micro-batched)
+    4. Fetch contributor file history (in the background from the start)
+    5. Call Reviewer Recommendation Agent per PR with ownership of its changed paths
+       (independent of step 3)
+    """
+    # Step 1: Sync and read PRs
+    with tracing.span("planner.sync"):
+        await sync_service.sync_repo(owner, repo)
+        pulls = await sync_service.list_pulls(owner, repo, state="all", limit=10)
+    emit("start", {
+        "repo": f"{owner}/{repo}",
+        "prs_analyzed": len(pulls),
+        "pr_numbers": [p.number for p in pulls],
+    })
     if not pulls:
-        return {
+        return {"repo": f"{owner}/{repo}", "prs_analyzed": 0}
+
+    sem = asyncio.Semaphore(AGENT_MAX_CONCURRENCY)
+
+    # PRs whose files land close together share one batched intelligence prompt
+    batcher = MicroBatcher(
+        pr_intelligence_agent.analyze_batch,
+        size_of=lambda item: len(item["pr_title"]) + len(item["pr_description"][:LLM_BATCH_ITEM_CHARS]),
+        max_items=LLM_BATCH_MAX_ITEMS,
+        max_chars=LLM_BATCH_MAX_CHARS,
+        linger=LLM_BATCH_LINGER,
+    )
+
+    # Step 4 runs in the background while PRs are analyzed
+    contributors_task = asyncio.create_task(_contributors(owner, repo))
+
+    # Step 3 per PR
+    async def analyze(pr: PullRequest, files: asyncio.Future):
+        file_paths = await asyncio.shield(files)  # shared with the other step for this PR
+        item = {
+            "pr_title": pr.title,
+            "pr_description": pr.body,
+            "files_changed_count": pr.changed_files if pr.changed_files is not None else len(file_paths),
+            "file_paths": file_paths,
             "repo": f"{owner}/{repo}",
-            "prs_analyzed": 0,
-            "pr_intelligence": [],
-            "reviewer_recommendations": [],
         }
+        if llm_service.is_available():
+            analysis = await batcher.submit(item)
+        else:
+            analysis = await pr_intelligence_agent.analyze(**item)
+        emit("pr_intelligence", {"pr_number": pr.number, "pr_title": pr.title, "analysis": analysis})
+
+    # Step 5 per PR
+    async def recommend(pr: PullRequest, files: asyncio.Future):
+        file_paths = await asyncio.shield(files)  # shared with the other step for this PR
+        with tracing.span("planner.ownership"):
+            ownership = await ownership_service.shares(owner, repo, file_paths)
+        contributors = await contributors_task
+        async with sem:
+            rec = await reviewer_recommendation_agent.recommend(
+                changed_files=file_paths,
+                contributors=contributors,
+                pr_author=pr.author,
+                ownership=ownership,
+            )
+        emit("reviewer_recommendation", {"pr_number": pr.number, "pr_title": pr.title, **rec})
+
+    files: dict[int, asyncio.Future] = {}
+    try:
+        # Step 2: Changed files — one GraphQL query or per-PR REST calls for stale lists only
+        with tracing.span("planner.pr_files"):
+            files = await sync_service.get_pr_file_paths(owner, repo, pulls)
+        await asyncio.gather(
+            *(analyze(pr, files[pr.number]) for pr in pulls),
+            *(recommend(pr, files[pr.number]) for pr in pulls),
+        )
+    finally:
+        batcher.cancel()
+        contributors_task.cancel()
+        for pending in files.values():
+            pending.cancel()
 
-    # Step 2 & 3: Analyze each PR
-    pr_analyses = []
-    pr_files_map = {}
-    for pr in pulls:
-        pr_number = pr.get("number", 0)
+    return {"repo": f"{owner}/{repo}", "prs_analyzed": len(pulls)}
 
-        # Fetch files changed
-        try:
-            files = await github_service.get_pr_files(owner, repo, pr_number)
-            file_paths = [f.get("filename", "") for f in files]
-        except Exception:
-            file_paths = []
-
-        pr_files_map[pr_number] = file_paths
-
-        analysis = await pr_intelligence_agent.analyze(
-            pr_title=pr.get("title", ""),
-            pr_description=pr.get("body", "") or "",
-            files_changed_count=pr.get("changed_files", len(file_paths)),
-            file_paths=file_paths,
-        )
-        pr_analyses.append({
-            "pr_number": pr_number,
-            "pr_title": pr.get("title", ""),
-            "analysis": analysis,
-        })
-
-    # Step 4: Fetch contributors
-    contributors = await github_service.get_contributors(owner, repo)
-
-    # Step 5: Recommend reviewers for each PR
-    reviewer_recs = []
-    for pr in pulls:
-        pr_number = pr.get("number", 0)
-        changed_files = pr_files_map.get(pr_number, [])
-        pr_author = pr.get("user", {}).get("login", "")
-
-        rec = await reviewer_recommendation_agent.recommend(
-            changed_files=changed_files,
-            contributors=contributors,
-            pr_author=pr_author,
-        )
-        reviewer_recs.append({
-            "pr_number": pr_number,
-            "pr_title": pr.get("title", ""),
-            **rec,
-        })
 
-    # Step 6: Aggregate
-    return {
-        "repo": f"{owner}/{repo}",
-        "prs_analyzed": len(pulls),
-        "pr_intelligence": pr_analyses,
-        "reviewer_recommendations": reviewer_recs,
-    }
+@_coalesce("prs")
+@_with_llm_usage
+async def analyze_prs(owner: str, repo: str) -> dict:
+    """Orchestrate PR analysis pipeline and aggregate its structured output."""
+    return await _collect(_prs_pipeline, owner, repo, {
+        "pr_intelligence": "pr_intelligence",
+        "reviewer_recommendation": "reviewer_recommendations",
+    }, "pr_number")
+
+
+def stream_prs(owner: str, repo: str):
+    """PR analysis as an async stream of (event, data) pairs.
+
+    Events: "start", then "pr_intelligence" and "reviewer_recommendation" as
+    each is ready, then "summary".
+    """
+    return _stream(_prs_pipeline, owner, repo)
 
 
+@_coalesce("workload")
+@_with_llm_usage
 async def analyze_workload(owner: str, repo: str) -> dict:
     """Orchestrate workload analysis pipeline.
 
     Flow:
-    1. Fetch open issues (assigned) + open PRs (pending review)
+    1. Sync the repo, then count open issues (assigned) + open PRs (pending review) from the store
     2. Fetch contributors
     3. Call Workload Analysis Agent
     4. Return structured load scores
     """
     # Step 1: Gather workload data
-    issue_counts = await github_service.get_user_issues(owner, repo)
-    review_counts = await github_service.get_pending_reviews(owner, repo)
+    with tracing.span("planner.sync"):
+        await sync_service.sync_repo(owner, repo)
+        issue_counts = await sync_service.get_user_issues(owner, repo)
+        review_counts = await sync_service.get_pending_reviews(owner, repo)
 
     # Step 2: Fetch contributors
-    contributors = await github_service.get_contributors(owner, repo)
+    contributors = await _contributors(owner, repo)
 
     # Step 3: Analyze
     result = await workload_analysis_agent.analyze(
@@ -182,6 +374,8 @@ async def analyze_workload(owner: str, repo: str) -> dict:
 
 
 
+@_coalesce("repository")
+@_with_llm_usage
 async def analyze_repository(owner: str, repo: str) -> dict:
     """Orchestrate repository analysis pipeline.
 
@@ -219,7 +413,7 @@ async def analyze_repository(owner: str, repo: str) -> dict:
     # Step 4: Get contributors count
     contributors_count = 0
     try:
-        contributors = await github_service.get_contributors(owner, repo)
+        contributors = await _contributors(owner, repo)
         contributors_count = len(contributors) if contributors else 0
         logger.info(f"Contributors fetched: {contributors_count} contributors")
     except Exception as e:
@@ -261,3 +455,71 @@ async def analyze_repository(owner: str, repo: str) -> dict:
         },
         "analysis": analysis
     }
+
+
+ANALYSES = {
+    "issues": analyze_issues,
+    "prs": analyze_prs,
+    "workload": analyze_workload,
+    "repository": analyze_repository,
+}
+
+
+async def stream_batch(repos: list[tuple[str, str]], analyses: list[str]):
+    """Run analyses over many repositories and yield (event, data) as each finishes.
+
+    Events: "start", then one "result" or "error" per (repo, analysis), then
+    "summary". At most BATCH_MAX_CONCURRENCY analyses run at once across all
+    batches. Each repo runs its analyses one after another and queues again
+    for a slot between them, so slots rotate round-robin over repos and one
+    large repo cannot hold the budget. A repo that is missing or inaccessible
+    skips its remaining analyses. Closing the generator cancels the batch.
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+    counts = {"succeeded": 0, "failed": 0}
+    started = time.monotonic()
+
+    async def run_repo(owner: str, repo: str):
+        for kind in analyses:
+            item = {"repo": f"{owner}/{repo}", "analysis": kind}
+            async with _batch_slots:
+                try:
+                    result = await ANALYSES[kind](owner, repo)
+                except Exception as e:
+                    error = to_http_exception(e, owner, repo)
+                    counts["failed"] += 1
+                    queue.put_nowait(("error", {**item, "status_code": error.status_code, "detail": error.detail}))
+                    if error.status_code in (401, 403, 404):
+                        return
+                    continue
+            counts["succeeded"] += 1
+            queue.put_nowait(("result", {**item, "result": result}))
+
+    async def run_all():
+        try:
+            # GitHub computes contributor stats lazily; ask for every repo's up front
+            await asyncio.gather(
+                *(sync_service.prewarm_contributors(owner, repo) for owner, repo in repos),
+                return_exceptions=True,
+            )
+            await asyncio.gather(*(run_repo(owner, repo) for owner, repo in repos))
+        finally:
+            queue.put_nowait((None, None))
+
+    yield "start", {"repos": [f"{o}/{r}" for o, r in repos], "analyses": analyses}
+    task = asyncio.create_task(run_all())
+    try:
+        while True:
+            event, data = await queue.get()
+            if event is None:
+                break
+            yield event, data
+        await task
+    finally:
+        task.cancel()
+    yield "summary", {
+        "repos": len(repos),
+        **counts,
+        "elapsed_seconds": round(time.monotonic() - started, 2),
+    }
+
@@ -1,13 +1,43 @@
 """PR Intelligence Agent — analyzes PRs for risk, summary, and review checklists."""
 
+import json
+import asyncio
 from services import llm_service
-from utils.scoring_utils import calculate_pr_risk
+from utils.batching import pack_batches
+from utils.scoring_utils import calculate_pr_risk, calculate_pr_risks
+from utils.keyword_matcher import KeywordMatcher
+from utils.constants import (
+    LLM_BATCH_MAX_ITEMS, LLM_BATCH_MAX_CHARS, LLM_BATCH_ITEM_CHARS, CHECKLIST_PATH_PATTERNS,
+)
+from utils import tracing
 
+# Path fragments match anywhere in a path ("appconfig.js" counts as config)
+_CHECKLIST_MATCHER = KeywordMatcher(CHECKLIST_PATH_PATTERNS, whole_words=False)
 
+
+def _is_valid(result) -> bool:
+    # An empty or truncated summary is not worth keeping
+    return isinstance(result, dict) and bool(result.get("summary")) and len(result["summary"]) > 10
+
+
+def _batch_answers(result) -> dict[str, dict]:
+    """Batch answers keyed by item id."""
+    if isinstance(result, dict):
+        result = result.get("results", [])
+    if not isinstance(result, list):
+        return {}
+    return {str(r.get("id")): r for r in result if isinstance(r, dict)}
+
+
+@tracing.traced("agent.pr_intelligence")
 async def analyze(pr_title: str, pr_description: str, files_changed_count: int,
-                  file_paths: list[str] | None = None) -> dict:
+                  file_paths: list[str] | None = None, repo: str | None = None,
+                  risk_level: str | None = None) -> dict:
     """Analyze a PR for risk, generate summary and review checklist.
 
+    ``repo`` ("owner/repo") selects per-repo core paths; a precomputed
+    ``risk_level`` skips the path scan.
+
     Returns:
         {
             "summary": "...",
@@ -16,7 +46,7 @@ async def analyze(pr_title: str, pr_description: str, files_changed_count: int,
         }
     """
     paths = file_paths or []
-    risk_level = calculate_pr_risk(files_changed_count, paths)
+    risk_level = risk_level or calculate_pr_risk(files_changed_count, paths, repo)
 
     # Try LLM for intelligent summary + checklist
     if llm_service.is_available():
@@ -48,14 +78,15 @@ IMPORTANT:
 - Include specific details about what changes are being made
 - The review_checklist should contain 3-5 specific, actionable items based on the files changed."""
 
-        result = await llm_service.generate(prompt, expect_json=True)
-        if result and isinstance(result, dict):
+        result = await llm_service.generate(
+            prompt, expect_json=True, template="pr_intelligence.v1", validate=_is_valid,
+        )
+        if _is_valid(result):
             result["risk_level"] = risk_level  # Keep rule-based risk
-            # Ensure summary is not empty or truncated
-            if result.get("summary") and len(result["summary"]) > 10:
-                return result
+            return result
 
     # Fallback — generate checklist based on file patterns
+    llm_service.record_fallback("pr_intelligence")
     checklist = _generate_checklist(paths, files_changed_count)
     
     # Create a complete summary without truncation
@@ -73,6 +104,100 @@ IMPORTANT:
     }
 
 
+@tracing.traced("agent.pr_intelligence.batch")
+async def analyze_batch(prs: list[dict]) -> list[dict]:
+    """Analyze many PRs with one LLM prompt per batch.
+
+    PRs are packed into size-bounded batches; each batch is answered with a
+    JSON array keyed by item id. Items missing from the answer or with an
+    unusable summary fall back to the single-item path.
+
+    Args:
+        prs: Dicts with "pr_title", "pr_description", "files_changed_count",
+            "file_paths" and optionally "repo" (the keyword arguments of ``analyze``).
+
+    Returns:
+        One analysis dict (same shape as ``analyze``) per PR, in order.
+    """
+    # Core-path risk for every PR in one scan (all items in a batch share a repo)
+    risks = calculate_pr_risks(
+        [(pr["files_changed_count"], pr.get("file_paths") or []) for pr in prs],
+        prs[0].get("repo") if prs else None,
+    )
+    if not llm_service.is_available():
+        return list(await asyncio.gather(*(analyze(**pr, risk_level=risk) for pr, risk in zip(prs, risks))))
+
+    items = []
+    for idx, pr in enumerate(prs):
+        paths = pr.get("file_paths") or []
+        risk_level = risks[idx]
+        items.append({
+            "id": str(idx),
+            "title": pr["pr_title"],
+            "description": (pr.get("pr_description") or "No description")[:LLM_BATCH_ITEM_CHARS],
+            "files_changed": pr["files_changed_count"],
+            "file_paths": paths[:15],
+            "risk_level": risk_level,
+        })
+
+    batches = pack_batches(
+        items,
+        size_of=lambda item: len(item["title"]) + len(item["description"]) + 40 * len(item["file_paths"]),
+        max_items=LLM_BATCH_MAX_ITEMS,
+        max_chars=LLM_BATCH_MAX_CHARS,
+    )
+    answers: dict[str, dict] = {}
+    for batch_answers in await asyncio.gather(*(_analyze_llm_batch(b) for b in batches)):
+        answers.update(batch_answers)
+
+    async def resolve(idx: int, pr: dict) -> dict:
+        result = answers.get(str(idx))
+        if _is_valid(result):
+            return {
+                "summary": result["summary"],
+                "risk_level": risks[idx],  # Keep rule-based risk
+                "review_checklist": result.get("review_checklist") or [],
+            }
+        return await analyze(**pr, risk_level=risks[idx])
+
+    return list(await asyncio.gather(*(resolve(idx, pr) for idx, pr in enumerate(prs))))
+
+
+async def _analyze_llm_batch(items: list[dict]) -> dict[str, dict]:
+    """Send one batch prompt and return the answers keyed by item id."""
+    prompt = f"""You are a senior code reviewer. Analyze EACH pull request below and provide a structured review.
+
+Pull Requests:
+{json.dumps(items, ensure_ascii=False)}
+
+Respond with ONLY a JSON array containing exactly one object per pull request, using its "id":
+[
+    {{
+        "id": "<pull request id>",
+        "summary": "<Complete 2-3 sentence summary of what this PR does. Be specific and include key details.>",
+        "review_checklist": [
+            "<specific review item 1>",
+            "<specific review item 2>",
+            "<specific review item 3>"
+        ]
+    }}
+]
+
+IMPORTANT:
+- Make each summary COMPLETE - don't cut off mid-sentence
+- Include specific details about what changes are being made
+- Each review_checklist should contain 3-5 specific, actionable items based on the files changed."""
+
+    def complete(result) -> bool:
+        answers = _batch_answers(result)
+        return all(_is_valid(answers.get(item["id"])) for item in items)
+
+    result = await llm_service.generate(
+        prompt, expect_json=True, template="pr_intelligence_batch.v1", validate=complete,
+    )
+    return _batch_answers(result)
+
+
 def _generate_checklist(file_paths: list[str], files_changed: int) -> list[str]:
     """Generate a basic review checklist from file patterns."""
     checklist = []
@@ -80,23 +205,23 @@ def _generate_checklist(file_paths: list[str], files_changed: int) -> list[str]:
     if files_changed > 10:
         checklist.append("Large PR — consider splitting into smaller focused changes")
 
-    path_text = " ".join(file_paths).lower()
+    found = _CHECKLIST_MATCHER.hits("\n".join(file_paths))
 
-    if any(ext in path_text for ext in [".test.", "_test.", "spec."]):
+    if "tests" in found:
         checklist.append("Verify test coverage is adequate for the changes")
     else:
         checklist.append("Add unit tests for new/modified logic")
 
-    if any(p in path_text for p in ["config", ".env", "settings"]):
+    if "config" in found:
         checklist.append("Review configuration changes for security implications")
 
-    if any(p in path_text for p in ["migration", "schema", "model"]):
+    if "database" in found:
         checklist.append("Check database migration is backward-compatible")
 
-    if any(p in path_text for p in ["api", "route", "endpoint"]):
+    if "api" in found:
         checklist.append("Verify API contract — check request/response schemas")
 
-    if any(p in path_text for p in ["auth", "security", "token", "password"]):
+    if "security" in found:
         checklist.append("Security-sensitive code — review for vulnerabilities")
 
     if not checklist:
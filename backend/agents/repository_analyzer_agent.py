@@ -1,8 +1,14 @@
 """Repository Analyzer Agent — analyzes repository structure, features, and codebase insights."""
 
 from services import llm_service
+from utils.keyword_matcher import KeywordMatcher
+from utils.constants import REPO_FEATURE_KEYWORDS
+from utils import tracing
 
+_FEATURE_MATCHER = KeywordMatcher({kw: [kw] for kw in REPO_FEATURE_KEYWORDS})
 
+
+@tracing.traced("agent.repository_analyzer")
 async def analyze(repo_data: dict, languages: dict, topics: list[str], 
                   readme_content: str = "", contributors_count: int = 0) -> dict:
     """Analyze a repository for structure, features, and insights.
@@ -124,7 +130,7 @@ Focus on:
 - Architecture and design patterns used
 - Actionable recommendations for improvement"""
 
-        result = await llm_service.generate(prompt, expect_json=True)
+        result = await llm_service.generate(prompt, expect_json=True, template="repository_analysis.v1")
         if result and isinstance(result, dict):
             # Ensure tech stack is not empty - use our detected one if LLM's is empty
             if not result.get("technology_stack") or len(result.get("technology_stack", [])) == 0:
@@ -134,6 +140,9 @@ Focus on:
             return result
 
     # Fallback — rule-based analysis
+    llm_service.record_fallback(
+        "repository_analyzer", reason=None if readme_content or not llm_service.is_available() else "no_readme",
+    )
     overview = _generate_overview(repo_name, description, primary_language, stars, forks)
     key_features = _extract_features(description, feature_tags, readme_content)
     architecture = _infer_architecture(tech_stack, feature_tags, repo_name.lower())
@@ -159,34 +168,12 @@ def _extract_features(description: str, topics: list[str], readme: str) -> list[
     """Extract key features from available data."""
     features = []
     
-    # From topics
-    feature_keywords = {
-        "api": "RESTful API",
-        "rest": "REST API",
-        "graphql": "GraphQL API",
-        "cli": "Command-line interface",
-        "web": "Web application",
-        "mobile": "Mobile support",
-        "desktop": "Desktop application",
-        "database": "Database integration",
-        "authentication": "User authentication",
-        "authorization": "Access control",
-        "testing": "Automated testing",
-        "ci-cd": "CI/CD pipeline",
-        "docker": "Docker containerization",
-        "kubernetes": "Kubernetes orchestration",
-        "microservices": "Microservices architecture",
-        "serverless": "Serverless functions",
-        "machine-learning": "Machine learning capabilities",
-        "ai": "AI-powered features",
-        "real-time": "Real-time updates",
-        "websocket": "WebSocket support"
-    }
-    
-    text = f"{description} {' '.join(topics)} {readme[:500]}".lower()
-    
-    for keyword, feature in feature_keywords.items():
-        if keyword in text and feature not in features:
+    # From description, topics and the start of the README
+    text = f"{description} {' '.join(topics)} {readme[:500]}"
+    found = _FEATURE_MATCHER.hits(text)
+
+    for keyword, feature in REPO_FEATURE_KEYWORDS.items():
+        if keyword in found and feature not in features:
             features.append(feature)
     
     # Generic features if none found
@@ -2,12 +2,22 @@
 
 from services import llm_service
 from utils.scoring_utils import score_reviewer
+from schemas.github_models import Contributor
+from utils import tracing
 
 
-async def recommend(changed_files: list[str], contributors: list[dict],
-                    pr_author: str = "") -> dict:
+def _is_valid(result) -> bool:
+    return isinstance(result, dict) and "suggested_reviewers" in result
+
+
+@tracing.traced("agent.reviewer_recommendation")
+async def recommend(changed_files: list[str], contributors: list[Contributor],
+                    pr_author: str = "", ownership: dict[str, float] | None = None) -> dict:
     """Recommend reviewers for a PR based on file ownership and activity.
 
+    ``ownership`` maps logins to their share (0-1) of recent changes to the
+    changed paths (see ownership_service.shares).
+
     Returns:
         {
             "suggested_reviewers": [
@@ -18,18 +28,22 @@ async def recommend(changed_files: list[str], contributors: list[dict],
     if not contributors:
         return {"suggested_reviewers": []}
 
+    ownership = ownership or {}
+
     # Step 1: Score each contributor
     scored = []
     for c in contributors:
-        login = c.get("login", "unknown")
+        login = c.login
         # Skip the PR author
         if login == pr_author:
             continue
-        confidence = score_reviewer(c, changed_files)
+        share = ownership.get(login, 0.0)
+        confidence = score_reviewer(c, share)
         scored.append({
             "developer_name": login,
             "confidence_score": confidence,
-            "total_commits": c.get("total_commits", 0),
+            "total_commits": c.total_commits,
+            "ownership": share,
         })
 
     scored.sort(key=lambda x: x["confidence_score"], reverse=True)
@@ -38,7 +52,8 @@ async def recommend(changed_files: list[str], contributors: list[dict],
     # Step 2: LLM enrichment
     if llm_service.is_available() and top_reviewers:
         reviewers_text = "\n".join(
-            f"- {r['developer_name']}: confidence={r['confidence_score']}, commits={r['total_commits']}"
+            f"- {r['developer_name']}: confidence={r['confidence_score']}, commits={r['total_commits']}, "
+            f"owns {r['ownership']:.0%} of recent changes to these files"
             for r in top_reviewers
         )
         files_text = ", ".join(changed_files[:10])
@@ -57,17 +72,25 @@ Respond with ONLY a JSON object:
         {{"developer_name": "<name>", "confidence_score": <score>, "reasoning": "<1-2 sentences>"}}
     ]
 }}"""
-        result = await llm_service.generate(prompt, expect_json=True)
-        if result and isinstance(result, dict) and "suggested_reviewers" in result:
+        result = await llm_service.generate(
+            prompt, expect_json=True, template="reviewer_recommendation.v1", validate=_is_valid,
+        )
+        if _is_valid(result):
             return result
 
     # Fallback reasoning
+    if top_reviewers:
+        llm_service.record_fallback("reviewer_recommendation")
     return {
         "suggested_reviewers": [
             {
                 "developer_name": r["developer_name"],
                 "confidence_score": r["confidence_score"],
-                "reasoning": f"Active contributor with {r['total_commits']} commits. Confidence score: {r['confidence_score']}/100."
+                "reasoning": (
+                    f"Active contributor with {r['total_commits']} commits"
+                    + (f" and {r['ownership']:.0%} of recent changes to these files" if r["ownership"] else "")
+                    + f". Confidence score: {r['confidence_score']}/100."
+                )
             }
             for r in top_reviewers
         ]
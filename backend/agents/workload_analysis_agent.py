@@ -2,10 +2,13 @@
 
 from services import llm_service
 from utils.scoring_utils import calculate_load_score
+from schemas.github_models import Contributor
+from utils import tracing
 
 
+@tracing.traced("agent.workload_analysis")
 async def analyze(issue_counts: dict[str, int], review_counts: dict[str, int],
-                  contributors: list[dict]) -> dict:
+                  contributors: list[Contributor]) -> dict:
     """Analyze developer workload across issues and PR reviews.
 
     Returns:
@@ -19,7 +22,7 @@ async def analyze(issue_counts: dict[str, int], review_counts: dict[str, int],
     # Collect all known developers
     all_devs = set(issue_counts.keys()) | set(review_counts.keys())
     for c in contributors:
-        all_devs.add(c.get("login", ""))
+        all_devs.add(c.login)
     all_devs.discard("")
 
     # Build workload list
@@ -71,11 +74,12 @@ Consider who is overloaded and who has capacity. Be specific with names.
 
 Respond with ONLY a plain text recommendation (no JSON, no markdown)."""
 
-        result = await llm_service.generate(prompt, expect_json=False)
+        result = await llm_service.generate(prompt, expect_json=False, template="workload_recommendation.v1")
         if result and isinstance(result, str):
             return result
 
     # Fallback — rule-based recommendation
+    llm_service.record_fallback("workload_analysis")
     if len(workload) == 0:
         return "No workload data available."
 
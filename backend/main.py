@@ -2,7 +2,8 @@
 
 import os
 import logging
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
 
@@ -18,7 +19,9 @@ from services import llm_service
 llm_service.init_llm()
 
 # Initialize GitHub token from env
-from services import github_service
+from services import github_service, repo_store, sync_service, ownership_service, job_service
+from agents import planner_agent
+from utils import metrics, tracing
 token = os.getenv("GITHUB_TOKEN", "")
 if token:
     github_service.set_token(token)
@@ -26,11 +29,26 @@ if token:
 else:
     logger.warning("GITHUB_TOKEN not set — configure via POST /api/ai/config/token")
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Open shared clients on startup and release them on shutdown."""
+    await github_service.start_client()
+    await job_service.start_workers()
+    yield
+    await job_service.stop_workers()
+    await github_service.close_client()
+    llm_service.close()
+    repo_store.close()
+    job_service.close()
+
+
 # Create FastAPI app
 app = FastAPI(
     title="DevIntel AI — Multi-Agent Backend",
     description="Autonomous Dev Productivity Assistant powered by LLM agents",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 # CORS — allow frontend on port 3000
@@ -40,18 +58,32 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing", "X-Profile-Id"],
 )
 
+# Per-route latency histograms for /api/ai/metrics
+app.add_middleware(metrics.RequestMetricsMiddleware)
+# Span tree per request: Server-Timing header, X-Debug-Trace / X-Profile opt-ins
+app.add_middleware(tracing.TracingMiddleware)
+
 # ---- Register Routes ----
 from routes.issues import router as issues_router
 from routes.prs import router as prs_router
 from routes.workload import router as workload_router
 from routes.repository import router as repository_router
+from routes.admin import router as admin_router
+from routes.webhooks import router as webhooks_router
+from routes.jobs import router as jobs_router
+from routes.batch import router as batch_router
 
 app.include_router(issues_router)
 app.include_router(prs_router)
 app.include_router(workload_router)
 app.include_router(repository_router)
+app.include_router(admin_router)
+app.include_router(webhooks_router)
+app.include_router(jobs_router)
+app.include_router(batch_router)
 
 
 # ---- Config Endpoints ----
@@ -85,9 +117,23 @@ async def config_status():
     return {
         "github_connected": bool(github_service.get_token()),
         "llm_available": llm_service.is_available(),
+        "github_cache": await github_service.get_cache_stats(),
+        "github_rate_limit": github_service.get_rate_limit_status(),
+        "github_graphql": github_service.get_graphql_stats(),
+        "llm": await llm_service.get_stats(),
+        "analysis_coalescing": planner_agent.get_coalescing_stats(),
+        "repo_sync": sync_service.get_stats(),
+        "ownership_index": ownership_service.get_stats(),
+        "jobs": job_service.get_stats(),
     }
 
 
+@app.get("/api/ai/metrics", tags=["Health"])
+async def metrics_endpoint():
+    """Prometheus scrape endpoint: request, GitHub, LLM, fallback and cache metrics."""
+    return Response(content=metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+
 @app.get("/api/ai/health", tags=["Health"])
 async def health():
     """Health check endpoint."""
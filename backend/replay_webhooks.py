@@ -0,0 +1,48 @@
+"""Replay recorded GitHub webhook deliveries against a running backend.
+
+Each file holds one delivery as ``{"event": "<X-GitHub-Event>", "payload": {...}}``.
+Bodies are signed with GITHUB_WEBHOOK_SECRET exactly as GitHub would.
+
+    python replay_webhooks.py deliveries/*.json [--url http://localhost:8000/api/ai/webhooks/github]
+"""
+
+import sys
+import hmac
+import json
+import uuid
+import hashlib
+import argparse
+import httpx
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from utils.constants import GITHUB_WEBHOOK_SECRET
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("files", nargs="+", help="Recorded delivery files")
+    parser.add_argument("--url", default="http://localhost:8000/api/ai/webhooks/github")
+    parser.add_argument("--secret", default=GITHUB_WEBHOOK_SECRET)
+    args = parser.parse_args()
+    if not args.secret:
+        sys.exit("Set GITHUB_WEBHOOK_SECRET or pass --secret")
+
+    with httpx.Client(timeout=30) as client:
+        for path in args.files:
+            with open(path) as f:
+                delivery = json.load(f)
+            body = json.dumps(delivery["payload"]).encode()
+            signature = hmac.new(args.secret.encode(), body, hashlib.sha256).hexdigest()
+            resp = client.post(args.url, content=body, headers={
+                "Content-Type": "application/json",
+                "X-GitHub-Event": delivery["event"],
+                "X-GitHub-Delivery": str(uuid.uuid4()),
+                "X-Hub-Signature-256": f"sha256={signature}",
+            })
+            print(f"{path}: {resp.status_code} {resp.text}")
+
+
+if __name__ == "__main__":
+    main()
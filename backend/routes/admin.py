@@ -0,0 +1,51 @@
+"""Routes for cache administration and profiling endpoints."""
+
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import FileResponse, PlainTextResponse
+import asyncio
+from services import github_service, repo_store, ownership_service
+from agents import planner_agent
+from utils import tracing
+
+router = APIRouter(prefix="/api/ai/admin", tags=["Admin"])
+
+
+@router.delete("/cache/{owner}/{repo}")
+async def invalidate_repo_cache(owner: str, repo: str):
+    """Drop every cached GitHub payload, stored repo data and reusable analysis result
+    for a repository.
+
+    The next analysis for the repo re-fetches from GitHub with a full sync.
+    """
+    removed = await github_service.invalidate_repo(owner, repo)
+    await asyncio.to_thread(repo_store.delete_repo, repo_store.repo_key(owner, repo))
+    ownership_service.forget(owner, repo)
+    planner_agent.forget_results(owner, repo)
+    return {"repo": f"{owner}/{repo}", "invalidated": removed}
+
+
+@router.get("/cache")
+async def cache_stats():
+    """Report GitHub cache counters and tier sizes."""
+    return await github_service.get_cache_stats()
+
+
+@router.get("/profiles")
+async def list_profiles():
+    """List stored profiler captures (requests sent with `X-Profile: 1`), newest first."""
+    return await asyncio.to_thread(tracing.list_profiles)
+
+
+@router.get("/profiles/{profile_id}")
+async def download_profile(profile_id: str, format: str = "pstats"):
+    """Download a capture as a pstats file (for snakeviz, `python -m pstats`), or with
+    `format=text` as a summary sorted by cumulative time."""
+    if format == "text":
+        text = await asyncio.to_thread(tracing.profile_text, profile_id)
+        if text is None:
+            raise HTTPException(status_code=404, detail=f"Profile '{profile_id}' not found")
+        return PlainTextResponse(text)
+    path = tracing.get_profile_path(profile_id)
+    if path is None:
+        raise HTTPException(status_code=404, detail=f"Profile '{profile_id}' not found")
+    return FileResponse(path, media_type="application/octet-stream", filename=f"{profile_id}.prof")
@@ -0,0 +1,52 @@
+"""Routes for multi-repository batch analysis."""
+
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from services import github_service
+from utils.request_utils import cancel_on_disconnect, to_http_exception, open_stream
+from utils.constants import BATCH_MAX_REPOS
+from schemas.request_models import AnalyzeBatchRequest
+from agents import planner_agent
+
+router = APIRouter(prefix="/api/ai", tags=["Batch"])
+
+
+@router.post("/analyze-batch")
+async def analyze_batch(req: AnalyzeBatchRequest, request: Request):
+    """Run analyses across many repositories (`repos`, or every repo of `org`)
+    and stream each result as it finishes, as NDJSON or as Server-Sent Events
+    when the client sends `Accept: text/event-stream`.
+
+    Frames: `start` (repos and analyses), one `result` or `error` per
+    repo/analysis, then `summary`.
+    """
+    if bool(req.repos) == bool(req.org):
+        raise HTTPException(status_code=400, detail="Provide either 'repos' or 'org'.")
+
+    if req.org:
+        try:
+            names = await cancel_on_disconnect(
+                request, github_service.list_org_repos(req.org, req.include_archived),
+            )
+        except Exception as e:
+            error = to_http_exception(e, req.org, "")
+            if error.status_code == 404:
+                error.detail = f"Organization or user '{req.org}' not found on GitHub."
+            raise error
+    else:
+        names = req.repos
+
+    repos = []
+    for name in dict.fromkeys(n.strip().strip("/") for n in names):
+        owner, _, repo = name.partition("/")
+        if not owner or not repo or "/" in repo:
+            raise HTTPException(status_code=400, detail=f"Invalid repository '{name}'; expected 'owner/repo'.")
+        repos.append((owner, repo))
+    if len(repos) > BATCH_MAX_REPOS:
+        raise HTTPException(status_code=400, detail=f"At most {BATCH_MAX_REPOS} repositories per batch.")
+
+    frames, media_type = await open_stream(
+        request, planner_agent.stream_batch(repos, list(dict.fromkeys(req.analyses))),
+        req.org or "", "",
+    )
+    return StreamingResponse(frames, media_type=media_type, headers={"Cache-Control": "no-cache"})
@@ -1,7 +1,8 @@
 """Routes for issue analysis endpoints."""
 
-from fastapi import APIRouter, HTTPException
-import httpx
+from fastapi import APIRouter, Request
+from fastapi.responses import StreamingResponse
+from utils.request_utils import cancel_on_disconnect, to_http_exception, open_stream
 from schemas.request_models import AnalyzeIssuesRequest
 from agents import planner_agent
 
@@ -9,31 +10,27 @@ router = APIRouter(prefix="/api/ai", tags=["Issues"])
 
 
 @router.post("/analyze-issues")
-async def analyze_issues(req: AnalyzeIssuesRequest):
+async def analyze_issues(req: AnalyzeIssuesRequest, request: Request):
     """Analyze open issues for a repository.
 
     Returns classified issues with priority, labels, and assignee recommendations.
     """
     try:
-        result = await planner_agent.analyze_issues(req.owner, req.repo)
+        result = await cancel_on_disconnect(request, planner_agent.analyze_issues(req.owner, req.repo))
         return result
-    except httpx.HTTPStatusError as e:
-        if e.response.status_code == 404:
-            raise HTTPException(
-                status_code=404,
-                detail=f"Repository '{req.owner}/{req.repo}' not found. Please check the repository name and ensure it exists on GitHub."
-            )
-        elif e.response.status_code == 403:
-            raise HTTPException(
-                status_code=403,
-                detail="Access forbidden. The repository may be private or your GitHub token lacks permissions."
-            )
-        elif e.response.status_code == 401:
-            raise HTTPException(
-                status_code=401,
-                detail="GitHub authentication failed. Please check your GitHub token configuration."
-            )
-        else:
-            raise HTTPException(status_code=e.response.status_code, detail=f"GitHub API error: {str(e)}")
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise to_http_exception(e, req.owner, req.repo) from e
+
+
+@router.post("/analyze-issues/stream")
+async def analyze_issues_stream(req: AnalyzeIssuesRequest, request: Request):
+    """Stream issue analysis as NDJSON, or as Server-Sent Events when the client
+    sends `Accept: text/event-stream`.
+
+    Frames: `start` (issue numbers), then `classification` and
+    `assignee_recommendation` as each is ready, then `summary`.
+    """
+    frames, media_type = await open_stream(
+        request, planner_agent.stream_issues(req.owner, req.repo), req.owner, req.repo,
+    )
+    return StreamingResponse(frames, media_type=media_type, headers={"Cache-Control": "no-cache"})
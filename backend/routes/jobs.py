@@ -0,0 +1,72 @@
+"""Routes for background analysis jobs."""
+
+from typing import Literal
+from fastapi import APIRouter, HTTPException
+from services import job_service
+from schemas.request_models import AnalysisJobRequest
+
+router = APIRouter(prefix="/api/ai/jobs", tags=["Jobs"])
+
+
+async def _get_or_404(job_id: str, with_result: bool = False) -> dict:
+    job = await job_service.get_job(job_id, with_result)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job '{job_id}' not found.")
+    return job
+
+
+@router.post("", status_code=202)
+async def submit_job(req: AnalysisJobRequest):
+    """Queue an analysis (`issues`, `prs`, `workload`, `repository`) or a full
+    repo re-sync (`sync`) and return its job id right away.
+
+    Poll `GET /api/ai/jobs/{job_id}` for status and progress, then fetch
+    `GET /api/ai/jobs/{job_id}/result`.
+    """
+    try:
+        return await job_service.submit(req.kind, req.owner, req.repo, req.priority)
+    except job_service.QueueFull:
+        raise HTTPException(
+            status_code=503,
+            detail="Job queue is full. Please retry later.",
+            headers={"Retry-After": "60"},
+        )
+
+
+@router.get("")
+async def list_jobs(
+    status: Literal["queued", "running", "succeeded", "failed", "cancelled"] | None = None,
+    limit: int = 50,
+):
+    """List recent jobs, newest first."""
+    return await job_service.list_jobs(status, max(1, min(limit, 500)))
+
+
+@router.get("/{job_id}")
+async def job_status(job_id: str):
+    """Job status and progress (`done`/`total` items for issue and PR analyses)."""
+    return await _get_or_404(job_id)
+
+
+@router.get("/{job_id}/result")
+async def job_result(job_id: str):
+    """Result of a finished job.
+
+    Failed jobs answer with the status code the synchronous endpoint would
+    have returned; unfinished or cancelled jobs answer 409.
+    """
+    job = await _get_or_404(job_id, with_result=True)
+    if job["status"] == "succeeded":
+        return job["result"]
+    if job["status"] == "failed":
+        raise HTTPException(status_code=job["error"]["status_code"], detail=job["error"]["detail"])
+    raise HTTPException(status_code=409, detail=f"Job '{job_id}' is {job['status']}.")
+
+
+@router.delete("/{job_id}")
+async def cancel_job(job_id: str):
+    """Cancel a queued or running job."""
+    job = await job_service.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job '{job_id}' not found.")
+    return job
@@ -0,0 +1,59 @@
+"""Routes for GitHub webhook ingestion."""
+
+import hmac
+import json
+import hashlib
+import logging
+from fastapi import APIRouter, HTTPException, Request, Header
+from services import sync_service
+from agents import planner_agent
+from utils.constants import GITHUB_WEBHOOK_SECRET
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/api/ai/webhooks", tags=["Webhooks"])
+
+
+def _valid_signature(body: bytes, signature: str) -> bool:
+    expected = "sha256=" + hmac.new(GITHUB_WEBHOOK_SECRET.encode(), body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, signature)
+
+
+@router.post("/github")
+async def github_webhook(
+    request: Request,
+    x_github_event: str = Header(""),
+    x_hub_signature_256: str = Header(""),
+    x_github_delivery: str = Header(""),
+):
+    """Apply an `issues`, `pull_request`, `pull_request_review` or `push` delivery
+    to the local repo store and drop reusable analyses for the repository.
+
+    Deliveries must be signed with GITHUB_WEBHOOK_SECRET.
+    """
+    if not GITHUB_WEBHOOK_SECRET:
+        raise HTTPException(status_code=503, detail="Webhook secret not configured (GITHUB_WEBHOOK_SECRET).")
+
+    body = await request.body()
+    if not x_hub_signature_256 or not _valid_signature(body, x_hub_signature_256):
+        raise HTTPException(status_code=401, detail="Invalid webhook signature.")
+
+    if x_github_event == "ping":
+        return {"event": "ping", "applied": False}
+
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Webhook body is not valid JSON.")
+
+    try:
+        changed = await sync_service.apply_webhook(x_github_event, payload)
+    except Exception as e:
+        logger.error(f"Webhook {x_github_delivery or '?'} ({x_github_event}) failed: {e}")
+        raise HTTPException(status_code=500, detail=f"Webhook processing failed: {str(e)}")
+
+    if changed is None:
+        return {"event": x_github_event, "applied": False}
+    owner, repo = changed
+    planner_agent.forget_results(owner, repo)
+    return {"event": x_github_event, "repo": f"{owner}/{repo}", "applied": True}
@@ -0,0 +1,192 @@
+"""Compact domain models for GitHub data used by the pipelines.
+
+Only the fields the agents read are kept; everything else in the GitHub
+payload (URLs, reactions, nested user objects) is dropped at parse time.
+``from_github`` parses REST / webhook JSON, ``to_dict`` / ``from_dict``
+round-trip the compact form kept in the repo store.
+"""
+
+from array import array
+from dataclasses import dataclass, field
+
+
+def _login(actor: dict | None) -> str:
+    return (actor or {}).get("login", "") or ""
+
+
+def _names(items: list[dict] | None, key: str) -> tuple[str, ...]:
+    return tuple(v for v in ((i or {}).get(key, "") for i in items or []) if v)
+
+
+@dataclass(slots=True)
+class Issue:
+    number: int
+    title: str = ""
+    body: str = ""
+    state: str = "open"
+    updated_at: str = ""
+    author: str = ""
+    labels: tuple[str, ...] = ()
+    assignees: tuple[str, ...] = ()
+
+    @classmethod
+    def from_github(cls, data: dict) -> "Issue":
+        return cls(
+            number=data["number"],
+            title=data.get("title") or "",
+            body=data.get("body") or "",
+            state=data.get("state") or "open",
+            updated_at=data.get("updated_at") or "",
+            author=_login(data.get("user")),
+            labels=_names(data.get("labels"), "name"),
+            assignees=_names(data.get("assignees"), "login"),
+        )
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Issue":
+        return cls(**{**data, "labels": tuple(data.get("labels", ())),
+                      "assignees": tuple(data.get("assignees", ()))})
+
+    def to_dict(self) -> dict:
+        return {
+            "number": self.number, "title": self.title, "body": self.body, "state": self.state,
+            "updated_at": self.updated_at, "author": self.author,
+            "labels": list(self.labels), "assignees": list(self.assignees),
+        }
+
+
+@dataclass(slots=True)
+class PRFile:
+    filename: str
+    additions: int = 0
+    deletions: int = 0
+
+    @classmethod
+    def from_github(cls, data: dict) -> "PRFile":
+        return cls(
+            filename=data.get("filename") or data.get("path") or "",
+            additions=data.get("additions", 0) or 0,
+            deletions=data.get("deletions", 0) or 0,
+        )
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "PRFile":
+        return cls(**data)
+
+    def to_dict(self) -> dict:
+        return {"filename": self.filename, "additions": self.additions, "deletions": self.deletions}
+
+
+@dataclass(slots=True)
+class PullRequest:
+    number: int
+    title: str = ""
+    body: str = ""
+    state: str = "open"
+    updated_at: str = ""
+    merged_at: str | None = None
+    author: str = ""
+    head_sha: str | None = None
+    changed_files: int | None = None
+    labels: tuple[str, ...] = ()
+    requested_reviewers: tuple[str, ...] = ()
+    # Only set when the list came with the PR (GraphQL); otherwise see sync_service.get_pr_file_paths
+    files: list[PRFile] | None = None
+
+    @classmethod
+    def from_github(cls, data: dict) -> "PullRequest":
+        return cls(
+            number=data["number"],
+            title=data.get("title") or "",
+            body=data.get("body") or "",
+            state=data.get("state") or "open",
+            updated_at=data.get("updated_at") or "",
+            merged_at=data.get("merged_at"),
+            author=_login(data.get("user")),
+            head_sha=(data.get("head") or {}).get("sha"),
+            changed_files=data.get("changed_files"),
+            labels=_names(data.get("labels"), "name"),
+            requested_reviewers=_names(data.get("requested_reviewers"), "login"),
+        )
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "PullRequest":
+        return cls(**{**data, "labels": tuple(data.get("labels", ())),
+                      "requested_reviewers": tuple(data.get("requested_reviewers", ())),
+                      "files": None})
+
+    def to_dict(self) -> dict:
+        """Compact form for the store; file lists are stored separately."""
+        return {
+            "number": self.number, "title": self.title, "body": self.body, "state": self.state,
+            "updated_at": self.updated_at, "merged_at": self.merged_at, "author": self.author,
+            "head_sha": self.head_sha, "changed_files": self.changed_files,
+            "labels": list(self.labels), "requested_reviewers": list(self.requested_reviewers),
+        }
+
+
+@dataclass(slots=True)
+class ContributorWeek:
+    week: int  # unix timestamp of the week start
+    additions: int = 0
+    deletions: int = 0
+    commits: int = 0
+
+
+# Fields of one week in Contributor's flat week array
+_WEEK_FIELDS = 4
+
+
+@dataclass(slots=True)
+class Contributor:
+    login: str
+    avatar_url: str = ""
+    total_commits: int = 0
+    # Weekly stats, oldest first, flattened as [week, additions, deletions, commits, ...]
+    week_data: array = field(default_factory=lambda: array("q"))
+
+    @classmethod
+    def from_github(cls, data: dict, max_weeks: int = 4) -> "Contributor":
+        """Parse a ``/stats/contributors`` entry (keeping the last ``max_weeks`` weeks)
+        or a ``/contributors`` entry (no weekly stats)."""
+        if "author" in data:
+            weeks = data.get("weeks", [])[-max_weeks:]
+            return cls(
+                login=_login(data.get("author")) or "unknown",
+                avatar_url=(data.get("author") or {}).get("avatar_url", ""),
+                total_commits=data.get("total", 0),
+                week_data=array("q", [
+                    v for w in weeks
+                    for v in (w.get("w", 0), w.get("a", 0), w.get("d", 0), w.get("c", w.get("commits", 0)))
+                ]),
+            )
+        return cls(
+            login=data.get("login") or "unknown",
+            avatar_url=data.get("avatar_url", ""),
+            total_commits=data.get("contributions", 0),
+        )
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Contributor":
+        return cls(
+            login=data["login"], avatar_url=data.get("avatar_url", ""),
+            total_commits=data.get("total_commits", 0),
+            week_data=array("q", [v for week in data.get("weeks", []) for v in week]),
+        )
+
+    def to_dict(self) -> dict:
+        data = self.week_data
+        return {
+            "login": self.login, "avatar_url": self.avatar_url, "total_commits": self.total_commits,
+            "weeks": [list(data[i:i + _WEEK_FIELDS]) for i in range(0, len(data), _WEEK_FIELDS)],
+        }
+
+    @property
+    def weeks(self) -> list[ContributorWeek]:
+        data = self.week_data
+        return [ContributorWeek(*data[i:i + _WEEK_FIELDS]) for i in range(0, len(data), _WEEK_FIELDS)]
+
+    @property
+    def recent_commits(self) -> int:
+        """Commits in the latest stats week (0 without weekly stats)."""
+        return self.week_data[-1] if self.week_data else 0
@@ -1,5 +1,6 @@
 """Pydantic request models for API endpoints."""
 
+from typing import Literal
 from pydantic import BaseModel
 
 
@@ -22,3 +23,17 @@ class AnalyzeWorkloadRequest(BaseModel):
 class AnalyzeRepositoryRequest(BaseModel):
     owner: str
     repo: str
+
+
+class AnalysisJobRequest(BaseModel):
+    kind: Literal["issues", "prs", "workload", "repository", "sync"]
+    owner: str
+    repo: str
+    priority: int = 0  # higher runs first
+
+
+class AnalyzeBatchRequest(BaseModel):
+    repos: list[str] = []  # "owner/repo"
+    org: str | None = None  # analyze every (non-archived) repo of an org or user instead
+    analyses: list[Literal["issues", "prs", "workload", "repository"]] = ["issues", "prs"]
+    include_archived: bool = False
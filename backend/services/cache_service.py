@@ -0,0 +1,277 @@
+"""Cache service — two-tier (in-process LRU + on-disk SQLite) store for API payloads.
+
+The memory tier is bounded by total payload bytes and is private to a worker.
+The SQLite tier survives restarts and is shared by every uvicorn worker on the
+host (WAL mode), so a fresh worker starts warm instead of re-fetching everything.
+Prefix invalidations are logged in SQLite too, and every worker replays new
+ones against its memory tier before serving from it.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import asyncio
+import logging
+import threading
+from collections import OrderedDict
+from utils.constants import CACHE_INVALIDATION_CHECK_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+
+class MemoryLRU:
+    """Byte-bounded LRU of cache entries."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._data: OrderedDict[str, tuple[dict, int]] = OrderedDict()
+        self._bytes = 0
+
+    def get(self, key: str) -> dict | None:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        self._data.move_to_end(key)
+        return item[0]
+
+    def set(self, key: str, entry: dict, size: int):
+        self.delete(key)
+        if size > self.max_bytes:
+            return
+        self._data[key] = (entry, size)
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            _, (_, old_size) = self._data.popitem(last=False)
+            self._bytes -= old_size
+
+    def delete(self, key: str):
+        item = self._data.pop(key, None)
+        if item is not None:
+            self._bytes -= item[1]
+
+    def delete_matching(self, predicate) -> int:
+        """Delete every entry for which ``predicate(key, entry)`` is true."""
+        keys = [k for k, (entry, _) in self._data.items() if predicate(k, entry)]
+        for k in keys:
+            self.delete(k)
+        return len(keys)
+
+    def stats(self) -> dict:
+        return {"entries": len(self._data), "bytes": self._bytes, "max_bytes": self.max_bytes}
+
+
+class SQLiteStore:
+    """Persistent key → entry store with size-based LRU eviction."""
+
+    # Re-check the total size after this many writes
+    _EVICT_EVERY = 50
+    # Invalidation log rows older than this are dropped; memory tiers are replayed far sooner
+    _INVALIDATION_RETENTION = 24 * 3600
+
+    def __init__(self, path: str, table: str, max_bytes: int):
+        self.path = path
+        self.table = table
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._writes = 0
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            f"""CREATE TABLE IF NOT EXISTS {table} (
+                key TEXT PRIMARY KEY,
+                meta TEXT NOT NULL,
+                content BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                stored_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )"""
+        )
+        self._conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_accessed ON {table}(accessed_at)")
+        self._conn.execute(
+            f"""CREATE TABLE IF NOT EXISTS {table}_invalidations (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                prefix TEXT NOT NULL,
+                invalidated_at REAL NOT NULL
+            )"""
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> dict | None:
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT meta, content, stored_at FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                f"UPDATE {self.table} SET accessed_at = ? WHERE key = ?", (time.time(), key)
+            )
+            self._conn.commit()
+        meta, content, stored_at = row
+        return {**json.loads(meta), "content": content, "stored_at": stored_at}
+
+    def set(self, key: str, entry: dict):
+        meta = json.dumps({k: v for k, v in entry.items() if k not in ("content", "stored_at")})
+        content = entry["content"]
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                f"""INSERT OR REPLACE INTO {self.table}
+                    (key, meta, content, size, stored_at, accessed_at)
+                    VALUES (?, ?, ?, ?, ?, ?)""",
+                (key, meta, content, len(content) + len(meta), entry.get("stored_at", now), now),
+            )
+            self._conn.commit()
+            self._writes += 1
+            if self._writes % self._EVICT_EVERY == 0:
+                self._evict()
+
+    def _evict(self):
+        """Drop least recently accessed rows until the store fits max_bytes."""
+        total = self._conn.execute(f"SELECT COALESCE(SUM(size), 0) FROM {self.table}").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        excess = total - self.max_bytes
+        freed = 0
+        doomed = []
+        for key, size in self._conn.execute(
+            f"SELECT key, size FROM {self.table} ORDER BY accessed_at ASC"
+        ):
+            doomed.append((key,))
+            freed += size
+            if freed >= excess:
+                break
+        self._conn.executemany(f"DELETE FROM {self.table} WHERE key = ?", doomed)
+        self._conn.commit()
+        logger.info(f"Evicted {len(doomed)} entries from {self.table} ({freed} bytes)")
+
+    def delete_prefix(self, prefix: str, invalidated_at: float) -> int:
+        """Delete the key equal to prefix and every key under prefix + '/' or '?',
+        and log the invalidation for the other workers' memory tiers."""
+        escaped = prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        with self._lock:
+            cur = self._conn.execute(
+                f"""DELETE FROM {self.table}
+                    WHERE key = ? OR key LIKE ? ESCAPE '\\' OR key LIKE ? ESCAPE '\\'""",
+                (prefix, f"{escaped}/%", f"{escaped}?%"),
+            )
+            self._conn.execute(
+                f"INSERT INTO {self.table}_invalidations (prefix, invalidated_at) VALUES (?, ?)",
+                (prefix, invalidated_at),
+            )
+            self._conn.execute(
+                f"DELETE FROM {self.table}_invalidations WHERE invalidated_at < ?",
+                (invalidated_at - self._INVALIDATION_RETENTION,),
+            )
+            self._conn.commit()
+            return cur.rowcount
+
+    def last_invalidation(self) -> int:
+        """Sequence number of the newest logged invalidation (0 if none)."""
+        with self._lock:
+            return self._conn.execute(
+                f"SELECT COALESCE(MAX(seq), 0) FROM {self.table}_invalidations"
+            ).fetchone()[0]
+
+    def invalidations_after(self, seq: int) -> list[tuple[int, str, float]]:
+        """Logged invalidations newer than ``seq``, oldest first, as (seq, prefix, time)."""
+        with self._lock:
+            return self._conn.execute(
+                f"""SELECT seq, prefix, invalidated_at FROM {self.table}_invalidations
+                    WHERE seq > ? ORDER BY seq""",
+                (seq,),
+            ).fetchall()
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries, total = self._conn.execute(
+                f"SELECT COUNT(*), COALESCE(SUM(size), 0) FROM {self.table}"
+            ).fetchone()
+        return {"entries": entries, "bytes": total, "max_bytes": self.max_bytes}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def _under_prefix(key: str, prefix: str) -> bool:
+    return key == prefix or key.startswith(prefix + "/") or key.startswith(prefix + "?")
+
+
+class TwoTierCache:
+    """Memory LRU in front of a shared SQLite store.
+
+    Entries are dicts with a bytes ``content`` field, a ``stored_at`` timestamp
+    and any JSON-serializable metadata. Disk I/O runs in a worker thread so the
+    event loop never blocks on SQLite.
+
+    Invalidations made by any worker reach this worker's memory tier within
+    CACHE_INVALIDATION_CHECK_INTERVAL seconds (0 checks on every lookup).
+    """
+
+    def __init__(self, memory_bytes: int, disk_path: str | None, disk_bytes: int, table: str):
+        self.memory = MemoryLRU(memory_bytes)
+        self.disk: SQLiteStore | None = None
+        self._invalidation_seq = 0
+        self._invalidations_checked_at = 0.0
+        if disk_path:
+            try:
+                self.disk = SQLiteStore(disk_path, table, disk_bytes)
+                # The memory tier starts empty, so earlier invalidations are already applied
+                self._invalidation_seq = self.disk.last_invalidation()
+            except sqlite3.Error as e:
+                logger.warning(f"Disk cache unavailable ({e}) — using memory tier only")
+
+    @staticmethod
+    def _size(entry: dict) -> int:
+        return len(entry["content"]) + 512
+
+    async def _apply_invalidations(self):
+        """Drop memory entries invalidated by other workers since the last check."""
+        now = time.monotonic()
+        if self.disk is None or now - self._invalidations_checked_at < CACHE_INVALIDATION_CHECK_INTERVAL:
+            return
+        self._invalidations_checked_at = now
+        rows = await asyncio.to_thread(self.disk.invalidations_after, self._invalidation_seq)
+        for seq, prefix, invalidated_at in rows:
+            # Entries stored after the invalidation are fresh
+            self.memory.delete_matching(
+                lambda k, entry: _under_prefix(k, prefix) and entry["stored_at"] <= invalidated_at
+            )
+            self._invalidation_seq = max(self._invalidation_seq, seq)
+
+    async def get(self, key: str) -> dict | None:
+        await self._apply_invalidations()
+        entry = self.memory.get(key)
+        if entry is not None or self.disk is None:
+            return entry
+        entry = await asyncio.to_thread(self.disk.get, key)
+        if entry is not None:
+            self.memory.set(key, entry, self._size(entry))
+        return entry
+
+    async def set(self, key: str, entry: dict):
+        entry.setdefault("stored_at", time.time())
+        self.memory.set(key, entry, self._size(entry))
+        if self.disk is not None:
+            await asyncio.to_thread(self.disk.set, key, entry)
+
+    async def invalidate_prefix(self, prefix: str) -> int:
+        """Drop every entry for a resource prefix from both tiers."""
+        removed = self.memory.delete_matching(lambda k, entry: _under_prefix(k, prefix))
+        if self.disk is not None:
+            removed = max(removed, await asyncio.to_thread(self.disk.delete_prefix, prefix, time.time()))
+        return removed
+
+    async def stats(self) -> dict:
+        return {
+            "memory": self.memory.stats(),
+            "disk": await asyncio.to_thread(self.disk.stats) if self.disk is not None else None,
+        }
+
+    def close(self):
+        if self.disk is not None:
+            self.disk.close()
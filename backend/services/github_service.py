@@ -1,15 +1,73 @@
 """GitHub API service — async client for fetching repos, issues, PRs, contributors."""
 
 import os
+import json
+import time
+import hashlib
+import asyncio
+import logging
+import importlib.util
+from contextlib import aclosing
+from typing import AsyncIterator
+from urllib.parse import urlparse, parse_qs
 import httpx
-from utils.constants import GITHUB_API_BASE
+from services.cache_service import TwoTierCache
+from services.rate_limiter import GitHubRateLimiter, RateLimitExceeded
+from schemas.github_models import Issue, PullRequest, PRFile, Contributor
+from utils import metrics, tracing
+from utils.constants import (
+    GITHUB_API_BASE, GITHUB_HTTP2, GITHUB_MAX_CONNECTIONS, GITHUB_MAX_KEEPALIVE,
+    GITHUB_KEEPALIVE_EXPIRY, GITHUB_TIMEOUT, GITHUB_CONNECT_TIMEOUT,
+    GITHUB_CACHE_MEMORY_BYTES, GITHUB_CACHE_DISK_BYTES, GITHUB_CACHE_PATH, GITHUB_CACHE_TTLS,
+    GITHUB_MAX_CONCURRENCY, GITHUB_RATE_LIMIT_RESERVE, GITHUB_RATE_LIMIT_PACING,
+    GITHUB_RATE_LIMIT_MAX_WAIT, GITHUB_MAX_RETRIES, GITHUB_PR_FILES_MAX_PAGES,
+)
+
+logger = logging.getLogger(__name__)
 
 _token: str = os.getenv("GITHUB_TOKEN", "").strip().strip('"').strip("'")
 
 
+def _fingerprint(token: str) -> str:
+    """Short non-reversible tag of a token, so cached payloads are never shared across tokens."""
+    return hashlib.sha256(token.encode()).hexdigest()[:16] if token else "anonymous"
+
+
+_token_fingerprint = _fingerprint(_token)
+
+# Shared pooled client — opened/closed by the FastAPI lifespan in main.py
+_client: httpx.AsyncClient | None = None
+
+# Two-tier payload cache (memory LRU + shared SQLite), created on first use
+_cache: TwoTierCache | None = None
+_cache_stats = {"hits": 0, "misses": 0, "not_modified": 0, "stale": 0}
+
+# Central scheduler every GitHub request goes through
+_limiter = GitHubRateLimiter(
+    max_concurrency=GITHUB_MAX_CONCURRENCY,
+    reserve=GITHUB_RATE_LIMIT_RESERVE,
+    pacing_threshold=GITHUB_RATE_LIMIT_PACING,
+    max_wait=GITHUB_RATE_LIMIT_MAX_WAIT,
+)
+
+_requests_total = metrics.counter(
+    "devintel_github_requests_total", "GitHub API calls by endpoint and HTTP status.", ("endpoint", "status"),
+)
+_request_duration = metrics.histogram(
+    "devintel_github_request_duration_seconds", "GitHub API call latency by endpoint.", ("endpoint",),
+)
+_rate_limit_remaining = metrics.gauge(
+    "devintel_github_rate_limit_remaining", "Requests left in the current GitHub rate-limit window.", ("resource",),
+)
+_rate_limit_limit = metrics.gauge(
+    "devintel_github_rate_limit_limit", "Size of the GitHub rate-limit window.", ("resource",),
+)
+
+
 def set_token(token: str):
-    global _token
+    global _token, _token_fingerprint
     _token = token.strip().strip('"').strip("'")
+    _token_fingerprint = _fingerprint(_token)
 
 
 def get_token() -> str:
@@ -24,204 +82,614 @@ def _headers():
     }
 
 
-async def get_issues(owner: str, repo: str, state: str = "open", per_page: int = 20) -> list[dict]:
-    """Fetch issues for a repository."""
-    async with httpx.AsyncClient() as client:
-        resp = await client.get(
-            f"{GITHUB_API_BASE}/repos/{owner}/{repo}/issues",
-            headers=_headers(),
-            params={"state": state, "per_page": per_page, "sort": "updated", "direction": "desc"},
-            timeout=30,
-        )
-        resp.raise_for_status()
-        # Filter out pull requests (GitHub returns PRs in issues endpoint)
-        return [i for i in resp.json() if "pull_request" not in i]
-
-
-async def get_pulls(owner: str, repo: str, state: str = "all", per_page: int = 20) -> list[dict]:
-    """Fetch pull requests for a repository."""
-    async with httpx.AsyncClient() as client:
-        resp = await client.get(
-            f"{GITHUB_API_BASE}/repos/{owner}/{repo}/pulls",
-            headers=_headers(),
-            params={"state": state, "per_page": per_page, "sort": "updated", "direction": "desc"},
-            timeout=30,
-        )
-        resp.raise_for_status()
-        return resp.json()
+def _build_client() -> httpx.AsyncClient:
+    """Create the keep-alive pooled client (HTTP/2 when the h2 package is installed)."""
+    http2 = GITHUB_HTTP2 and importlib.util.find_spec("h2") is not None
+    if GITHUB_HTTP2 and not http2:
+        logger.warning("GITHUB_HTTP2 enabled but 'h2' is not installed — using HTTP/1.1")
+    return httpx.AsyncClient(
+        base_url=GITHUB_API_BASE,
+        http2=http2,
+        limits=httpx.Limits(
+            max_connections=GITHUB_MAX_CONNECTIONS,
+            max_keepalive_connections=GITHUB_MAX_KEEPALIVE,
+            keepalive_expiry=GITHUB_KEEPALIVE_EXPIRY,
+        ),
+        timeout=httpx.Timeout(GITHUB_TIMEOUT, connect=GITHUB_CONNECT_TIMEOUT),
+    )
 
 
-async def get_pr_files(owner: str, repo: str, pr_number: int) -> list[dict]:
-    """Fetch files changed in a specific PR."""
-    async with httpx.AsyncClient() as client:
-        resp = await client.get(
-            f"{GITHUB_API_BASE}/repos/{owner}/{repo}/pulls/{pr_number}/files",
-            headers=_headers(),
-            params={"per_page": 100},
-            timeout=30,
-        )
-        resp.raise_for_status()
-        return resp.json()
+async def start_client():
+    """Open the shared GitHub client. Called once from the app lifespan."""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = _build_client()
+        logger.info("GitHub client started")
 
 
-async def get_contributors(owner: str, repo: str) -> list[dict]:
-    """Fetch contributor stats for a repository."""
-    async with httpx.AsyncClient() as client:
-        resp = await client.get(
-            f"{GITHUB_API_BASE}/repos/{owner}/{repo}/stats/contributors",
-            headers=_headers(),
-            timeout=30,
-        )
-        if resp.status_code == 202:
-            # GitHub is computing stats — wait and retry once
-            import asyncio
-            await asyncio.sleep(2)
-            resp = await client.get(
-                f"{GITHUB_API_BASE}/repos/{owner}/{repo}/stats/contributors",
-                headers=_headers(),
-                timeout=30,
-            )
-        
-        # If still 202 or error, try the simpler contributors endpoint with pagination
-        if resp.status_code != 200:
-            all_contributors = []
-            page = 1
-            
-            # Fetch all pages of contributors (up to 500 to avoid infinite loops)
-            while page <= 5:  # Max 5 pages = 500 contributors
-                resp = await client.get(
-                    f"{GITHUB_API_BASE}/repos/{owner}/{repo}/contributors",
-                    headers=_headers(),
-                    params={"per_page": 100, "page": page},
-                    timeout=30,
-                )
-                resp.raise_for_status()
-                
-                page_data = resp.json()
-                if not page_data or len(page_data) == 0:
-                    break
-                
-                # Add contributors from this page
-                all_contributors.extend([
-                    {
-                        "login": c.get("login", "unknown"),
-                        "avatar_url": c.get("avatar_url", ""),
-                        "total_commits": c.get("contributions", 0),
-                        "weeks": []
-                    }
-                    for c in page_data
-                ])
-                
-                # If we got less than 100, we've reached the end
-                if len(page_data) < 100:
-                    break
-                
-                page += 1
-            
-            return all_contributors
-        
-        resp.raise_for_status()
-        data = resp.json()
-        if not isinstance(data, list):
-            return []
-        return [
-            {
-                "login": c.get("author", {}).get("login", "unknown"),
-                "avatar_url": c.get("author", {}).get("avatar_url", ""),
-                "total_commits": c.get("total", 0),
-                "weeks": c.get("weeks", [])[-4:],  # last 4 weeks
-            }
-            for c in data
-        ]
-
-
-async def get_assignees(owner: str, repo: str) -> list[dict]:
-    """Fetch available assignees for a repository."""
-    async with httpx.AsyncClient() as client:
-        resp = await client.get(
-            f"{GITHUB_API_BASE}/repos/{owner}/{repo}/assignees",
-            headers=_headers(),
-            params={"per_page": 30},
-            timeout=30,
-        )
-        resp.raise_for_status()
-        return resp.json()
+async def close_client():
+    """Close the shared GitHub client and payload cache, releasing pooled connections."""
+    global _client, _cache
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+    if _cache is not None:
+        _cache.close()
+        _cache = None
+
+
+def _get_client() -> httpx.AsyncClient:
+    """Return the shared client, creating it lazily when used outside the app lifespan."""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = _build_client()
+    return _client
+
+
+def _cache_key(path: str, params: dict | None) -> str:
+    """Cache key for a request: path, sorted params, then the token fingerprint.
 
+    The fingerprint goes last so repo prefix invalidation still matches every token's entries.
+    """
+    query = [f"{k}={params[k]}" for k in sorted(params)] if params else []
+    query.append(f"@token={_token_fingerprint}")
+    return path.lower() + "?" + "&".join(query)
 
-async def get_pr_reviews(owner: str, repo: str, pr_number: int) -> list[dict]:
-    """Fetch reviews for a specific PR."""
-    async with httpx.AsyncClient() as client:
-        resp = await client.get(
-            f"{GITHUB_API_BASE}/repos/{owner}/{repo}/pulls/{pr_number}/reviews",
-            headers=_headers(),
-            timeout=30,
+
+def _get_cache() -> TwoTierCache:
+    global _cache
+    if _cache is None:
+        _cache = TwoTierCache(
+            memory_bytes=GITHUB_CACHE_MEMORY_BYTES,
+            disk_path=GITHUB_CACHE_PATH,
+            disk_bytes=GITHUB_CACHE_DISK_BYTES,
+            table="github_responses",
         )
+    return _cache
+
+
+def _cached_response(entry: dict, request: httpx.Request) -> httpx.Response:
+    return httpx.Response(200, headers=entry["headers"], content=entry["content"], request=request)
+
+
+async def _store_response(key: str, resp: httpx.Response):
+    """Store a 200 response body along with its validators for later conditional requests."""
+    if resp.status_code != 200:
+        return
+    await _get_cache().set(key, {
+        "etag": resp.headers.get("ETag"),
+        "last_modified": resp.headers.get("Last-Modified"),
+        "content": resp.content,
+        # Body is stored decoded, so drop the transfer-level headers
+        "headers": {
+            k: v for k, v in resp.headers.items()
+            if k.lower() not in ("content-encoding", "content-length", "transfer-encoding")
+        },
+    })
+
+
+async def get_cache_stats() -> dict:
+    """Return conditional-request cache counters and tier sizes."""
+    return {**_cache_stats, **await _get_cache().stats()}
+
+
+async def invalidate_repo(owner: str, repo: str, resource: str = "") -> int:
+    """Drop every cached payload for a repository, or only those under ``resource``
+    (e.g. "/stats"). Returns the number of entries removed."""
+    return await _get_cache().invalidate_prefix(f"/repos/{owner}/{repo}{resource}".lower())
+
+
+def get_rate_limit_status() -> dict:
+    """Return the scheduler's view of the current GitHub quota."""
+    return _limiter.status()
+
+
+def _endpoint(path: str) -> str:
+    """Path template used as the metrics label: "/repos/{owner}/{repo}/pulls/{n}/files"."""
+    parts = path.strip("/").split("/")
+    if parts[0] == "repos" and len(parts) >= 3:
+        parts[1:3] = ["{owner}", "{repo}"]
+    elif parts[0] in ("orgs", "users") and len(parts) >= 2:
+        parts[1] = "{owner}"
+    return "/" + "/".join("{n}" if p.isdigit() else p for p in parts)
+
+
+async def _timed(endpoint: str, request) -> httpx.Response:
+    """Await one HTTP call, recording its count and latency."""
+    start = time.perf_counter()
+    status = "error"
+    try:
+        resp = await request
+        status = resp.status_code
+        return resp
+    finally:
+        _request_duration.observe(time.perf_counter() - start, endpoint=endpoint)
+        _requests_total.inc(endpoint=endpoint, status=status)
+
+
+def _collect_metrics():
+    for resource, budget in _limiter.status()["resources"].items():
+        if budget["remaining"] is not None:
+            _rate_limit_remaining.set(budget["remaining"], resource=resource)
+        if budget["limit"] is not None:
+            _rate_limit_limit.set(budget["limit"], resource=resource)
+    for result, count in _cache_stats.items():
+        metrics.cache_lookups.set_total(count, cache="github", result=result)
+    served = _cache_stats["hits"] + _cache_stats["not_modified"] + _cache_stats["stale"]
+    metrics.cache_hit_ratio.set(metrics.hit_ratio(served, _cache_stats["misses"]), cache="github")
+
+
+metrics.register_collector(_collect_metrics)
+
+
+async def _send(path: str, params: dict | None, headers: dict) -> httpx.Response:
+    """Send one GET through the rate-limit scheduler, retrying rate-limit rejections."""
+    endpoint = _endpoint(path)
+    with tracing.span("github", endpoint=endpoint) as span:
+        for attempt in range(GITHUB_MAX_RETRIES + 1):
+            async with _limiter.acquire():
+                resp = await _timed(endpoint, _get_client().get(path, headers=headers, params=params))
+            span.set(status=resp.status_code, attempts=attempt + 1)
+            if not _limiter.record(resp) or attempt == GITHUB_MAX_RETRIES:
+                return resp
+            logger.info(f"Rate limited on {path} (HTTP {resp.status_code}) — retrying")
+    return resp
+
+
+async def _get(path: str, params: dict | None = None, cache: str | None = None) -> httpx.Response:
+    """Issue a GET against the GitHub API on the shared client.
+
+    ``cache`` names the endpoint kind in GITHUB_CACHE_TTLS. A stored payload
+    younger than that TTL is returned without touching the network; older ones
+    are revalidated with If-None-Match / If-Modified-Since, and a 304 (which
+    GitHub does not count against the rate limit) is answered from the store.
+    When the rate-limit budget is exhausted, a stale stored copy is served
+    instead of failing.
+    """
+    key = _cache_key(path, params)
+    ttl = GITHUB_CACHE_TTLS.get(cache, 0) if cache else 0
+    headers = _headers()
+    cached = await _get_cache().get(key)
+    if cached:
+        if time.time() - cached["stored_at"] < ttl:
+            _cache_stats["hits"] += 1
+            request = _get_client().build_request("GET", path, params=params)
+            return _cached_response(cached, request)
+        if cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
+
+    try:
+        resp = await _send(path, params, headers)
+    except RateLimitExceeded:
+        if not cached:
+            raise
+        _cache_stats["stale"] += 1
+        return _cached_response(cached, _get_client().build_request("GET", path, params=params))
+
+    if resp.status_code == 304 and cached:
+        _cache_stats["not_modified"] += 1
+        # Restart the TTL window for the revalidated copy
+        cached["stored_at"] = time.time()
+        await _get_cache().set(key, cached)
+        return _cached_response(cached, resp.request)
+
+    _cache_stats["misses"] += 1
+    await _store_response(key, resp)
+    return resp
+
+
+def _next_page(resp: httpx.Response) -> int | None:
+    """Return the page number of the rel="next" Link header, if any."""
+    link = resp.links.get("next")
+    if not link:
+        return None
+    page = parse_qs(urlparse(link.get("url", "")).query).get("page")
+    return int(page[0]) if page else None
+
+
+async def _iter_pages(path: str, params: dict, cache: str | None = None,
+                      max_pages: int | None = None, max_items: int | None = None,
+                      paging: dict | None = None) -> AsyncIterator[dict]:
+    """Yield the items of a list endpoint, following Link headers page by page.
+
+    While fewer than ``max_items`` items have arrived, the next page is
+    requested while the caller works through the current one, so only two
+    pages are ever held. Past that, the next page is only fetched if the
+    caller keeps reading (e.g. because it filtered items out). Stops after
+    ``max_pages`` pages; closing the generator early cancels the prefetch.
+    When the caller read every item but more pages were left, ``paging``
+    (if given) gets ``truncated = True``.
+    """
+    async def fetch(page: int) -> httpx.Response:
+        resp = await _get(path, params={**params, "page": page} if page > 1 else params, cache=cache)
         resp.raise_for_status()
-        return resp.json()
+        return resp
+
+    pending: asyncio.Future | None = asyncio.ensure_future(fetch(1))
+    pages = 0
+    received = 0
+    try:
+        while pending is not None:
+            resp = await pending
+            pending = None
+            pages += 1
+            items = resp.json()
+            received += len(items)
+            next_page = _next_page(resp)
+            capped = next_page is not None and max_pages is not None and pages >= max_pages
+            if capped:
+                next_page = None
+            if next_page is not None and (max_items is None or received < max_items):
+                pending = asyncio.ensure_future(fetch(next_page))
+            for item in items:
+                yield item
+            if capped and paging is not None:
+                paging["truncated"] = True
+            if pending is None and next_page is not None:
+                pending = asyncio.ensure_future(fetch(next_page))
+    finally:
+        if pending is not None:
+            pending.cancel()
+
+
+async def _get_all_pages(path: str, params: dict, cache: str | None, max_pages: int) -> list:
+    """Collect a list endpoint by following Link headers, up to max_pages pages."""
+    async with aclosing(_iter_pages(path, params, cache, max_pages)) as items:
+        return [item async for item in items]
+
+
+async def iter_issues(owner: str, repo: str, state: str = "open", since: str | None = None,
+                      direction: str = "desc", max_items: int | None = None,
+                      max_pages: int | None = None, paging: dict | None = None) -> AsyncIterator[Issue]:
+    """Stream issues (never PRs) sorted by update time.
+
+    ``since`` keeps only issues updated at or after it (filtered by GitHub);
+    ``max_items`` and ``max_pages`` cut paging off early (see ``_iter_pages``
+    for ``paging``).
+    """
+    params = {"state": state, "per_page": min(max_items or 100, 100), "sort": "updated", "direction": direction}
+    if since:
+        params["since"] = since
+    count = 0
+    if max_items is not None and max_items <= 0:
+        return
+    pages = _iter_pages(f"/repos/{owner}/{repo}/issues", params, "issues", max_pages, max_items, paging)
+    async with aclosing(pages) as items:
+        async for issue in items:
+            # GitHub returns PRs in the issues endpoint
+            if "pull_request" in issue:
+                continue
+            yield Issue.from_github(issue)
+            count += 1
+            if count == max_items:
+                return
 
 
-async def get_user_issues(owner: str, repo: str) -> dict[str, int]:
-    """Count open issues assigned to each user."""
-    issues = await get_issues(owner, repo, state="open", per_page=100)
-    counts: dict[str, int] = {}
-    for issue in issues:
-        assignees = issue.get("assignees", [])
-        for a in assignees:
-            login = a.get("login", "")
-            counts[login] = counts.get(login, 0) + 1
-    return counts
+async def iter_pulls(owner: str, repo: str, state: str = "all", since: str | None = None,
+                     max_items: int | None = None, max_pages: int | None = None,
+                     paging: dict | None = None) -> AsyncIterator[PullRequest]:
+    """Stream pull requests, most recently updated first.
 
+    The pulls endpoint has no ``since`` filter, so paging stops at the first
+    PR updated before ``since``; ``max_items`` and ``max_pages`` cut it off too.
+    """
+    params = {"state": state, "per_page": min(max_items or 100, 100), "sort": "updated", "direction": "desc"}
+    count = 0
+    if max_items is not None and max_items <= 0:
+        return
+    pages = _iter_pages(f"/repos/{owner}/{repo}/pulls", params, "pulls", max_pages, max_items, paging)
+    async with aclosing(pages) as items:
+        async for pull in items:
+            if since and pull.get("updated_at", "") < since:
+                return
+            yield PullRequest.from_github(pull)
+            count += 1
+            if count == max_items:
+                return
 
-async def get_pending_reviews(owner: str, repo: str) -> dict[str, int]:
-    """Count pending PR reviews per user (requested reviewers on open PRs)."""
-    prs = await get_pulls(owner, repo, state="open", per_page=50)
-    counts: dict[str, int] = {}
-    for pr in prs:
-        requested = pr.get("requested_reviewers", [])
-        for r in requested:
-            login = r.get("login", "")
-            counts[login] = counts.get(login, 0) + 1
-    return counts
+
+async def get_issues(owner: str, repo: str, state: str = "open", per_page: int = 20) -> list[Issue]:
+    """Fetch the most recently updated issues for a repository."""
+    async with aclosing(iter_issues(owner, repo, state=state, max_items=per_page)) as issues:
+        return [i async for i in issues]
+
+
+async def get_pulls(owner: str, repo: str, state: str = "all", per_page: int = 20) -> list[PullRequest]:
+    """Fetch the most recently updated pull requests for a repository."""
+    async with aclosing(iter_pulls(owner, repo, state=state, max_items=per_page)) as pulls:
+        return [p async for p in pulls]
+
+
+async def get_issues_since(owner: str, repo: str, since: str | None,
+                           max_pages: int) -> tuple[list[Issue], bool]:
+    """Fetch issues (not PRs) updated at or after ``since``, oldest first, and
+    whether paging finished within ``max_pages``.
+
+    Ascending order means a page cap still leaves a valid watermark (the
+    newest issue fetched). Without ``since`` (initial sync) the open issues
+    are fetched newest first, so a cap drops the least recently updated ones.
+    """
+    paging = {"truncated": False}
+    issues = iter_issues(owner, repo, state="all" if since else "open", since=since,
+                         direction="asc" if since else "desc", max_pages=max_pages, paging=paging)
+    async with aclosing(issues):
+        items = [i async for i in issues]
+    return items, not paging["truncated"]
+
+
+async def get_pulls_updated_since(owner: str, repo: str, since: str | None, state: str = "all",
+                                  max_pages: int = 1) -> tuple[list[PullRequest], bool]:
+    """Fetch PRs newest-updated first, stopping once paging reaches back past ``since``.
+
+    Also returns whether paging got there (or to the last page) within ``max_pages``.
+    """
+    paging = {"truncated": False}
+    pulls = iter_pulls(owner, repo, state=state, since=since, max_pages=max_pages, paging=paging)
+    async with aclosing(pulls):
+        items = [p async for p in pulls]
+    return items, not paging["truncated"]
+
+
+async def get_pr_files(owner: str, repo: str, pr_number: int) -> list[PRFile]:
+    """Fetch all files changed in a specific PR, following pagination."""
+    files = await _get_all_pages(
+        f"/repos/{owner}/{repo}/pulls/{pr_number}/files",
+        params={"per_page": 100},
+        cache="pr_files",
+        max_pages=GITHUB_PR_FILES_MAX_PAGES,
+    )
+    return [PRFile.from_github(f) for f in files]
+
+
+async def get_contributor_stats(owner: str, repo: str) -> list[Contributor] | None:
+    """Fetch contributor commit stats, or None while GitHub is still computing them (HTTP 202)."""
+    resp = await _get(f"/repos/{owner}/{repo}/stats/contributors", cache="contributors")
+    if resp.status_code == 202:
+        return None
+    if resp.status_code == 204:
+        # Empty repository
+        return []
+    resp.raise_for_status()
+    data = resp.json()
+    if not isinstance(data, list):
+        return []
+    return [Contributor.from_github(c, max_weeks=4) for c in data]
+
+
+async def iter_commits(owner: str, repo: str, since: str | None = None,
+                       max_items: int | None = None) -> AsyncIterator[dict]:
+    """Stream default-branch commits, newest first (list items carry no file lists).
+
+    ``since`` keeps only commits made at or after it (filtered by GitHub).
+    """
+    params = {"per_page": min(max_items or 100, 100)}
+    if since:
+        params["since"] = since
+    count = 0
+    if max_items is not None and max_items <= 0:
+        return
+    async with aclosing(_iter_pages(f"/repos/{owner}/{repo}/commits", params, max_items=max_items)) as items:
+        async for commit in items:
+            yield commit
+            count += 1
+            if count == max_items:
+                return
+
+
+async def get_commit(owner: str, repo: str, sha: str) -> dict:
+    """Fetch one commit with its changed files (the first 300)."""
+    resp = await _get(f"/repos/{owner}/{repo}/commits/{sha}")
+    resp.raise_for_status()
+    return resp.json()
+
+
+async def get_contributor_list(owner: str, repo: str, max_pages: int = 5) -> list[Contributor]:
+    """Fetch contributors with commit totals only (no weekly stats); never waits on stats.
+
+    Pages through ``/contributors`` up to ``max_pages`` × 100 contributors.
+    """
+    contributors = _iter_pages(f"/repos/{owner}/{repo}/contributors", {"per_page": 100},
+                               "contributors", max_pages)
+    async with aclosing(contributors):
+        return [Contributor.from_github(c) async for c in contributors]
 
 
 async def get_repository(owner: str, repo: str) -> dict:
     """Fetch detailed repository information."""
-    async with httpx.AsyncClient() as client:
-        resp = await client.get(
-            f"{GITHUB_API_BASE}/repos/{owner}/{repo}",
-            headers=_headers(),
-            timeout=30,
-        )
-        resp.raise_for_status()
-        return resp.json()
+    resp = await _get(f"/repos/{owner}/{repo}", cache="repository")
+    resp.raise_for_status()
+    return resp.json()
+
+
+async def list_org_repos(org: str, include_archived: bool = False, max_pages: int = 10) -> list[str]:
+    """Full names ("org/repo") of an organization's repositories, most recently pushed first.
+
+    Falls back to the user repos endpoint when ``org`` is a user account.
+    """
+    params = {"per_page": 100, "sort": "pushed", "direction": "desc"}
+    try:
+        repos = await _get_all_pages(f"/orgs/{org}/repos", {**params, "type": "all"}, "repository", max_pages)
+    except httpx.HTTPStatusError as e:
+        if e.response.status_code != 404:
+            raise
+        repos = await _get_all_pages(f"/users/{org}/repos", {**params, "type": "owner"}, "repository", max_pages)
+    return [r["full_name"] for r in repos if include_archived or not r.get("archived")]
 
 
 async def get_languages(owner: str, repo: str) -> dict:
     """Fetch programming languages used in the repository."""
-    async with httpx.AsyncClient() as client:
-        resp = await client.get(
-            f"{GITHUB_API_BASE}/repos/{owner}/{repo}/languages",
-            headers=_headers(),
-            timeout=30,
-        )
-        resp.raise_for_status()
-        return resp.json()
+    resp = await _get(f"/repos/{owner}/{repo}/languages", cache="languages")
+    resp.raise_for_status()
+    return resp.json()
 
 
 async def get_readme(owner: str, repo: str) -> str:
     """Fetch repository README content."""
-    async with httpx.AsyncClient() as client:
-        try:
-            resp = await client.get(
-                f"{GITHUB_API_BASE}/repos/{owner}/{repo}/readme",
-                headers=_headers(),
-                timeout=30,
-            )
-            resp.raise_for_status()
-            data = resp.json()
-            # Decode base64 content
-            import base64
-            content = base64.b64decode(data.get("content", "")).decode("utf-8")
-            return content
-        except Exception:
-            return ""
+    try:
+        resp = await _get(f"/repos/{owner}/{repo}/readme", cache="readme")
+        resp.raise_for_status()
+        data = resp.json()
+        # Decode base64 content
+        import base64
+        content = base64.b64decode(data.get("content", "")).decode("utf-8")
+        return content
+    except Exception:
+        return ""
+
+
+# ---- GraphQL bulk fetch ----
+# One query returns what REST needs 1 + N (or 1 + 2N) calls for. Every GraphQL
+# helper raises on failure so callers can fall back to the REST functions above.
+
+class GraphQLError(Exception):
+    """GraphQL request returned errors or no data."""
+
+
+_graphql_stats = {"queries": 0, "cost": 0, "last_cost": 0}
+
+_RATE_LIMIT_FIELDS = "rateLimit { limit cost remaining resetAt }"
+
+_PULLS_QUERY = """
+query($owner: String!, $repo: String!, $first: Int!, $after: String, $states: [PullRequestState!],
+      $withFiles: Boolean!) {
+  repository(owner: $owner, name: $repo) {
+    pullRequests(first: $first, after: $after, states: $states,
+                 orderBy: {field: UPDATED_AT, direction: DESC}) {
+      pageInfo { hasNextPage endCursor }
+      nodes {
+        number title body state updatedAt mergedAt changedFiles headRefOid
+        author { login }
+        labels(first: 20) { nodes { name } }
+        files(first: 100) @include(if: $withFiles) {
+          pageInfo { hasNextPage }
+          nodes { path additions deletions }
+        }
+        reviewRequests(first: 20) { nodes { requestedReviewer { ... on User { login } } } }
+      }
+    }
+  }
+  %s
+}
+""" % _RATE_LIMIT_FIELDS
+
+def get_graphql_stats() -> dict:
+    """Return GraphQL query count and point cost spent against the GraphQL rate limit."""
+    return dict(_graphql_stats)
+
+
+async def _graphql(query: str, variables: dict, cache_path: str, cache: str) -> dict:
+    """Run one GraphQL query through the scheduler, caching the result under cache_path.
+
+    cache_path sits under /repos/{owner}/{repo} so repo invalidation also drops it.
+    """
+    if not _token:
+        raise GraphQLError("GraphQL API requires a GitHub token")
+
+    key = _cache_key(cache_path, {k: v for k, v in variables.items() if v is not None})
+    cached = await _get_cache().get(key)
+    if cached and time.time() - cached["stored_at"] < GITHUB_CACHE_TTLS.get(cache, 0):
+        _cache_stats["hits"] += 1
+        return json.loads(cached["content"])
+
+    body = {"query": query, "variables": variables}
+    with tracing.span("github", endpoint="/graphql") as span:
+        for attempt in range(GITHUB_MAX_RETRIES + 1):
+            async with _limiter.acquire("graphql"):
+                resp = await _timed("/graphql", _get_client().post("/graphql", headers=_headers(), json=body))
+            span.set(status=resp.status_code, attempts=attempt + 1)
+            if not _limiter.record(resp, resource="graphql") or attempt == GITHUB_MAX_RETRIES:
+                break
+    resp.raise_for_status()
+
+    payload = resp.json()
+    if payload.get("errors") or not payload.get("data"):
+        raise GraphQLError(str(payload.get("errors") or "empty response"))
+    data = payload["data"]
+
+    cost = (data.get("rateLimit") or {}).get("cost", 0)
+    _graphql_stats["queries"] += 1
+    _graphql_stats["cost"] += cost
+    _graphql_stats["last_cost"] = cost
+
+    _cache_stats["misses"] += 1
+    await _get_cache().set(key, {"content": json.dumps(data).encode(), "headers": {}})
+    return data
+
+
+async def _graphql_nodes(query: str, owner: str, repo: str, connection: str, states: list[str],
+                         limit: int, cache: str, **extra) -> list[dict]:
+    """Page through a repository connection (e.g. pullRequests) up to limit nodes."""
+    nodes: list[dict] = []
+    after = None
+    while len(nodes) < limit:
+        variables = {
+            "owner": owner, "repo": repo, "first": min(100, limit - len(nodes)),
+            "after": after, "states": states, **extra,
+        }
+        data = await _graphql(query, variables, f"/repos/{owner}/{repo}/graphql/{connection}", cache)
+        repository = data.get("repository")
+        if repository is None:
+            raise GraphQLError(f"Repository {owner}/{repo} not found")
+        conn = repository[connection]
+        nodes.extend(conn["nodes"])
+        if not conn["pageInfo"]["hasNextPage"]:
+            break
+        after = conn["pageInfo"]["endCursor"]
+    return nodes
+
+
+def _login(actor: dict | None) -> str:
+    return (actor or {}).get("login", "") or ""
+
+
+def _pull_from_graphql(node: dict) -> tuple[PullRequest, bool]:
+    """Map a GraphQL pull request node onto a PullRequest.
+
+    Also returns whether its file list was truncated at 100 files.
+    """
+    pull = PullRequest(
+        number=node["number"],
+        title=node.get("title") or "",
+        body=node.get("body") or "",
+        state="open" if node.get("state") == "OPEN" else "closed",
+        updated_at=node.get("updatedAt") or "",
+        merged_at=node.get("mergedAt"),
+        author=_login(node.get("author")),
+        head_sha=node.get("headRefOid"),
+        changed_files=node.get("changedFiles", 0),
+        labels=tuple(l["name"] for l in node["labels"]["nodes"]),
+        requested_reviewers=tuple(
+            _login(r.get("requestedReviewer"))
+            for r in node["reviewRequests"]["nodes"]
+            if _login(r.get("requestedReviewer"))
+        ),
+    )
+    truncated = False
+    if node.get("files") is not None:
+        pull.files = [PRFile.from_github(f) for f in node["files"]["nodes"]]
+        truncated = node["files"]["pageInfo"]["hasNextPage"]
+    return pull, truncated
+
+
+_PR_STATES = {"open": ["OPEN"], "closed": ["CLOSED", "MERGED"], "all": ["OPEN", "CLOSED", "MERGED"]}
+
+
+async def get_pulls_graphql(owner: str, repo: str, state: str = "all", per_page: int = 20,
+                            with_files: bool = True) -> list[PullRequest]:
+    """Fetch PRs with review requests and (optionally) changed files via GraphQL.
+
+    PRs touching more than 100 files get their full file list from REST.
+    """
+    nodes = await _graphql_nodes(
+        _PULLS_QUERY, owner, repo, "pullRequests", _PR_STATES[state], per_page, cache="pulls",
+        withFiles=with_files,
+    )
+    parsed = [_pull_from_graphql(n) for n in nodes]
+
+    async def complete_files(pr: PullRequest):
+        pr.files = await get_pr_files(owner, repo, pr.number)
+
+    await asyncio.gather(*(complete_files(pr) for pr, truncated in parsed if truncated))
+    return [pr for pr, _ in parsed]
@@ -0,0 +1,542 @@
+"""Job service — background analysis jobs for repos too big for a request timeout.
+
+A submitted job gets an id and waits in a priority queue (higher priority
+first, then oldest first). A fixed pool of JOB_WORKERS workers runs the jobs
+through the same planner entry points as the synchronous routes, so
+concurrent identical analyses are still coalesced. Job state, progress and
+results are kept in a SQLite file: finished results survive restarts, and
+jobs that were queued or running when the process stopped are queued again
+on startup.
+
+Several worker processes can share the store. A worker claims a queued job
+with a conditional update, so only one process runs it, and holds a lease
+of JOB_LEASE_SECONDS that it renews while the job runs. Every process polls
+the store for jobs queued elsewhere, for cancel requests on the jobs it
+runs, and for running jobs whose lease has lapsed, which go back to the
+queue.
+"""
+
+import os
+import json
+import time
+import uuid
+import sqlite3
+import asyncio
+import logging
+import threading
+from agents import planner_agent
+from services import sync_service
+from utils.request_utils import to_http_exception
+from utils.constants import (
+    JOB_STORE_PATH, JOB_WORKERS, JOB_MAX_QUEUED, JOB_RETENTION_DAYS, JOB_LEASE_SECONDS,
+)
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    owner TEXT NOT NULL,
+    repo TEXT NOT NULL,
+    priority INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    progress TEXT,
+    result TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    worker TEXT,
+    lease_until REAL,
+    cancel_requested INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs(status, created_at);
+"""
+
+# Columns added after the first release, for stores created before them
+_ADDED_COLUMNS = {
+    "worker": "TEXT",
+    "lease_until": "REAL",
+    "cancel_requested": "INTEGER NOT NULL DEFAULT 0",
+}
+
+FINISHED = ("succeeded", "failed", "cancelled")
+
+# Seconds between progress writes to the store (status reads use the live copy)
+_PROGRESS_WRITE_INTERVAL = 2.0
+# Seconds between store polls: lease renewal, jobs queued by other processes, cancel requests
+_POLL_INTERVAL = min(5.0, JOB_LEASE_SECONDS / 3)
+
+# Written into the rows this process claims
+_WORKER_ID = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+
+async def _sync(owner: str, repo: str) -> dict:
+    """Backfill job: full re-sync of the repo store and contributor snapshot."""
+    state = await sync_service.sync_repo(owner, repo, force=True)
+    contributors = await sync_service.get_contributors(owner, repo)
+    return {"repo": f"{owner}/{repo}", "sync_state": state, "contributors": len(contributors)}
+
+
+JOB_KINDS = {**planner_agent.ANALYSES, "sync": _sync}
+
+_conn: sqlite3.Connection | None = None
+_lock = threading.Lock()
+
+_queue: asyncio.PriorityQueue | None = None
+_workers: list[asyncio.Task] = []
+_poller: asyncio.Task | None = None
+_seq = 0
+# Queued and running jobs: id -> live record (status, progress, running task)
+_active: dict[str, dict] = {}
+_stats = {"submitted": 0, "succeeded": 0, "failed": 0, "cancelled": 0, "resumed": 0,
+          "claimed_elsewhere": 0, "leases_expired": 0}
+
+
+class QueueFull(Exception):
+    """Raised when JOB_MAX_QUEUED jobs are already waiting."""
+
+
+def _db() -> sqlite3.Connection:
+    global _conn
+    if _conn is None:
+        os.makedirs(os.path.dirname(os.path.abspath(JOB_STORE_PATH)), exist_ok=True)
+        _conn = sqlite3.connect(JOB_STORE_PATH, check_same_thread=False, timeout=10)
+        _conn.execute("PRAGMA journal_mode=WAL")
+        _conn.execute("PRAGMA synchronous=NORMAL")
+        _conn.executescript(_SCHEMA)
+        existing = {row[1] for row in _conn.execute("PRAGMA table_info(jobs)")}
+        for name, definition in _ADDED_COLUMNS.items():
+            if name not in existing:
+                _conn.execute(f"ALTER TABLE jobs ADD COLUMN {name} {definition}")
+        _conn.commit()
+    return _conn
+
+
+def _update(job_id: str, **fields):
+    """Write fields of a job this process holds; a no-op (logged) once its claim is lost."""
+    for name in ("progress", "result", "error"):
+        if name in fields and fields[name] is not None:
+            fields[name] = json.dumps(fields[name])
+    columns = ", ".join(f"{name} = ?" for name in fields)
+    with _lock:
+        updated = _db().execute(
+            f"UPDATE jobs SET {columns} WHERE id = ? AND worker = ?", (*fields.values(), job_id, _WORKER_ID),
+        ).rowcount
+        _db().commit()
+    if not updated:
+        logger.warning(f"Job {job_id} is no longer held by this worker; update dropped")
+
+
+def _claim(job_id: str) -> bool:
+    """Atomically move a queued job to running under this process's lease."""
+    now = time.time()
+    with _lock:
+        claimed = _db().execute(
+            """UPDATE jobs SET status = 'running', worker = ?, lease_until = ?, started_at = ?
+               WHERE id = ? AND status = 'queued'""",
+            (_WORKER_ID, now + JOB_LEASE_SECONDS, now, job_id),
+        ).rowcount
+        _db().commit()
+    return bool(claimed)
+
+
+def _cancel_stored(job_id: str) -> bool:
+    """Cancel a job that is still queued; otherwise ask the process running it to stop.
+
+    Returns True when the job was cancelled here.
+    """
+    with _lock:
+        db = _db()
+        cancelled = db.execute(
+            "UPDATE jobs SET status = 'cancelled', finished_at = ? WHERE id = ? AND status = 'queued'",
+            (time.time(), job_id),
+        ).rowcount
+        if not cancelled:
+            db.execute("UPDATE jobs SET cancel_requested = 1 WHERE id = ? AND status = 'running'", (job_id,))
+        db.commit()
+    return bool(cancelled)
+
+
+def _row_to_job(row, with_result: bool = False) -> dict:
+    job = {
+        "job_id": row["id"],
+        "kind": row["kind"],
+        "repo": f"{row['owner']}/{row['repo']}",
+        "priority": row["priority"],
+        "status": row["status"],
+        "progress": json.loads(row["progress"]) if row["progress"] else None,
+        "error": json.loads(row["error"]) if row["error"] else None,
+        "created_at": row["created_at"],
+        "started_at": row["started_at"],
+        "finished_at": row["finished_at"],
+    }
+    if with_result:
+        job["result"] = json.loads(row["result"]) if row["result"] else None
+    return job
+
+
+def _load(job_id: str, with_result: bool = False) -> dict | None:
+    with _lock:
+        db = _db()
+        db.row_factory = sqlite3.Row
+        row = db.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        db.row_factory = None
+    return _row_to_job(row, with_result) if row else None
+
+
+def _new_live() -> dict:
+    # "lock" orders every store write for the job, so a late write never overtakes a newer one
+    return {"status": "queued", "progress": None, "task": None, "cancel": False,
+            "finished": asyncio.Event(), "lock": asyncio.Lock(), "progress_write": None}
+
+
+def _enqueue(job_id: str, priority: int):
+    global _seq
+    _seq += 1
+    _queue.put_nowait((-priority, _seq, job_id))
+
+
+# ---- Public API ----
+
+def get_stats() -> dict:
+    """Return job counters and the current queue depth."""
+    running = sum(1 for job in _active.values() if job["status"] == "running")
+    return {**_stats, "queued": len(_active) - running, "running": running, "workers": len(_workers)}
+
+
+async def submit(kind: str, owner: str, repo: str, priority: int = 0) -> dict:
+    """Queue a job and return its status record. Raises QueueFull when the queue is at capacity."""
+    if kind not in JOB_KINDS:
+        raise ValueError(f"Unknown job kind '{kind}'")
+    if _queue is None:
+        raise RuntimeError("Job workers are not running")
+    if sum(1 for job in _active.values() if job["status"] == "queued") >= JOB_MAX_QUEUED:
+        raise QueueFull()
+
+    job_id = uuid.uuid4().hex
+    now = time.time()
+
+    def insert():
+        with _lock:
+            _db().execute(
+                """INSERT INTO jobs (id, kind, owner, repo, priority, status, created_at)
+                   VALUES (?, ?, ?, ?, ?, 'queued', ?)""",
+                (job_id, kind, owner, repo, priority, now),
+            )
+            _db().commit()
+
+    await asyncio.to_thread(insert)
+    _active[job_id] = _new_live()
+    _enqueue(job_id, priority)
+    _stats["submitted"] += 1
+    return await get_job(job_id)
+
+
+def _overlay_live(job: dict):
+    # Only jobs running here have fresher state than the store; queued ones may be claimed elsewhere
+    live = _active.get(job["job_id"])
+    if live is not None and live["status"] == "running":
+        job["progress"] = live["progress"] or job["progress"]
+
+
+async def get_job(job_id: str, with_result: bool = False) -> dict | None:
+    """Job status (and live progress); the result is included only when asked for."""
+    job = await asyncio.to_thread(_load, job_id, with_result)
+    if job is not None:
+        _overlay_live(job)
+    return job
+
+
+async def list_jobs(status: str | None = None, limit: int = 50) -> list[dict]:
+    """Most recent jobs first, optionally filtered by status."""
+    def query():
+        sql, params = "SELECT * FROM jobs", []
+        if status:
+            sql += " WHERE status = ?"
+            params.append(status)
+        sql += " ORDER BY created_at DESC LIMIT ?"
+        params.append(limit)
+        with _lock:
+            db = _db()
+            db.row_factory = sqlite3.Row
+            rows = db.execute(sql, params).fetchall()
+            db.row_factory = None
+        return [_row_to_job(row) for row in rows]
+
+    jobs = await asyncio.to_thread(query)
+    for job in jobs:
+        _overlay_live(job)
+    return jobs
+
+
+async def cancel(job_id: str) -> dict | None:
+    """Cancel a queued or running job. Finished jobs are returned unchanged.
+
+    A job running in another worker process stops at that process's next store poll.
+    """
+    live = _active.get(job_id)
+    if live is not None:
+        live["cancel"] = True
+        task = live["task"]
+        if task is not None:
+            task.cancel()
+            await live["finished"].wait()
+            return await get_job(job_id)
+    # Queued (here or elsewhere), or just claimed by a worker: the store decides which
+    if await asyncio.to_thread(_cancel_stored, job_id):
+        _stats["cancelled"] += 1
+        if live is not None and _active.get(job_id) is live:
+            live["status"] = "cancelled"
+            del _active[job_id]
+            live["finished"].set()
+    return await get_job(job_id)
+
+
+# ---- Workers ----
+
+async def _finish(job_id: str, status: str, result: dict | None = None, error: dict | None = None):
+    """Record the final status once. A result that cannot be stored marks the job failed."""
+    live = _active.get(job_id)
+    if live is None:
+        return
+    try:
+        async with live["lock"]:
+            if live["status"] in FINISHED:
+                return
+            live["status"] = status
+            try:
+                await asyncio.to_thread(
+                    _update, job_id, status=status, progress=live["progress"], result=result,
+                    error=error, finished_at=time.time(),
+                )
+            except Exception as e:
+                logger.error(f"Could not record job {job_id} as {status}: {e}")
+                status = live["status"] = "failed"
+                try:
+                    await asyncio.to_thread(
+                        _update, job_id, status=status,
+                        error={"status_code": 500, "detail": f"Could not store the job outcome: {e}"},
+                        finished_at=time.time(),
+                    )
+                except Exception as e:
+                    # Left running in the store; its lease lapses and another worker retries it
+                    logger.error(f"Could not record job {job_id} as failed: {e}")
+            _stats[status] += 1
+    finally:
+        if _active.get(job_id) is live:
+            del _active[job_id]
+        live["finished"].set()
+
+
+async def _write_progress(job_id: str, live: dict):
+    async with live["lock"]:
+        if live["status"] != "running":
+            return
+        try:
+            await asyncio.to_thread(_update, job_id, progress=live["progress"])
+        except Exception as e:
+            logger.warning(f"Could not store progress of job {job_id}: {e}")
+
+
+async def _run(job_id: str, live: dict):
+    job = await asyncio.to_thread(_load, job_id)
+    if job is None:
+        _active.pop(job_id, None)
+        return
+    owner, repo = job["repo"].split("/", 1)
+    async with live["lock"]:
+        if live["cancel"] or not await asyncio.to_thread(_claim, job_id):
+            # Cancelled, or claimed by another worker process first
+            if not live["cancel"]:
+                _stats["claimed_elsewhere"] += 1
+            if _active.get(job_id) is live:
+                del _active[job_id]
+            live["finished"].set()
+            return
+        live["status"] = "running"
+    if live["cancel"]:
+        # cancel() came in during the claim and found the job no longer queued
+        await _finish(job_id, "cancelled")
+        return
+
+    last_write = 0.0
+
+    def report(done: int, total: int):
+        nonlocal last_write
+        live["progress"] = {"done": done, "total": total}
+        now = time.monotonic()
+        pending = live["progress_write"]
+        if now - last_write >= _PROGRESS_WRITE_INTERVAL and (pending is None or pending.done()):
+            last_write = now
+            # Writes the latest progress when it gets the job's lock; status reads use the live copy
+            live["progress_write"] = asyncio.create_task(_write_progress(job_id, live))
+
+    async def execute():
+        planner_agent.progress_hook.set(report)
+        return await JOB_KINDS[job["kind"]](owner, repo)
+
+    task = live["task"] = asyncio.create_task(execute())
+    try:
+        result = await task
+    except asyncio.CancelledError:
+        if live["cancel"]:
+            await _finish(job_id, "cancelled")
+            return
+        raise  # shutting down: the job stays "running" and is resumed on restart
+    except Exception as e:
+        logger.error(f"Job {job_id} ({job['kind']} {job['repo']}) failed: {e}")
+        error = to_http_exception(e, owner, repo)
+        await _finish(job_id, "failed", error={"status_code": error.status_code, "detail": error.detail})
+        return
+    await _finish(job_id, "succeeded", result=result)
+
+
+async def _worker():
+    while True:
+        _, _, job_id = await _queue.get()
+        live = _active.get(job_id)
+        if live is None or live["cancel"]:
+            continue
+        try:
+            await _run(job_id, live)
+        except asyncio.CancelledError:
+            if live["task"] is not None:
+                live["task"].cancel()
+            raise
+        except Exception as e:
+            logger.error(f"Job worker error on {job_id}: {e}")
+
+
+def _poll_store(running: list[str]) -> tuple[list[tuple[str, int]], list[str], int]:
+    """Renew the leases of the jobs running here and requeue lapsed ones.
+
+    Returns the queued jobs, the jobs running here that were asked to stop,
+    and how many lapsed jobs were requeued.
+    """
+    now = time.time()
+    with _lock:
+        db = _db()
+        db.executemany(
+            "UPDATE jobs SET lease_until = ? WHERE id = ? AND worker = ? AND status = 'running'",
+            [(now + JOB_LEASE_SECONDS, job_id, _WORKER_ID) for job_id in running],
+        )
+        # A lapsed job that was asked to stop is not worth running again
+        db.execute(
+            """UPDATE jobs SET status = 'cancelled', finished_at = ?
+               WHERE status = 'running' AND cancel_requested = 1 AND (lease_until IS NULL OR lease_until < ?)""",
+            (now, now),
+        )
+        requeued = db.execute(
+            """UPDATE jobs SET status = 'queued', worker = NULL, lease_until = NULL, started_at = NULL
+               WHERE status = 'running' AND (lease_until IS NULL OR lease_until < ?)""",
+            (now,),
+        ).rowcount
+        queued = db.execute(
+            "SELECT id, priority FROM jobs WHERE status = 'queued' ORDER BY created_at"
+        ).fetchall()
+        stop = [row[0] for row in db.execute(
+            "SELECT id FROM jobs WHERE worker = ? AND status = 'running' AND cancel_requested = 1", (_WORKER_ID,),
+        )]
+        db.commit()
+    return queued, stop, requeued
+
+
+def _recover() -> tuple[list[tuple[str, int]], list[str], int]:
+    """Drop expired finished jobs, then poll the store as usual (nothing runs here yet)."""
+    cutoff = time.time() - JOB_RETENTION_DAYS * 86400
+    with _lock:
+        _db().execute(
+            f"DELETE FROM jobs WHERE status IN ({', '.join('?' * len(FINISHED))}) AND finished_at < ?",
+            (*FINISHED, cutoff),
+        )
+        _db().commit()
+    return _poll_store([])
+
+
+def _apply_poll(queued: list[tuple[str, int]], stop: list[str], requeued: int) -> int:
+    """Bring the local queue in line with the store; returns how many jobs were added."""
+    if requeued:
+        _stats["leases_expired"] += requeued
+        logger.warning(f"Requeued {requeued} job(s) whose worker lease lapsed")
+    queued_ids = set()
+    added = 0
+    for job_id, priority in queued:
+        queued_ids.add(job_id)
+        if job_id not in _active:
+            _active[job_id] = _new_live()
+            _enqueue(job_id, priority)
+            added += 1
+    for job_id, live in list(_active.items()):
+        # Claimed or cancelled elsewhere; a job being claimed here holds its lock
+        if live["status"] == "queued" and job_id not in queued_ids and not live["lock"].locked():
+            del _active[job_id]
+            live["finished"].set()
+    for job_id in stop:
+        live = _active.get(job_id)
+        if live is not None and live["task"] is not None and not live["cancel"]:
+            live["cancel"] = True
+            live["task"].cancel()
+    return added
+
+
+async def _poll():
+    while True:
+        await asyncio.sleep(_POLL_INTERVAL)
+        try:
+            running = [job_id for job_id, live in _active.items() if live["status"] == "running"]
+            _apply_poll(*await asyncio.to_thread(_poll_store, running))
+        except Exception as e:
+            logger.warning(f"Job store poll failed: {e}")
+
+
+def _release() -> int:
+    """Hand the jobs running here back to the queue, for a clean shutdown."""
+    with _lock:
+        released = _db().execute(
+            """UPDATE jobs SET status = 'queued', worker = NULL, lease_until = NULL, started_at = NULL
+               WHERE worker = ? AND status = 'running' AND cancel_requested = 0""",
+            (_WORKER_ID,),
+        ).rowcount
+        _db().commit()
+    return released
+
+
+async def start_workers():
+    """Start the worker pool and resume jobs left over from the last run."""
+    global _queue, _poller
+    if _workers:
+        return
+    _queue = asyncio.PriorityQueue()
+    resumed = _apply_poll(*await asyncio.to_thread(_recover))
+    _stats["resumed"] += resumed
+    if resumed:
+        logger.info(f"Resumed {resumed} queued analysis job(s)")
+    _workers.extend(asyncio.create_task(_worker()) for _ in range(max(1, JOB_WORKERS)))
+    _poller = asyncio.create_task(_poll())
+
+
+async def stop_workers():
+    """Stop the workers; unfinished jobs go back to the queue for the next start or another worker."""
+    global _queue, _poller
+    tasks = [*_workers, *([_poller] if _poller is not None else [])]
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    _workers.clear()
+    _poller = None
+    _active.clear()
+    _queue = None
+    try:
+        await asyncio.to_thread(_release)
+    except Exception as e:
+        logger.warning(f"Could not release running jobs: {e}")
+
+
+def close():
+    global _conn
+    with _lock:
+        if _conn is not None:
+            _conn.close()
+            _conn = None
@@ -2,12 +2,54 @@
 
 import os
 import json
+import time
+import asyncio
+import hashlib
 import logging
+import contextvars
+from typing import Callable
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from services.cache_service import TwoTierCache
+from utils import metrics, tracing
+from utils.constants import (
+    LLM_MODEL_NAME, LLM_MAX_CONCURRENCY, LLM_TIMEOUT,
+    LLM_CACHE_ENABLED, LLM_CACHE_PATH, LLM_CACHE_MAX_BYTES, LLM_CACHE_MEMORY_BYTES, LLM_CACHE_TTL,
+)
 
 logger = logging.getLogger(__name__)
 
 _model = None
 
+# Bounds concurrent model calls; waiters beyond the bound are the queue
+_semaphore = asyncio.Semaphore(LLM_MAX_CONCURRENCY)
+# Used only when the SDK has no async API — never runs on the event loop
+_executor = ThreadPoolExecutor(max_workers=LLM_MAX_CONCURRENCY, thread_name_prefix="llm")
+_stats = {
+    "queued": 0, "in_flight": 0, "completed": 0, "timeouts": 0, "failures": 0,
+    "cache_hits": 0, "cache_misses": 0, "invalid_json": 0, "rejected": 0,
+}
+
+_call_duration = metrics.histogram(
+    "devintel_llm_request_duration_seconds", "Model call latency by prompt template.", ("template",),
+)
+_calls_total = metrics.counter(
+    "devintel_llm_requests_total",
+    "Model calls by prompt template and outcome (ok, timeout, error, invalid_json).",
+    ("template", "outcome"),
+)
+_fallbacks = metrics.counter(
+    "devintel_agent_fallbacks_total",
+    "Agent answers produced by the rule-based path instead of the model, by agent and reason.",
+    ("agent", "reason"),
+)
+
+# Content-addressed response cache, created on first use
+_cache: TwoTierCache | None = None
+
+# Per-request usage counters, reported in the analysis response metadata
+_usage: contextvars.ContextVar[dict | None] = contextvars.ContextVar("llm_usage", default=None)
+
 
 def init_llm():
     """Initialize the Gemini model if API key is available."""
@@ -20,7 +62,7 @@ def init_llm():
     try:
         import google.generativeai as genai
         genai.configure(api_key=api_key)
-        _model = genai.GenerativeModel("gemini-1.5-flash")
+        _model = genai.GenerativeModel(LLM_MODEL_NAME)
         logger.info("Gemini LLM initialized successfully")
     except Exception as e:
         logger.error(f"Failed to initialize Gemini: {e}")
@@ -32,39 +74,176 @@ def is_available() -> bool:
     return _model is not None
 
 
-async def generate(prompt: str, expect_json: bool = True) -> str | dict | None:
+async def get_stats() -> dict:
+    """Return queue depth, in-flight count, call outcome and cache counters."""
+    return {
+        **_stats,
+        "max_concurrency": LLM_MAX_CONCURRENCY,
+        "timeout_seconds": LLM_TIMEOUT,
+        "cache": await _get_cache().stats() if LLM_CACHE_ENABLED else None,
+    }
+
+
+def close():
+    """Close the response cache. Called from the app lifespan on shutdown."""
+    global _cache
+    if _cache is not None:
+        _cache.close()
+        _cache = None
+
+
+def record_fallback(agent: str, count: int = 1, reason: str | None = None):
+    """Count answers an agent produced with its rule-based fallback."""
+    _fallbacks.inc(count, agent=agent, reason=reason or ("llm_failed" if _model else "llm_unavailable"))
+
+
+def _collect_metrics():
+    for result in ("cache_hits", "cache_misses"):
+        metrics.cache_lookups.set_total(_stats[result], cache="llm", result=result.removeprefix("cache_"))
+    metrics.cache_hit_ratio.set(metrics.hit_ratio(_stats["cache_hits"], _stats["cache_misses"]), cache="llm")
+
+
+metrics.register_collector(_collect_metrics)
+
+
+@contextmanager
+def track_usage():
+    """Count LLM calls and cache hits made inside this context (and its tasks)."""
+    usage = {"llm_calls": 0, "cache_hits": 0}
+    token = _usage.set(usage)
+    try:
+        yield usage
+    finally:
+        _usage.reset(token)
+
+
+def _count(key: str):
+    usage = _usage.get()
+    if usage is not None:
+        usage[key] += 1
+
+
+def _get_cache() -> TwoTierCache:
+    global _cache
+    if _cache is None:
+        _cache = TwoTierCache(
+            memory_bytes=LLM_CACHE_MEMORY_BYTES,
+            disk_path=LLM_CACHE_PATH,
+            disk_bytes=LLM_CACHE_MAX_BYTES,
+            table="llm_responses",
+        )
+    return _cache
+
+
+def _cache_key(prompt: str, template: str) -> str:
+    """Hash of model, prompt template version and whitespace-normalized prompt."""
+    normalized = " ".join(prompt.split())
+    return hashlib.sha256(f"{LLM_MODEL_NAME}\0{template}\0{normalized}".encode()).hexdigest()
+
+
+def _parse(text: str, expect_json: bool):
+    if not expect_json:
+        return text
+    # Clean markdown code fences if present
+    if text.startswith("```"):
+        lines = text.split("\n")
+        text = "\n".join(lines[1:-1]) if len(lines) > 2 else text
+    text = text.strip().strip("`").strip()
+    if text.startswith("json"):
+        text = text[4:].strip()
+    return json.loads(text)
+
+
+async def _call_model(prompt: str):
+    """Run one model call off the event loop."""
+    if hasattr(_model, "generate_content_async"):
+        return await _model.generate_content_async(prompt)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, _model.generate_content, prompt)
+
+
+async def generate(prompt: str, expect_json: bool = True, timeout: float | None = None,
+                   template: str = "default", use_cache: bool = True,
+                   validate: Callable[[object], bool] | None = None) -> str | dict | list | None:
     """Generate a response from the LLM.
 
+    The call never blocks the event loop. At most LLM_MAX_CONCURRENCY calls run
+    at once; cancelling the awaiting task (e.g. on client disconnect) cancels
+    the call. Successful responses that pass ``validate`` are cached by
+    (model, template, prompt), so an identical prompt is answered from the cache.
+
     Args:
         prompt: The prompt to send to the LLM.
         expect_json: If True, attempt to parse the response as JSON.
+        timeout: Per-call timeout in seconds (defaults to LLM_TIMEOUT).
+        template: Prompt template name and version, e.g. "issue_classification.v1".
+            Bump the version when the template changes to invalidate old answers.
+        use_cache: Set False to always call the model.
+        validate: Caller's check of the parsed answer. Answers failing it are
+            still returned but never cached, and cached answers failing it are
+            ignored.
 
     Returns:
-        Parsed JSON dict if expect_json, raw string otherwise, or None on failure.
+        Parsed JSON (dict, or list for batch prompts) if expect_json, raw string
+        otherwise, or None on failure.
     """
     if not _model:
         return None
 
+    cache_key = None
+    if LLM_CACHE_ENABLED and use_cache:
+        cache_key = _cache_key(prompt, template)
+        entry = await _get_cache().get(cache_key)
+        if entry is not None and (not LLM_CACHE_TTL or time.time() - entry["stored_at"] < LLM_CACHE_TTL):
+            try:
+                result = _parse(entry["content"].decode("utf-8"), expect_json)
+                if validate is None or validate(result):
+                    _stats["cache_hits"] += 1
+                    _count("cache_hits")
+                    return result
+            except json.JSONDecodeError:
+                pass
+        _stats["cache_misses"] += 1
+
     try:
-        response = _model.generate_content(prompt)
+        with tracing.span("llm", template=template, prompt_chars=len(prompt)):
+            _stats["queued"] += 1
+            try:
+                await _semaphore.acquire()
+            finally:
+                _stats["queued"] -= 1
+            _stats["in_flight"] += 1
+            _count("llm_calls")
+            start = time.perf_counter()
+            try:
+                response = await asyncio.wait_for(_call_model(prompt), timeout or LLM_TIMEOUT)
+            finally:
+                _call_duration.observe(time.perf_counter() - start, template=template)
+                _stats["in_flight"] -= 1
+                _semaphore.release()
+        _stats["completed"] += 1
         text = response.text.strip()
 
-        if expect_json:
-            # Clean markdown code fences if present
-            if text.startswith("```"):
-                lines = text.split("\n")
-                text = "\n".join(lines[1:-1]) if len(lines) > 2 else text
-            text = text.strip().strip("`").strip()
-            if text.startswith("json"):
-                text = text[4:].strip()
-
-            return json.loads(text)
-
-        return text
-
+        result = _parse(text, expect_json)
+        _calls_total.inc(template=template, outcome="ok")
+        if validate is not None and not validate(result):
+            _stats["rejected"] += 1
+        elif cache_key is not None:
+            await _get_cache().set(cache_key, {"content": text.encode("utf-8")})
+        return result
+
+    except asyncio.TimeoutError:
+        _stats["timeouts"] += 1
+        _calls_total.inc(template=template, outcome="timeout")
+        logger.warning(f"LLM call timed out after {timeout or LLM_TIMEOUT}s")
+        return None
     except json.JSONDecodeError as e:
+        _stats["invalid_json"] += 1
+        _calls_total.inc(template=template, outcome="invalid_json")
         logger.warning(f"LLM returned non-JSON response: {e}")
         return None
     except Exception as e:
+        _stats["failures"] += 1
+        _calls_total.inc(template=template, outcome="error")
         logger.error(f"LLM generation failed: {e}")
         return None
@@ -0,0 +1,192 @@
+"""Ownership service — who has recently changed which parts of a repository.
+
+Merged PRs and pushed commits are folded into a per-repo directory trie. Each
+node holds per-author weights for everything under that path prefix. Every
+change spreads a total weight of 1 across its files, so a thousand-file
+refactor does not outweigh a year of focused work. Weights decay with a
+half-life of OWNERSHIP_HALF_LIFE_DAYS. They are stored pre-scaled by
+2^((time - epoch) / half-life), so old entries never need rewriting, and
+because shares are ratios the common scale cancels out.
+
+The index is persisted in the repo store and updated incrementally: new
+merged PRs after each sync (see sync_service), pushed commits from webhooks,
+and a one-off backfill of recent default-branch commits. Each worker keeps
+the trie in memory together with the store's ownership mark at load time;
+when another worker has written since, the trie is reloaded.
+"""
+
+import re
+import time
+import asyncio
+from datetime import datetime
+from services import repo_store
+from utils.constants import OWNERSHIP_HALF_LIFE_DAYS, OWNERSHIP_RELOAD_CHECK_INTERVAL
+
+_EPOCH = datetime(2020, 1, 1).timestamp()
+_HALF_LIFE = OWNERSHIP_HALF_LIFE_DAYS * 86400
+
+# Paths mentioned in issue text: "src/api/users.py", "lib/db/"
+_PATH_IN_TEXT = re.compile(r"(?<![\w/.:-])(?:[\w.-]+/)+[\w.-]*")
+
+
+class _Node:
+    __slots__ = ("children", "weights", "total")
+
+    def __init__(self):
+        self.children: dict[str, "_Node"] = {}
+        self.weights: dict[str, float] = {}
+        self.total = 0.0
+
+
+_tries: dict[str, _Node] = {}
+# Store mark each trie is up to date with, and when the store was last checked against it
+_marks: dict[str, tuple[int, int]] = {}
+_checked_at: dict[str, float] = {}
+_load_locks: dict[str, asyncio.Lock] = {}
+_stats = {"sources_indexed": 0, "lookups": 0, "reloads": 0}
+
+
+def get_stats() -> dict:
+    """Return ownership index counters."""
+    return {**_stats, "repos_loaded": len(_tries)}
+
+
+def _scale(when: str | None) -> float:
+    try:
+        ts = datetime.fromisoformat(when.replace("Z", "+00:00")).timestamp() if when else None
+    except ValueError:
+        ts = None
+    if ts is None:
+        return 1.0
+    return 2 ** ((ts - _EPOCH) / _HALF_LIFE)
+
+
+def _prefixes(path: str) -> list[str]:
+    """Every prefix of a path, from the repo root ("") down to the path itself."""
+    segments = [s for s in path.strip("/").split("/") if s]
+    return [""] + ["/".join(segments[:i]) for i in range(1, len(segments) + 1)]
+
+
+def _rows(author: str, paths: list[str], when: str | None) -> list[tuple[str, str, float]]:
+    """Weighted (prefix, author, weight) rows for one change."""
+    paths = [p for p in dict.fromkeys(paths) if p]
+    if not author or not paths:
+        return []
+    per_file = _scale(when) / len(paths)
+    weights: dict[str, float] = {}
+    for path in paths:
+        for prefix in _prefixes(path):
+            weights[prefix] = weights.get(prefix, 0.0) + per_file
+    return [(prefix, author, w) for prefix, w in weights.items()]
+
+
+def _apply(root: _Node, rows: list[tuple[str, str, float]]):
+    for prefix, author, weight in rows:
+        node = root
+        if prefix:
+            for segment in prefix.split("/"):
+                node = node.children.setdefault(segment, _Node())
+        node.weights[author] = node.weights.get(author, 0.0) + weight
+        node.total += weight
+
+
+def _check_due(key: str) -> bool:
+    return time.monotonic() - _checked_at.get(key, 0.0) >= OWNERSHIP_RELOAD_CHECK_INTERVAL
+
+
+async def _get_trie(key: str) -> _Node:
+    root = _tries.get(key)
+    if root is not None and not _check_due(key):
+        return root
+    lock = _load_locks.setdefault(key, asyncio.Lock())
+    async with lock:
+        if key in _tries and _check_due(key):
+            _checked_at[key] = time.monotonic()
+            if await asyncio.to_thread(repo_store.ownership_mark, key) != _marks.get(key):
+                # Another worker added (or deleted) sources since this trie was built
+                _drop(key)
+                _stats["reloads"] += 1
+        if key not in _tries:
+            mark, rows = await asyncio.to_thread(repo_store.load_ownership, key)
+            root = _Node()
+            _apply(root, rows)
+            _tries[key], _marks[key], _checked_at[key] = root, mark, time.monotonic()
+    return _tries[key]
+
+
+def _drop(key: str):
+    _tries.pop(key, None)
+    _marks.pop(key, None)
+    _checked_at.pop(key, None)
+
+
+def forget(owner: str, repo: str):
+    """Drop the in-memory index for a repo (it reloads from the store on next use)."""
+    _drop(repo_store.repo_key(owner, repo))
+
+
+async def record_change(owner: str, repo: str, source: str, author: str,
+                        paths: list[str], when: str | None) -> bool:
+    """Add one merged PR or commit to the index; a source is only counted once."""
+    key = repo_store.repo_key(owner, repo)
+    rows = _rows(author, paths, when)
+    if not rows:
+        return False
+    marks = await asyncio.to_thread(repo_store.add_ownership, key, source, rows)
+    if marks is None:
+        return False
+    _stats["sources_indexed"] += 1
+    before, after = marks
+    if key in _tries:
+        if _marks.get(key) == before:
+            _apply(_tries[key], rows)
+            _marks[key] = after
+        else:
+            _drop(key)  # missed another worker's write; rebuild with it on next use
+    return True
+
+
+async def record_push(owner: str, repo: str, payload: dict):
+    """Add the commits of a push webhook delivery."""
+    for commit in payload.get("commits", []):
+        author = (commit.get("author") or {}).get("username")
+        paths = commit.get("added", []) + commit.get("modified", []) + commit.get("removed", [])
+        await record_change(owner, repo, f"commit:{commit.get('id', '')}", author, paths,
+                            commit.get("timestamp"))
+
+
+def paths_in_text(text: str) -> list[str]:
+    """Repository paths mentioned in free text (issue titles and bodies)."""
+    return [m.rstrip(".") for m in _PATH_IN_TEXT.findall(text or "") if "://" not in m]
+
+
+async def shares(owner: str, repo: str, paths: list[str]) -> dict[str, float]:
+    """Each author's ownership of the given paths, between 0 and 1.
+
+    A path is scored at its deepest indexed prefix (a new file in a known
+    directory uses the directory); the result is averaged over paths. With
+    no paths, or none that are indexed, the repo-wide share is returned.
+    """
+    root = await _get_trie(repo_store.repo_key(owner, repo))
+    _stats["lookups"] += 1
+    result: dict[str, float] = {}
+    scored = 0
+    for path in paths:
+        node, deepest = root, None
+        for segment in path.strip("/").split("/"):
+            node = node.children.get(segment)
+            if node is None:
+                break
+            if node.total > 0:
+                deepest = node
+        if deepest is None:
+            continue
+        scored += 1
+        for author, weight in deepest.weights.items():
+            result[author] = result.get(author, 0.0) + weight / deepest.total
+
+    if not scored:
+        if root.total <= 0:
+            return {}
+        return {author: weight / root.total for author, weight in root.weights.items()}
+    return {author: share / scored for author, share in result.items()}
@@ -0,0 +1,181 @@
+"""Rate-limit scheduler — every GitHub call goes through one token bucket per resource.
+
+The bucket is refilled from the live ``X-RateLimit-*`` headers and drained
+locally as requests are sent, so concurrent callers see the current quota.
+Below a pacing threshold the remaining requests are spread evenly over the
+time left until reset instead of bursting into the wall; secondary limits
+(``Retry-After`` / "secondary rate limit" 403s) pause all traffic.
+"""
+
+import time
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+import httpx
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimitExceeded(Exception):
+    """Raised when a request would have to wait longer than the configured maximum."""
+
+    def __init__(self, resource: str, retry_after: float):
+        self.resource = resource
+        self.retry_after = retry_after
+        super().__init__(
+            f"GitHub {resource} rate limit exhausted — retry in {int(retry_after)}s"
+        )
+
+
+class _Bucket:
+    __slots__ = ("limit", "remaining", "reset_at", "last_sent")
+
+    def __init__(self):
+        self.limit: int | None = None
+        self.remaining: int | None = None
+        self.reset_at: float | None = None
+        self.last_sent = 0.0
+
+
+class GitHubRateLimiter:
+    """Token-bucket scheduler for GitHub's primary and secondary rate limits."""
+
+    def __init__(self, max_concurrency: int, reserve: int, pacing_threshold: float,
+                 max_wait: float):
+        self.reserve = reserve
+        self.pacing_threshold = pacing_threshold
+        self.max_wait = max_wait
+        self._sem = asyncio.Semaphore(max_concurrency)
+        self._max_concurrency = max_concurrency
+        self._buckets: dict[str, _Bucket] = {}
+        self._blocked_until = 0.0
+        self._secondary_hits = 0
+        self._waits = 0
+
+    def _bucket(self, resource: str) -> _Bucket:
+        bucket = self._buckets.get(resource)
+        if bucket is None:
+            bucket = self._buckets[resource] = _Bucket()
+        return bucket
+
+    def _delay(self, bucket: _Bucket, now: float) -> float:
+        """Seconds to wait before the next request on this bucket may be sent."""
+        delay = max(0.0, self._blocked_until - now)
+        if bucket.remaining is None or bucket.reset_at is None or now >= bucket.reset_at:
+            return delay
+
+        window = bucket.reset_at - now
+        if bucket.remaining <= self.reserve:
+            return max(delay, window)
+
+        if bucket.limit and bucket.remaining < bucket.limit * self.pacing_threshold:
+            # Spread what is left over the rest of the window
+            interval = window / (bucket.remaining - self.reserve)
+            delay = max(delay, bucket.last_sent + interval - now)
+        return delay
+
+    async def _wait_for_quota(self, bucket: _Bucket, resource: str):
+        while True:
+            delay = self._delay(bucket, time.time())
+            if delay <= 0:
+                return
+            if delay > self.max_wait:
+                raise RateLimitExceeded(resource, delay)
+            self._waits += 1
+            await asyncio.sleep(delay)
+
+    @asynccontextmanager
+    async def acquire(self, resource: str = "core"):
+        """Wait for quota, then hold a concurrency slot for one request.
+
+        Waiting happens without a slot, so a paused or paced resource never
+        holds up requests that could be sent now.
+        """
+        bucket = self._bucket(resource)
+        while True:
+            await self._wait_for_quota(bucket, resource)
+            await self._sem.acquire()
+            # A pause or a paced send may have started while waiting for the slot
+            if self._delay(bucket, time.time()) <= 0:
+                break
+            self._sem.release()
+        try:
+            bucket.last_sent = time.time()
+            if bucket.remaining is not None:
+                bucket.remaining -= 1
+            yield
+        finally:
+            self._sem.release()
+
+    def record(self, resp: httpx.Response, resource: str = "core") -> bool:
+        """Update the bucket from response headers.
+
+        Returns True when the response was a rate-limit rejection that is worth
+        retrying once the scheduler's delay has passed.
+        """
+        headers = resp.headers
+        resource = headers.get("X-RateLimit-Resource", resource)
+        bucket = self._bucket(resource)
+        try:
+            if "X-RateLimit-Limit" in headers:
+                bucket.limit = int(headers["X-RateLimit-Limit"])
+            if "X-RateLimit-Remaining" in headers:
+                bucket.remaining = int(headers["X-RateLimit-Remaining"])
+            if "X-RateLimit-Reset" in headers:
+                bucket.reset_at = float(headers["X-RateLimit-Reset"])
+        except ValueError:
+            pass
+
+        if resp.status_code not in (403, 429):
+            self._secondary_hits = 0
+            return False
+
+        secondary = b"secondary rate limit" in resp.content.lower()
+        retry_after = headers.get("Retry-After")
+        if retry_after is not None:
+            try:
+                wait = float(retry_after)
+            except ValueError:
+                wait = 60.0
+            if secondary:
+                kind = "secondary rate limit"
+            elif bucket.remaining == 0:
+                kind = "primary rate limit"
+            else:
+                kind = f"{resp.status_code} with Retry-After"
+            self._block(wait, kind)
+            return True
+
+        if bucket.remaining == 0:
+            # Primary limit — the bucket delay already runs until reset
+            return True
+
+        if secondary:
+            # No Retry-After: wait at least a minute, doubling on repeats
+            self._block(min(60.0 * 2 ** self._secondary_hits, 900.0), "secondary rate limit")
+            self._secondary_hits += 1
+            return True
+
+        return False
+
+    def _block(self, seconds: float, kind: str):
+        """Pause all traffic; ``kind`` names the limit that was hit, for the log."""
+        self._blocked_until = max(self._blocked_until, time.time() + seconds)
+        logger.warning(f"GitHub {kind} — pausing requests for {seconds:.0f}s")
+
+    def status(self) -> dict:
+        """Report the current budget for every resource seen so far."""
+        now = time.time()
+        return {
+            "resources": {
+                name: {
+                    "limit": b.limit,
+                    "remaining": b.remaining,
+                    "resets_in": max(0, int(b.reset_at - now)) if b.reset_at else None,
+                }
+                for name, b in self._buckets.items()
+            },
+            "paused_for": max(0, int(self._blocked_until - now)),
+            "max_concurrency": self._max_concurrency,
+            "throttled_requests": self._waits,
+        }
@@ -0,0 +1,384 @@
+"""Repository store — local SQLite copy of each repo's issues, PRs, PR files and contributors.
+
+Kept current by sync_service (delta pulls) and by webhooks; the planner reads
+analyses' inputs from here instead of re-downloading them on every request.
+Issues, PRs and contributors are stored in the compact form of the
+schemas.github_models models, not as full GitHub JSON.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import threading
+from utils.constants import REPO_STORE_PATH
+from schemas.github_models import Issue, PullRequest, PRFile, Contributor
+
+# Bumped when the stored payload format changes; older stores are cleared and resynced
+_FORMAT_VERSION = 2
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS repos (
+    repo TEXT PRIMARY KEY,
+    issues_watermark TEXT,
+    pulls_watermark TEXT,
+    synced_at REAL
+);
+CREATE TABLE IF NOT EXISTS issues (
+    repo TEXT NOT NULL,
+    number INTEGER NOT NULL,
+    state TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (repo, number)
+);
+CREATE INDEX IF NOT EXISTS issues_recent ON issues(repo, state, updated_at);
+CREATE TABLE IF NOT EXISTS pulls (
+    repo TEXT NOT NULL,
+    number INTEGER NOT NULL,
+    state TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    head_sha TEXT,
+    data TEXT NOT NULL,
+    PRIMARY KEY (repo, number)
+);
+CREATE INDEX IF NOT EXISTS pulls_recent ON pulls(repo, state, updated_at);
+CREATE TABLE IF NOT EXISTS pr_files (
+    repo TEXT NOT NULL,
+    number INTEGER NOT NULL,
+    head_sha TEXT,
+    files TEXT NOT NULL,
+    PRIMARY KEY (repo, number)
+);
+CREATE TABLE IF NOT EXISTS contributors (
+    repo TEXT PRIMARY KEY,
+    data TEXT NOT NULL,
+    synced_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS webhooks (
+    repo TEXT PRIMARY KEY,
+    received_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS ownership (
+    repo TEXT NOT NULL,
+    prefix TEXT NOT NULL,
+    author TEXT NOT NULL,
+    weight REAL NOT NULL,
+    PRIMARY KEY (repo, prefix, author)
+);
+CREATE TABLE IF NOT EXISTS ownership_sources (
+    repo TEXT NOT NULL,
+    source TEXT NOT NULL,
+    PRIMARY KEY (repo, source)
+);
+"""
+
+_conn: sqlite3.Connection | None = None
+_lock = threading.Lock()
+
+
+def repo_key(owner: str, repo: str) -> str:
+    return f"{owner}/{repo}".lower()
+
+
+def _db() -> sqlite3.Connection:
+    global _conn
+    if _conn is None:
+        os.makedirs(os.path.dirname(os.path.abspath(REPO_STORE_PATH)), exist_ok=True)
+        _conn = sqlite3.connect(REPO_STORE_PATH, check_same_thread=False, timeout=10)
+        _conn.execute("PRAGMA journal_mode=WAL")
+        _conn.execute("PRAGMA synchronous=NORMAL")
+        _conn.executescript(_SCHEMA)
+        if _conn.execute("PRAGMA user_version").fetchone()[0] < _FORMAT_VERSION:
+            for table in ("repos", "issues", "pulls", "pr_files", "contributors"):
+                _conn.execute(f"DELETE FROM {table}")
+            _conn.execute(f"PRAGMA user_version = {_FORMAT_VERSION}")
+        _conn.commit()
+    return _conn
+
+
+def close():
+    global _conn
+    with _lock:
+        if _conn is not None:
+            _conn.close()
+            _conn = None
+
+
+# ---- Sync state ----
+
+def get_sync_state(key: str) -> dict:
+    """Return the repo's watermarks and last sync time (all None before the first sync)."""
+    with _lock:
+        row = _db().execute(
+            "SELECT issues_watermark, pulls_watermark, synced_at FROM repos WHERE repo = ?", (key,)
+        ).fetchone()
+    if row is None:
+        return {"issues_watermark": None, "pulls_watermark": None, "synced_at": None}
+    return {"issues_watermark": row[0], "pulls_watermark": row[1], "synced_at": row[2]}
+
+
+def set_sync_state(key: str, issues_watermark: str | None, pulls_watermark: str | None):
+    with _lock:
+        _db().execute(
+            """INSERT INTO repos (repo, issues_watermark, pulls_watermark, synced_at)
+               VALUES (?, ?, ?, ?)
+               ON CONFLICT(repo) DO UPDATE SET
+                   issues_watermark = excluded.issues_watermark,
+                   pulls_watermark = excluded.pulls_watermark,
+                   synced_at = excluded.synced_at""",
+            (key, issues_watermark, pulls_watermark, time.time()),
+        )
+        _db().commit()
+
+
+def record_webhook(key: str):
+    """Note that a webhook delivery for the repo was just applied."""
+    with _lock:
+        _db().execute(
+            "INSERT OR REPLACE INTO webhooks (repo, received_at) VALUES (?, ?)", (key, time.time())
+        )
+        _db().commit()
+
+
+def last_webhook_at(key: str) -> float | None:
+    with _lock:
+        row = _db().execute("SELECT received_at FROM webhooks WHERE repo = ?", (key,)).fetchone()
+    return row[0] if row else None
+
+
+def delete_repo(key: str):
+    """Forget everything stored for a repo; the next sync starts from scratch."""
+    with _lock:
+        db = _db()
+        for table in ("repos", "issues", "pulls", "pr_files", "contributors", "webhooks",
+                      "ownership", "ownership_sources"):
+            db.execute(f"DELETE FROM {table} WHERE repo = ?", (key,))
+        db.commit()
+
+
+# ---- Issues & pulls ----
+
+def upsert_issues(key: str, issues: list[Issue]):
+    rows = [(key, i.number, i.state, i.updated_at, json.dumps(i.to_dict())) for i in issues]
+    with _lock:
+        _db().executemany(
+            "INSERT OR REPLACE INTO issues (repo, number, state, updated_at, data) VALUES (?, ?, ?, ?, ?)",
+            rows,
+        )
+        _db().commit()
+
+
+def upsert_pulls(key: str, pulls: list[PullRequest]):
+    rows = [(key, p.number, p.state, p.updated_at, p.head_sha, json.dumps(p.to_dict())) for p in pulls]
+    with _lock:
+        _db().executemany(
+            """INSERT OR REPLACE INTO pulls (repo, number, state, updated_at, head_sha, data)
+               VALUES (?, ?, ?, ?, ?, ?)""",
+            rows,
+        )
+        _db().commit()
+
+
+def close_missing_pulls(key: str, open_numbers: set[int]) -> int:
+    """Mark stored open PRs that are not in ``open_numbers`` (a complete open list) as closed."""
+    with _lock:
+        db = _db()
+        stale = [
+            (number, data) for number, data in db.execute(
+                "SELECT number, data FROM pulls WHERE repo = ? AND state = 'open'", (key,)
+            ) if number not in open_numbers
+        ]
+        rows = []
+        for number, data in stale:
+            pull = json.loads(data)
+            pull["state"] = "closed"
+            rows.append((json.dumps(pull), key, number))
+        db.executemany("UPDATE pulls SET state = 'closed', data = ? WHERE repo = ? AND number = ?", rows)
+        db.commit()
+    return len(rows)
+
+
+def get_pull(key: str, number: int) -> PullRequest | None:
+    with _lock:
+        row = _db().execute(
+            "SELECT data FROM pulls WHERE repo = ? AND number = ?", (key, number)
+        ).fetchone()
+    return PullRequest.from_dict(json.loads(row[0])) if row else None
+
+
+def _list(table: str, key: str, state: str, limit: int | None) -> list[dict]:
+    sql = f"SELECT data FROM {table} WHERE repo = ?"
+    params: list = [key]
+    if state != "all":
+        sql += " AND state = ?"
+        params.append(state)
+    sql += " ORDER BY updated_at DESC"
+    if limit:
+        sql += " LIMIT ?"
+        params.append(limit)
+    with _lock:
+        rows = _db().execute(sql, params).fetchall()
+    return [json.loads(r[0]) for r in rows]
+
+
+def delete_issue(key: str, number: int):
+    with _lock:
+        _db().execute("DELETE FROM issues WHERE repo = ? AND number = ?", (key, number))
+        _db().commit()
+
+
+def list_issues(key: str, state: str = "open", limit: int | None = None) -> list[Issue]:
+    """Stored issues, most recently updated first."""
+    return [Issue.from_dict(i) for i in _list("issues", key, state, limit)]
+
+
+def list_pulls(key: str, state: str = "all", limit: int | None = None) -> list[PullRequest]:
+    """Stored pull requests, most recently updated first."""
+    return [PullRequest.from_dict(p) for p in _list("pulls", key, state, limit)]
+
+
+def count_logins(key: str, table: str, field: str, state: str = "open") -> dict[str, int]:
+    """Count logins in a list field ("assignees", "requested_reviewers") across stored
+    issues or pulls, aggregated inside SQLite without loading the payloads."""
+    if table not in ("issues", "pulls"):
+        raise ValueError(f"Unknown table '{table}'")
+    with _lock:
+        rows = _db().execute(
+            f"""SELECT entry.value AS login, COUNT(*)
+                FROM {table}, json_each({table}.data, ?) AS entry
+                WHERE {table}.repo = ? AND {table}.state = ?
+                GROUP BY login""",
+            (f"$.{field}", key, state),
+        ).fetchall()
+    return {login or "": n for login, n in rows}
+
+
+# ---- PR files ----
+
+def get_pr_files(key: str, pulls: dict[int, str | None]) -> dict[int, list[PRFile]]:
+    """Stored file lists for many PRs ({number: head_sha}) in one query.
+
+    PRs whose list is missing or was recorded for another head commit are left out.
+    """
+    if not pulls:
+        return {}
+    marks = ",".join("?" * len(pulls))
+    with _lock:
+        rows = _db().execute(
+            f"SELECT number, head_sha, files FROM pr_files WHERE repo = ? AND number IN ({marks})",
+            [key, *pulls],
+        ).fetchall()
+    return {
+        number: [PRFile(filename) for filename in json.loads(files)]
+        for number, head_sha, files in rows
+        if not pulls[number] or head_sha == pulls[number]
+    }
+
+
+def set_pr_files(key: str, number: int, head_sha: str | None, files: list[PRFile]):
+    # Only the paths are read back
+    slim = [f.filename for f in files]
+    with _lock:
+        _db().execute(
+            "INSERT OR REPLACE INTO pr_files (repo, number, head_sha, files) VALUES (?, ?, ?, ?)",
+            (key, number, head_sha, json.dumps(slim)),
+        )
+        _db().commit()
+
+
+# ---- Contributors ----
+
+def get_contributors(key: str) -> tuple[list[Contributor], float] | None:
+    """Stored contributor list and when it was synced, or None."""
+    with _lock:
+        row = _db().execute(
+            "SELECT data, synced_at FROM contributors WHERE repo = ?", (key,)
+        ).fetchone()
+    if row is None:
+        return None
+    return [Contributor.from_dict(c) for c in json.loads(row[0])], row[1]
+
+
+def mark_contributors_stale(key: str):
+    """Force the next contributor read to refresh from GitHub (e.g. after a push)."""
+    with _lock:
+        _db().execute("UPDATE contributors SET synced_at = 0 WHERE repo = ?", (key,))
+        _db().commit()
+
+
+def set_contributors(key: str, contributors: list[Contributor], synced_at: float | None = None):
+    with _lock:
+        _db().execute(
+            "INSERT OR REPLACE INTO contributors (repo, data, synced_at) VALUES (?, ?, ?)",
+            (key, json.dumps([c.to_dict() for c in contributors]), synced_at or time.time()),
+        )
+        _db().commit()
+
+
+# ---- File ownership ----
+
+def _ownership_mark(db: sqlite3.Connection, key: str) -> tuple[int, int]:
+    return tuple(db.execute(
+        "SELECT COUNT(*), COALESCE(MAX(rowid), 0) FROM ownership_sources WHERE repo = ?", (key,)
+    ).fetchone())
+
+
+def add_ownership(key: str, source: str,
+                  rows: list[tuple[str, str, float]]) -> tuple[tuple[int, int], tuple[int, int]] | None:
+    """Add (prefix, author, weight) rows from one source (a PR or commit) exactly once.
+
+    Returns the repo's ownership mark (see ``ownership_mark``) from just
+    before and just after the write, or None when the source was already
+    recorded.
+    """
+    with _lock:
+        db = _db()
+        # Holds the write lock from the first read, so no other worker's source lands in between
+        db.execute("BEGIN IMMEDIATE")
+        before = _ownership_mark(db, key)
+        try:
+            db.execute("INSERT INTO ownership_sources (repo, source) VALUES (?, ?)", (key, source))
+        except sqlite3.IntegrityError:
+            db.rollback()
+            return None
+        db.executemany(
+            """INSERT INTO ownership (repo, prefix, author, weight) VALUES (?, ?, ?, ?)
+               ON CONFLICT(repo, prefix, author) DO UPDATE SET weight = weight + excluded.weight""",
+            [(key, prefix, author, weight) for prefix, author, weight in rows],
+        )
+        after = _ownership_mark(db, key)
+        db.commit()
+    return before, after
+
+
+def ownership_mark(key: str) -> tuple[int, int]:
+    """Count and newest rowid of the repo's ownership sources; changes whenever any worker writes."""
+    with _lock:
+        return _ownership_mark(_db(), key)
+
+
+def known_ownership_sources(key: str, sources: list[str]) -> set[str]:
+    """The subset of sources already recorded for the repo."""
+    if not sources:
+        return set()
+    marks = ",".join("?" * len(sources))
+    with _lock:
+        rows = _db().execute(
+            f"SELECT source FROM ownership_sources WHERE repo = ? AND source IN ({marks})",
+            [key, *sources],
+        ).fetchall()
+    return {r[0] for r in rows}
+
+
+def load_ownership(key: str) -> tuple[tuple[int, int], list[tuple[str, str, float]]]:
+    """The repo's ownership rows and the mark they correspond to, read from one snapshot."""
+    with _lock:
+        db = _db()
+        db.execute("BEGIN")
+        try:
+            mark = _ownership_mark(db, key)
+            rows = db.execute("SELECT prefix, author, weight FROM ownership WHERE repo = ?", (key,)).fetchall()
+        finally:
+            db.rollback()
+    return mark, rows
@@ -0,0 +1,487 @@
+"""Sync service — incremental sync of GitHub repositories into the local repo store.
+
+The first sync of a repo downloads its open issues and PRs (plus a page of
+recent closed/merged PRs). Later syncs only pull what changed since the last
+watermark: ``since=`` on issues, ``sort=updated`` paging with an early stop on
+pulls. PR file lists are fetched only for PRs whose head commit changed.
+"""
+
+import re
+import time
+import asyncio
+import logging
+import httpx
+from contextlib import aclosing
+from datetime import datetime, timezone, timedelta
+from services import github_service, repo_store, ownership_service
+from schemas.github_models import Issue, PullRequest, Contributor
+from utils import tracing
+from utils.constants import (
+    SYNC_MIN_INTERVAL, SYNC_MAX_PAGES, SYNC_INITIAL_PULL_PAGES, SYNC_WEBHOOK_INTERVAL,
+    GITHUB_CACHE_TTLS, OWNERSHIP_MAX_PRS_PER_SYNC, OWNERSHIP_BACKFILL_COMMITS, OWNERSHIP_HALF_LIFE_DAYS,
+    CONTRIBUTORS_POLL_INTERVAL, CONTRIBUTORS_POLL_MAX_INTERVAL, CONTRIBUTORS_POLL_TIMEOUT,
+    CONTRIBUTORS_PARTIAL_TTL,
+)
+
+logger = logging.getLogger(__name__)
+
+# One sync at a time per repo
+_locks: dict[str, asyncio.Lock] = {}
+# Background ownership indexing tasks (kept referenced until done)
+_background: set[asyncio.Task] = set()
+# Repos whose commit history backfill is running in this process
+_backfilling: set[str] = set()
+# Recorded once the commit history backfill of a repo has completed
+_BACKFILL_SOURCE = "backfill:commits"
+# Squash-merge commit subjects end with the PR number: "Fix login (#123)"
+_SQUASHED_PR = re.compile(r"\(#(\d+)\)$")
+# In-flight contributor refreshes: repo key -> (task, first-snapshot-ready event)
+_refreshes: dict[str, tuple[asyncio.Task, asyncio.Event]] = {}
+_stats = {
+    "syncs": 0, "skipped": 0, "issues_updated": 0, "pulls_updated": 0, "pr_files_fetched": 0,
+    "webhooks_applied": 0, "contributor_snapshot_hits": 0, "contributor_snapshot_stale": 0,
+    "contributor_refreshes": 0, "contributor_stats_pending": 0, "graphql_fallbacks": 0,
+    "commits_backfilled": 0,
+}
+
+
+def get_stats() -> dict:
+    """Return sync counters."""
+    return {**_stats, "contributor_refreshes_running": len(_refreshes)}
+
+
+def _now_watermark() -> str:
+    """ISO timestamp a minute in the past, used when a sync saw no items."""
+    return (datetime.now(timezone.utc) - timedelta(minutes=1)).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _newest(items: list[Issue] | list[PullRequest], fallback: str | None) -> str:
+    stamps = [i.updated_at for i in items if i.updated_at]
+    newest = max(stamps, default=None)
+    if fallback and (newest is None or fallback > newest):
+        return fallback
+    return newest or _now_watermark()
+
+
+async def sync_repo(owner: str, repo: str, force: bool = False) -> dict:
+    """Bring the local store for owner/repo up to date.
+
+    Syncs closer together than SYNC_MIN_INTERVAL are skipped unless forced;
+    repos that are receiving webhooks only sync every SYNC_WEBHOOK_INTERVAL.
+    GitHub errors propagate to the caller.
+    """
+    key = repo_store.repo_key(owner, repo)
+    # Contributor stats take GitHub a while on first request; get them going now
+    await prewarm_contributors(owner, repo)
+    lock = _locks.setdefault(key, asyncio.Lock())
+    async with lock:
+        state = await asyncio.to_thread(repo_store.get_sync_state, key)
+        if not force and state["synced_at"]:
+            now = time.time()
+            webhook_at = await asyncio.to_thread(repo_store.last_webhook_at, key)
+            interval = SYNC_MIN_INTERVAL
+            if webhook_at and now - webhook_at < SYNC_WEBHOOK_INTERVAL:
+                interval = max(interval, SYNC_WEBHOOK_INTERVAL)
+            if now - state["synced_at"] < interval:
+                _stats["skipped"] += 1
+                return state
+
+        issues_watermark, pulls_watermark = await asyncio.gather(
+            _sync_issues(owner, repo, key, state["issues_watermark"]),
+            _sync_pulls(owner, repo, key, state["pulls_watermark"]),
+        )
+        await asyncio.to_thread(repo_store.set_sync_state, key, issues_watermark, pulls_watermark)
+        _stats["syncs"] += 1
+        return await asyncio.to_thread(repo_store.get_sync_state, key)
+
+
+async def _sync_issues(owner: str, repo: str, key: str, watermark: str | None) -> str:
+    # Deltas come oldest first, so the newest issue fetched is a safe watermark even
+    # when the page cap cut paging short
+    issues, _ = await github_service.get_issues_since(owner, repo, since=watermark, max_pages=SYNC_MAX_PAGES)
+    if issues:
+        await asyncio.to_thread(repo_store.upsert_issues, key, issues)
+        _stats["issues_updated"] += len(issues)
+    return _newest(issues, watermark)
+
+
+async def _sync_pulls(owner: str, repo: str, key: str, watermark: str | None) -> str:
+    """Sync PR deltas and return the new watermark.
+
+    The pulls endpoint only pages newest first. When more PRs changed since
+    the watermark than SYNC_MAX_PAGES covers, the missed ones are caught up
+    by re-reading the whole open set: stored open PRs missing from it are
+    marked closed. The watermark only advances once that set was complete.
+    """
+    open_pulls = None
+    if watermark:
+        pulls, complete = await github_service.get_pulls_updated_since(
+            owner, repo, since=watermark, state="all", max_pages=SYNC_MAX_PAGES,
+        )
+        if not complete:
+            open_pulls, complete = await github_service.get_pulls_updated_since(
+                owner, repo, since=None, state="open", max_pages=SYNC_MAX_PAGES,
+            )
+            pulls = list({p.number: p for p in pulls + open_pulls}.values())
+    else:
+        (initial_open, _), (recent_pulls, _) = await asyncio.gather(
+            github_service.get_pulls_updated_since(owner, repo, since=None, state="open",
+                                                   max_pages=SYNC_MAX_PAGES),
+            github_service.get_pulls_updated_since(owner, repo, since=None, state="all",
+                                                   max_pages=SYNC_INITIAL_PULL_PAGES),
+        )
+        pulls = list({p.number: p for p in initial_open + recent_pulls}.values())
+        complete = True
+    if pulls:
+        await asyncio.to_thread(repo_store.upsert_pulls, key, pulls)
+        _stats["pulls_updated"] += len(pulls)
+        schedule_ownership_indexing(owner, repo, pulls)
+    if not complete:
+        logger.warning(f"PR sync for {owner}/{repo} could not catch up within {SYNC_MAX_PAGES} pages")
+        return watermark
+    if open_pulls is not None:
+        closed = await asyncio.to_thread(repo_store.close_missing_pulls, key, {p.number for p in open_pulls})
+        logger.info(f"PR sync for {owner}/{repo} caught up from the open list ({closed} marked closed)")
+    return _newest(pulls, watermark)
+
+
+async def index_merged_pulls(owner: str, repo: str, pulls: list[PullRequest]):
+    """Add merged PRs that are not yet in the ownership index, fetching their files."""
+    key = repo_store.repo_key(owner, repo)
+    merged = [p for p in pulls if p.merged_at and p.author]
+    known = await asyncio.to_thread(
+        repo_store.known_ownership_sources, key, [f"pr:{p.number}" for p in merged],
+    )
+    todo = [p for p in merged if f"pr:{p.number}" not in known][:OWNERSHIP_MAX_PRS_PER_SYNC]
+    if not todo:
+        return
+    files = await get_pr_file_paths(owner, repo, todo)
+    for pr in todo:
+        await ownership_service.record_change(
+            owner, repo, f"pr:{pr.number}", pr.author, await files[pr.number], pr.merged_at,
+        )
+
+
+async def backfill_commit_history(owner: str, repo: str):
+    """Seed the ownership index from recent default-branch commits, once per repo.
+
+    Repos without push webhooks would otherwise only learn from the merged
+    PRs that syncs happen to see. Reads up to OWNERSHIP_BACKFILL_COMMITS
+    commits within four half-lives. A squash-merge commit is recorded as
+    its PR, so it is not counted again when that PR is indexed. Merge
+    commits are skipped. A partial backfill resumes on a later sync.
+    """
+    key = repo_store.repo_key(owner, repo)
+    if OWNERSHIP_BACKFILL_COMMITS <= 0 or key in _backfilling:
+        return
+    if await asyncio.to_thread(repo_store.known_ownership_sources, key, [_BACKFILL_SOURCE]):
+        return
+    _backfilling.add(key)
+    try:
+        horizon = datetime.now(timezone.utc) - timedelta(days=4 * OWNERSHIP_HALF_LIFE_DAYS)
+        commits = github_service.iter_commits(owner, repo, since=horizon.strftime("%Y-%m-%dT%H:%M:%SZ"),
+                                              max_items=OWNERSHIP_BACKFILL_COMMITS)
+        sources = {}
+        try:
+            async with aclosing(commits):
+                async for commit in commits:
+                    if len(commit.get("parents", [])) > 1 or not (commit.get("author") or {}).get("login"):
+                        continue
+                    subject = commit["commit"]["message"].split("\n", 1)[0].strip()
+                    squashed = _SQUASHED_PR.search(subject)
+                    sources[f"pr:{squashed.group(1)}" if squashed else f"commit:{commit['sha']}"] = commit
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code != 409:  # 409: the repository is empty
+                raise
+        known = await asyncio.to_thread(repo_store.known_ownership_sources, key, list(sources))
+
+        async def record(source: str, commit: dict):
+            detail = await github_service.get_commit(owner, repo, commit["sha"])
+            if await ownership_service.record_change(
+                owner, repo, source, commit["author"]["login"],
+                [f["filename"] for f in detail.get("files", [])], commit["commit"]["author"]["date"],
+            ):
+                _stats["commits_backfilled"] += 1
+
+        results = await asyncio.gather(
+            *(record(source, commit) for source, commit in sources.items() if source not in known),
+            return_exceptions=True,
+        )
+        failed = [r for r in results if isinstance(r, Exception)]
+        if failed:
+            logger.warning(f"Commit backfill for {owner}/{repo} left {len(failed)} commit(s) for later: {failed[0]}")
+            return
+        await asyncio.to_thread(repo_store.add_ownership, key, _BACKFILL_SOURCE, [])
+    finally:
+        _backfilling.discard(key)
+
+
+def schedule_ownership_indexing(owner: str, repo: str, pulls: list[PullRequest]):
+    """Index merged PRs (and, once, recent commits) in the background so user requests never wait on it."""
+    async def run():
+        try:
+            await index_merged_pulls(owner, repo, pulls)
+            await backfill_commit_history(owner, repo)
+        except Exception as e:
+            logger.warning(f"Ownership indexing for {owner}/{repo} failed: {e}")
+
+    task = asyncio.create_task(run(), context=tracing.detached())
+    _background.add(task)
+    task.add_done_callback(_background.discard)
+
+
+# ---- Webhooks ----
+
+async def apply_webhook(event: str, payload: dict) -> tuple[str, str] | None:
+    """Apply a GitHub webhook delivery to the local store.
+
+    Returns (owner, repo) when the store changed, or None for events that are
+    not tracked. Webhook payloads carry the same issue/PR JSON as the REST API,
+    so they are parsed with the same models.
+    """
+    full_name = (payload.get("repository") or {}).get("full_name", "")
+    if "/" not in full_name:
+        return None
+    owner, repo = full_name.split("/", 1)
+    key = repo_store.repo_key(owner, repo)
+
+    if event == "issues":
+        issue = payload.get("issue") or {}
+        if "number" not in issue or "pull_request" in issue:
+            return None
+        if payload.get("action") in ("deleted", "transferred"):
+            await asyncio.to_thread(repo_store.delete_issue, key, issue["number"])
+        else:
+            await asyncio.to_thread(repo_store.upsert_issues, key, [Issue.from_github(issue)])
+
+    elif event in ("pull_request", "pull_request_review"):
+        raw = payload.get("pull_request") or {}
+        if "number" not in raw:
+            return None
+        pr = PullRequest.from_github(raw)
+        if event == "pull_request_review":
+            # Review payloads carry a trimmed PR object — keep stored values for what it lacks
+            stored = await asyncio.to_thread(repo_store.get_pull, key, pr.number)
+            if stored is not None:
+                if "changed_files" not in raw:
+                    pr.changed_files = stored.changed_files
+                if "merged_at" not in raw:
+                    pr.merged_at = stored.merged_at
+        await asyncio.to_thread(repo_store.upsert_pulls, key, [pr])
+        if pr.merged_at:
+            schedule_ownership_indexing(owner, repo, [pr])
+
+    elif event == "push":
+        default_branch = (payload.get("repository") or {}).get("default_branch")
+        if payload.get("ref") != f"refs/heads/{default_branch}":
+            return None
+        await ownership_service.record_push(owner, repo, payload)
+        # Commit stats changed: start recomputing them now, before anyone asks
+        await asyncio.to_thread(repo_store.mark_contributors_stale, key)
+        await github_service.invalidate_repo(owner, repo, "/stats")
+        await github_service.invalidate_repo(owner, repo, "/contributors")
+        refresh_contributors(owner, repo)
+
+    else:
+        return None
+
+    await asyncio.to_thread(repo_store.record_webhook, key)
+    _stats["webhooks_applied"] += 1
+    return owner, repo
+
+
+# ---- Store reads used by the planner ----
+
+async def list_issues(owner: str, repo: str, state: str = "open", limit: int | None = None) -> list[Issue]:
+    return await asyncio.to_thread(repo_store.list_issues, repo_store.repo_key(owner, repo), state, limit)
+
+
+async def list_pulls(owner: str, repo: str, state: str = "all", limit: int | None = None) -> list[PullRequest]:
+    return await asyncio.to_thread(repo_store.list_pulls, repo_store.repo_key(owner, repo), state, limit)
+
+
+async def get_pr_file_paths(owner: str, repo: str, pulls: list[PullRequest]) -> dict[int, asyncio.Future]:
+    """Start loading changed file paths for each PR; returns one future per PR number.
+
+    Stored lists (one store query for all PRs) resolve at once. Lists whose
+    head commit changed are fetched, bulk through GraphQL when several are
+    needed, otherwise per PR through REST, and each future resolves as soon
+    as its own list arrives. A PR whose files cannot be fetched resolves to
+    an empty list. Cancel the pending futures if the caller gives up.
+    """
+    key = repo_store.repo_key(owner, repo)
+    stored = await asyncio.to_thread(repo_store.get_pr_files, key, {pr.number: pr.head_sha for pr in pulls})
+    loop = asyncio.get_running_loop()
+    paths: dict[int, asyncio.Future] = {}
+    missing: list[PullRequest] = []
+    for pr in pulls:
+        if pr.number in stored:
+            paths[pr.number] = loop.create_future()
+            paths[pr.number].set_result([f.filename for f in stored[pr.number]])
+        else:
+            missing.append(pr)
+    if not missing:
+        return paths
+
+    async def fetch_bulk() -> dict[int, PullRequest]:
+        try:
+            bulk = await github_service.get_pulls_graphql(owner, repo, state="all", per_page=len(pulls))
+            return {p.number: p for p in bulk if p.files is not None}
+        except Exception as e:
+            _stats["graphql_fallbacks"] += 1
+            logger.info(f"GraphQL file fetch unavailable ({e}) — using REST")
+            return {}
+
+    bulk = None
+    if len(missing) > 1 and github_service.get_token():
+        bulk = asyncio.create_task(fetch_bulk())
+
+    async def fetch(pr: PullRequest) -> list[str]:
+        number, head_sha = pr.number, pr.head_sha
+        # Shielded: one PR giving up must not cancel the query the others wait on
+        fetched = await asyncio.shield(bulk) if bulk is not None else {}
+        if number in fetched and (not head_sha or fetched[number].head_sha == head_sha):
+            files = fetched[number].files
+        else:
+            try:
+                files = await github_service.get_pr_files(owner, repo, number)
+            except Exception:
+                return []
+        _stats["pr_files_fetched"] += 1
+        await asyncio.to_thread(repo_store.set_pr_files, key, number, head_sha, files)
+        return [f.filename for f in files]
+
+    tasks = [asyncio.create_task(fetch(pr)) for pr in missing]
+    for pr, task in zip(missing, tasks):
+        paths[pr.number] = task
+    if bulk is not None:
+        def release_bulk(_):
+            if all(t.done() for t in tasks):
+                bulk.cancel()
+        for task in tasks:
+            task.add_done_callback(release_bulk)
+    return paths
+
+
+async def get_contributors(owner: str, repo: str) -> list[Contributor]:
+    """Contributor snapshot for the repo; never waits on GitHub's stats computation.
+
+    A fresh snapshot is returned as-is. A stale one is returned immediately
+    while a background refresh runs. With no snapshot at all the caller waits
+    only until the first one is stored — the totals-only contributor list if
+    the stats endpoint is still answering 202.
+    """
+    key = repo_store.repo_key(owner, repo)
+    stored = await asyncio.to_thread(repo_store.get_contributors, key)
+    if stored is not None:
+        if time.time() - stored[1] < GITHUB_CACHE_TTLS["contributors"]:
+            _stats["contributor_snapshot_hits"] += 1
+        else:
+            _stats["contributor_snapshot_stale"] += 1
+            refresh_contributors(owner, repo)
+        return stored[0]
+
+    task, ready = refresh_contributors(owner, repo)
+    waiter = asyncio.ensure_future(ready.wait())
+    try:
+        # Shared refresh task is not cancelled if this request goes away
+        await asyncio.wait({task, waiter}, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        waiter.cancel()
+    if not ready.is_set():
+        task.result()  # refresh failed before storing anything: surface its error
+    stored = await asyncio.to_thread(repo_store.get_contributors, key)
+    return stored[0] if stored else []
+
+
+def refresh_contributors(owner: str, repo: str) -> tuple[asyncio.Task, asyncio.Event]:
+    """Start (or join) the background contributor refresh for a repo.
+
+    Returns the refresh task and an event set once a snapshot is available.
+    """
+    key = repo_store.repo_key(owner, repo)
+    running = _refreshes.get(key)
+    if running is not None and not running[0].done():
+        return running
+
+    ready = asyncio.Event()
+    # Shared by every request waiting on this repo, so it is not part of any one trace
+    task = asyncio.create_task(_refresh_contributors(owner, repo, key, ready), context=tracing.detached())
+    _refreshes[key] = (task, ready)
+    _stats["contributor_refreshes"] += 1
+
+    def done(t: asyncio.Task):
+        if _refreshes.get(key, (None,))[0] is t:
+            del _refreshes[key]
+        if not t.cancelled() and t.exception() is not None:
+            logger.warning(f"Contributor refresh for {owner}/{repo} failed: {t.exception()}")
+
+    task.add_done_callback(done)
+    return task, ready
+
+
+async def prewarm_contributors(owner: str, repo: str):
+    """Start a contributor refresh if the stored snapshot is missing or stale."""
+    key = repo_store.repo_key(owner, repo)
+    stored = await asyncio.to_thread(repo_store.get_contributors, key)
+    if stored is None or time.time() - stored[1] >= GITHUB_CACHE_TTLS["contributors"]:
+        refresh_contributors(owner, repo)
+
+
+async def _refresh_contributors(owner: str, repo: str, key: str, ready: asyncio.Event):
+    """Poll the stats endpoint with backoff until GitHub has computed it, then store it.
+
+    While stats are pending (202) and there is no snapshot yet, the plain
+    contributor list is stored as a short-lived partial snapshot so requests
+    can proceed without weekly activity.
+    """
+    delay = CONTRIBUTORS_POLL_INTERVAL
+    deadline = time.monotonic() + CONTRIBUTORS_POLL_TIMEOUT
+    while True:
+        stats_available = True
+        try:
+            contributors = await github_service.get_contributor_stats(owner, repo)
+        except httpx.HTTPStatusError as e:
+            # Stats unavailable for this repo: the contributor list is all we get
+            logger.info(f"Contributor stats for {owner}/{repo} unavailable ({e.response.status_code})")
+            contributors, stats_available = None, False
+
+        if contributors is not None:
+            await asyncio.to_thread(repo_store.set_contributors, key, contributors)
+            ready.set()
+            return
+
+        if not stats_available:
+            contributors = await github_service.get_contributor_list(owner, repo)
+            await asyncio.to_thread(repo_store.set_contributors, key, contributors)
+            ready.set()
+            return
+
+        _stats["contributor_stats_pending"] += 1
+        if not ready.is_set():
+            if await asyncio.to_thread(repo_store.get_contributors, key) is None:
+                contributors = await github_service.get_contributor_list(owner, repo)
+                # Backdated so it only counts as fresh for CONTRIBUTORS_PARTIAL_TTL
+                synced_at = time.time() - GITHUB_CACHE_TTLS["contributors"] + CONTRIBUTORS_PARTIAL_TTL
+                await asyncio.to_thread(repo_store.set_contributors, key, contributors, synced_at)
+            ready.set()
+
+        if time.monotonic() + delay > deadline:
+            logger.warning(f"Gave up waiting for contributor stats of {owner}/{repo}")
+            return
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, CONTRIBUTORS_POLL_MAX_INTERVAL)
+
+
+async def get_user_issues(owner: str, repo: str) -> dict[str, int]:
+    """Count stored open issues assigned to each user."""
+    return await asyncio.to_thread(
+        repo_store.count_logins, repo_store.repo_key(owner, repo), "issues", "assignees",
+    )
+
+
+async def get_pending_reviews(owner: str, repo: str) -> dict[str, int]:
+    """Count pending reviews per user across stored open PRs."""
+    return await asyncio.to_thread(
+        repo_store.count_logins, repo_store.repo_key(owner, repo), "pulls", "requested_reviewers",
+    )
@@ -0,0 +1,10 @@
+"""Run the tests from backend/ with ``python -m pytest``; modules import as the app does."""
+
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Fresh caches and stores for every run, never an inherited or shared directory
+os.environ["DEVINTEL_CACHE_DIR"] = tempfile.mkdtemp(prefix="devintel-tests-")
@@ -0,0 +1,35 @@
+import pytest
+from utils.keyword_matcher import KeywordMatcher
+from utils.scoring_utils import classify_issue_rule_based
+
+
+@pytest.mark.parametrize("title, classification, labels", [
+    ("Bugfix for login", "Bug", ["bug"]),
+    ("UI-related crash in API-breaking bug-fix", "Bug", ["bug", "frontend", "backend"]),
+    ("Login page crashes on submit", "Bug", ["bug"]),
+    ("Add dark mode to the frontend", "Feature", ["feature", "frontend"]),
+])
+def test_rule_based_classification(title, classification, labels):
+    result = classify_issue_rule_based(title, "")
+    assert result["classification"] == classification
+    assert result["suggested_labels"] == labels
+
+
+def test_hyphenated_words_match_whole_and_by_parts():
+    matcher = KeywordMatcher({"ops": ["ci-cd"], "frontend": ["ui"], "backend": ["api"]})
+    assert matcher.hits("Our CI-CD setup") == {"ops": {"ci-cd"}}
+    assert matcher.hits("UI-kit and API-breaking changes") == {"frontend": {"ui"}, "backend": {"api"}}
+
+
+def test_short_keywords_match_compounds_but_not_inside_words():
+    matcher = KeywordMatcher({"bug": ["bug", "fix"], "low": ["low"], "frontend": ["ui"]})
+    assert matcher.hits("bugfix") == {"bug": {"bug", "fix"}}
+    assert matcher.hits("fixes") == {"bug": {"fix"}}
+    assert matcher.hits("prefix fixture") == {}
+    assert matcher.hits("allow below") == {}
+    assert matcher.hits("build") == {}
+
+
+def test_long_keywords_match_as_prefix():
+    matcher = KeywordMatcher({"bug": ["fail", "crash"]})
+    assert matcher.hits("Failure after crashes") == {"bug": {"fail", "crash"}}
@@ -0,0 +1,109 @@
+import time
+import asyncio
+import logging
+import httpx
+import pytest
+from services.cache_service import TwoTierCache
+from services.rate_limiter import GitHubRateLimiter, RateLimitExceeded
+
+
+def _limiter(max_concurrency: int = 4, max_wait: float = 5.0) -> GitHubRateLimiter:
+    return GitHubRateLimiter(max_concurrency=max_concurrency, reserve=0, pacing_threshold=0.0, max_wait=max_wait)
+
+
+def _response(status: int, headers: dict | None = None, body: bytes = b"{}") -> httpx.Response:
+    return httpx.Response(status, headers=headers or {}, content=body)
+
+
+async def _send(limiter: GitHubRateLimiter, resource: str = "core") -> float:
+    """Time until the limiter lets one request through."""
+    start = time.monotonic()
+    async with limiter.acquire(resource):
+        pass
+    return time.monotonic() - start
+
+
+def test_retry_after_pauses_then_resumes():
+    async def run():
+        limiter = _limiter()
+        assert limiter.record(_response(429, {"Retry-After": "0.3"}, b"secondary rate limit")) is True
+        assert limiter.status()["paused_for"] >= 0
+        paused = await _send(limiter)
+        resumed = await _send(limiter)
+        return paused, resumed
+
+    paused, resumed = asyncio.run(run())
+    assert paused >= 0.25
+    assert resumed < 0.05
+
+
+def test_waiting_request_does_not_hold_a_slot():
+    async def run():
+        limiter = _limiter(max_concurrency=1)
+        # Core quota is gone until 0.3s from now; search is untouched
+        limiter.record(_response(200, {
+            "X-RateLimit-Limit": "60", "X-RateLimit-Remaining": "0",
+            "X-RateLimit-Reset": str(time.time() + 0.3),
+        }))
+        core = asyncio.create_task(_send(limiter, "core"))
+        await asyncio.sleep(0.05)
+        search = await _send(limiter, "search")
+        return search, await core
+
+    search, core = asyncio.run(run())
+    assert search < 0.05
+    assert core >= 0.2
+
+
+def test_pause_beyond_max_wait_raises():
+    async def run():
+        limiter = _limiter(max_wait=1.0)
+        limiter.record(_response(403, {"Retry-After": "30"}, b"You have exceeded a secondary rate limit"))
+        await _send(limiter)
+
+    with pytest.raises(RateLimitExceeded) as exc:
+        asyncio.run(run())
+    assert exc.value.retry_after > 1.0
+
+
+def test_pause_log_names_the_limit(caplog):
+    limiter = _limiter()
+    with caplog.at_level(logging.WARNING, logger="services.rate_limiter"):
+        limiter.record(_response(403, {
+            "Retry-After": "1", "X-RateLimit-Remaining": "0", "X-RateLimit-Reset": str(time.time() + 1),
+        }))
+        limiter.record(_response(403, {"Retry-After": "1"}, b"You have exceeded a secondary rate limit"))
+    messages = [record.getMessage() for record in caplog.records]
+    assert "primary rate limit" in messages[0]
+    assert "secondary rate limit" in messages[1]
+
+
+def test_github_call_is_retried_after_secondary_limit(monkeypatch):
+    """Fake GitHub: the first call hits a secondary limit, the retry after the pause succeeds."""
+    from services import github_service
+
+    # Own memory-only cache and limiter: nothing cached or paused by other tests or runs
+    monkeypatch.setattr(github_service, "_cache", TwoTierCache(1 << 20, disk_path=None, disk_bytes=0, table="test"))
+    monkeypatch.setattr(github_service, "_limiter", _limiter())
+    calls = []
+
+    def fake_github(request: httpx.Request) -> httpx.Response:
+        calls.append(time.monotonic())
+        if len(calls) == 1:
+            return httpx.Response(403, headers={"Retry-After": "0.2"},
+                                  content=b'{"message": "You have exceeded a secondary rate limit."}')
+        return httpx.Response(200, json={"name": "r", "full_name": "o/r"})
+
+    async def run():
+        github_service._client = httpx.AsyncClient(
+            transport=httpx.MockTransport(fake_github), base_url="https://api.github.com",
+        )
+        try:
+            return await github_service.get_repository("o", "paused-repo")
+        finally:
+            await github_service.close_client()
+
+    repo = asyncio.run(run())
+    assert repo["full_name"] == "o/r"
+    assert len(calls) == 2
+    assert calls[1] - calls[0] >= 0.15
@@ -0,0 +1,59 @@
+import random
+from array import array
+import pytest
+from utils import scoring_utils
+from utils.scoring_utils import rank_assignees, calculate_pr_risk, calculate_pr_risks
+from schemas.github_models import Contributor
+
+
+def _contributors(rng: random.Random, n: int) -> list[Contributor]:
+    contributors = []
+    for j in range(n):
+        # Few distinct values so equal scores (ties) are common
+        weeks = [v for w in range(4) for v in (w, 0, 0, rng.choice([0, 1, 3, 12]))]
+        contributors.append(Contributor(
+            login=f"dev{j}", total_commits=rng.choice([0, 5, 25, 50, 80]), week_data=array("q", weeks),
+        ))
+    return contributors
+
+
+def _ownerships(rng: random.Random, contributors: list[Contributor], issues: int) -> list[dict[str, float]]:
+    ownerships = []
+    for _ in range(issues):
+        shares = {}
+        for c in rng.sample(contributors, rng.randint(0, len(contributors))):
+            shares[c.login] = rng.choice([0.0, 0.25, 0.5, 1.0, 1.5, round(rng.random(), 3)])
+        shares["not-a-contributor"] = 0.9
+        ownerships.append(shares)
+    return ownerships
+
+
+@pytest.mark.skipif(scoring_utils.np is None, reason="NumPy not installed")
+@pytest.mark.parametrize("seed", range(20))
+def test_numpy_ranking_matches_pure_python(monkeypatch, seed):
+    rng = random.Random(seed)
+    contributors = _contributors(rng, rng.randint(1, 40))
+    ownerships = _ownerships(rng, contributors, rng.randint(1, 30))
+    k = rng.randint(1, 6)
+
+    with_numpy = rank_assignees(contributors, ownerships, k)
+    monkeypatch.setattr(scoring_utils, "np", None)
+    pure_python = rank_assignees(contributors, ownerships, k)
+
+    assert with_numpy == pure_python
+
+
+def test_ranking_without_candidates():
+    assert rank_assignees([], [{}, {}]) == [[], []]
+    assert rank_assignees(_contributors(random.Random(0), 3), []) == []
+
+
+def test_batched_pr_risk_matches_single():
+    prs = [
+        (3, ["README.md"]),
+        (8, ["src/core/engine.py", "docs/x.md"]),
+        (25, ["pkg/lib/util.py", "mylib/util.py", "docker-compose.prod.yml"]),
+        (12, ["src/auth/login.py", "src/core/a.py", "src/core/b.py", "config/settings.py"]),
+        (0, []),
+    ]
+    assert calculate_pr_risks(prs) == [calculate_pr_risk(n, paths) for n, paths in prs]
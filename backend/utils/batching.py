@@ -0,0 +1,98 @@
+"""Batching helpers for packing many items into one LLM prompt."""
+
+import asyncio
+
+
+def pack_batches(items: list, size_of, max_items: int, max_chars: int) -> list[list]:
+    """Split items into consecutive batches bounded by item count and total size.
+
+    An item larger than max_chars on its own still gets a batch of one.
+    """
+    batches: list[list] = []
+    current: list = []
+    chars = 0
+    for item in items:
+        size = size_of(item)
+        if current and (len(current) >= max_items or chars + size > max_chars):
+            batches.append(current)
+            current, chars = [], 0
+        current.append(item)
+        chars += size
+    if current:
+        batches.append(current)
+    return batches
+
+
+class MicroBatcher:
+    """Collect items submitted from concurrent tasks and flush them as batches.
+
+    A batch is flushed when it is full (by count or size) or ``linger`` seconds
+    after its first item arrived, so callers that finish close together share
+    one round trip without anyone waiting on a global barrier. ``flush_fn``
+    receives a list of items and returns a list of results in the same order.
+    """
+
+    def __init__(self, flush_fn, size_of, max_items: int, max_chars: int, linger: float = 0.05):
+        self._flush_fn = flush_fn
+        self._size_of = size_of
+        self._max_items = max_items
+        self._max_chars = max_chars
+        self._linger = linger
+        self._pending: list[tuple[object, asyncio.Future]] = []
+        self._chars = 0
+        self._timer: asyncio.TimerHandle | None = None
+        self._tasks: set[asyncio.Task] = set()
+
+    async def submit(self, item):
+        """Queue one item and wait for its result."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        size = self._size_of(item)
+        if self._pending and self._chars + size > self._max_chars:
+            self._flush()
+
+        self._pending.append((item, future))
+        self._chars += size
+        if len(self._pending) >= self._max_items:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self._linger, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+        batch, self._pending, self._chars = self._pending, [], 0
+        task = asyncio.ensure_future(self._run(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: list[tuple[object, asyncio.Future]]):
+        try:
+            results = await self._flush_fn([item for item, _ in batch])
+        except asyncio.CancelledError:
+            for _, future in batch:
+                future.cancel()
+            raise
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    def cancel(self):
+        """Drop pending items and cancel batches still in flight."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        for _, future in self._pending:
+            future.cancel()
+        self._pending, self._chars = [], 0
+        for task in list(self._tasks):
+            task.cancel()
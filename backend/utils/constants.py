@@ -1,3 +1,5 @@
+import os
+
 # Issue classifications
 ISSUE_TYPES = ["Bug", "Feature", "Refactor", "Question"]
 
@@ -7,12 +9,130 @@ PRIORITY_LEVELS = ["Low", "Medium", "High"]
 # Risk levels
 RISK_LEVELS = ["Low", "Medium", "High"]
 
+# Local state (SQLite caches and stores) lives here
+CACHE_DIR = os.getenv("DEVINTEL_CACHE_DIR", os.path.join(os.path.dirname(os.path.dirname(__file__)), ".cache"))
+
+# Local repository store kept current by incremental sync and webhooks
+REPO_STORE_PATH = os.getenv("REPO_STORE_PATH", os.path.join(CACHE_DIR, "repo_store.sqlite3"))
+SYNC_MIN_INTERVAL = float(os.getenv("SYNC_MIN_INTERVAL", "30"))  # seconds between delta syncs
+SYNC_MAX_PAGES = int(os.getenv("SYNC_MAX_PAGES", "10"))  # pages of 100 per list per sync
+SYNC_INITIAL_PULL_PAGES = int(os.getenv("SYNC_INITIAL_PULL_PAGES", "1"))  # closed/merged history on first sync
+# Repos receiving webhooks are kept hot by them, so delta syncs can be much rarer
+SYNC_WEBHOOK_INTERVAL = float(os.getenv("SYNC_WEBHOOK_INTERVAL", "900"))
+
+# Multi-repo batch analysis — analyses in flight across all batches (GitHub and LLM
+# calls are additionally bounded process-wide by their own limits)
+BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "4"))
+BATCH_MAX_REPOS = int(os.getenv("BATCH_MAX_REPOS", "500"))
+
+# Background analysis jobs — persisted so queued work and results survive restarts
+JOB_STORE_PATH = os.getenv("JOB_STORE_PATH", os.path.join(CACHE_DIR, "jobs.sqlite3"))
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))  # jobs running at once
+JOB_MAX_QUEUED = int(os.getenv("JOB_MAX_QUEUED", "500"))  # submissions beyond this are refused
+JOB_RETENTION_DAYS = float(os.getenv("JOB_RETENTION_DAYS", "7"))  # finished jobs kept this long
+# A running job is claimed by one worker process for this long and renewed while it runs;
+# jobs whose claim lapses (the process died) are queued again for any worker to pick up
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "60"))
+
+# Request tracing — span tree per request, summed per span name in the Server-Timing header
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "true").lower() not in ("0", "false", "no")
+TRACE_MAX_SPANS = int(os.getenv("TRACE_MAX_SPANS", "2000"))  # per request; later spans are only counted
+# cProfile captures for requests sent with "X-Profile: 1" — one at a time. Off by default:
+# any client can send the header, so enable it only where the API is not public
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))  # share of such requests captured
+PROFILE_DIR = os.getenv("PROFILE_DIR", os.path.join(CACHE_DIR, "profiles"))
+PROFILE_MAX_FILES = int(os.getenv("PROFILE_MAX_FILES", "50"))  # oldest captures are deleted
+
+# Contributor snapshots — stats are polled in the background while GitHub computes them (202)
+CONTRIBUTORS_POLL_INTERVAL = float(os.getenv("CONTRIBUTORS_POLL_INTERVAL", "2"))  # first retry, doubles
+CONTRIBUTORS_POLL_MAX_INTERVAL = float(os.getenv("CONTRIBUTORS_POLL_MAX_INTERVAL", "30"))
+CONTRIBUTORS_POLL_TIMEOUT = float(os.getenv("CONTRIBUTORS_POLL_TIMEOUT", "600"))
+# How long a totals-only snapshot (taken while stats were pending) counts as fresh
+CONTRIBUTORS_PARTIAL_TTL = float(os.getenv("CONTRIBUTORS_PARTIAL_TTL", "300"))
+
+# File ownership index — merged PR / pushed commit history, decayed by age
+OWNERSHIP_HALF_LIFE_DAYS = float(os.getenv("OWNERSHIP_HALF_LIFE_DAYS", "90"))
+OWNERSHIP_MAX_PRS_PER_SYNC = int(os.getenv("OWNERSHIP_MAX_PRS_PER_SYNC", "30"))
+# Default-branch commits read once per repo to seed the index (0 = no backfill); older
+# than four half-lives (weight under 1/16) are never read
+OWNERSHIP_BACKFILL_COMMITS = int(os.getenv("OWNERSHIP_BACKFILL_COMMITS", "100"))
+# Seconds a worker uses its in-memory index before checking the store for other workers' writes
+OWNERSHIP_RELOAD_CHECK_INTERVAL = float(os.getenv("OWNERSHIP_RELOAD_CHECK_INTERVAL", "5"))
+
+# Shared secret configured on the GitHub webhook (required to accept deliveries)
+GITHUB_WEBHOOK_SECRET = os.getenv("GITHUB_WEBHOOK_SECRET", "")
+
+# LLM response cache — content-addressed, on disk, LRU-evicted by size; TTL 0 = never expires
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() not in ("0", "false", "no")
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", os.path.join(CACHE_DIR, "llm_cache.sqlite3"))
+LLM_CACHE_MAX_BYTES = int(os.getenv("LLM_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+LLM_CACHE_MEMORY_BYTES = int(os.getenv("LLM_CACHE_MEMORY_BYTES", str(16 * 1024 * 1024)))
+LLM_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL", "0"))
+
+# Concurrent identical analyze-* requests share one run; its result is reused for this long
+ANALYSIS_REUSE_SECONDS = float(os.getenv("ANALYSIS_REUSE_SECONDS", "5"))
+
+# Max agent calls (LLM round trips) in flight per analysis request
+AGENT_MAX_CONCURRENCY = int(os.getenv("AGENT_MAX_CONCURRENCY", "8"))
+
+# LLM calls — model, concurrent requests to the model and per-call timeout (seconds)
+LLM_MODEL_NAME = os.getenv("LLM_MODEL_NAME", "gemini-1.5-flash")
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "60"))
+
+# Batched prompting — items per prompt, prompt payload budget (chars), per-item body cap
+LLM_BATCH_MAX_ITEMS = int(os.getenv("LLM_BATCH_MAX_ITEMS", "10"))
+LLM_BATCH_MAX_CHARS = int(os.getenv("LLM_BATCH_MAX_CHARS", "12000"))
+LLM_BATCH_ITEM_CHARS = int(os.getenv("LLM_BATCH_ITEM_CHARS", "1500"))
+LLM_BATCH_LINGER = float(os.getenv("LLM_BATCH_LINGER", "0.1"))
+
 # Load score weights
 LOAD_WEIGHT_ISSUES = 2
 LOAD_WEIGHT_REVIEWS = 1
 
-# GitHub API base
-GITHUB_API_BASE = "https://api.github.com"
+# GitHub API base (override to point at a local fake GitHub server)
+GITHUB_API_BASE = os.getenv("GITHUB_API_BASE", "https://api.github.com")
+
+# GitHub HTTP client — one pooled client shared by every github_service call
+GITHUB_HTTP2 = os.getenv("GITHUB_HTTP2", "true").lower() not in ("0", "false", "no")
+GITHUB_MAX_CONNECTIONS = int(os.getenv("GITHUB_MAX_CONNECTIONS", "20"))
+GITHUB_MAX_KEEPALIVE = int(os.getenv("GITHUB_MAX_KEEPALIVE", "10"))
+GITHUB_KEEPALIVE_EXPIRY = float(os.getenv("GITHUB_KEEPALIVE_EXPIRY", "60"))
+GITHUB_TIMEOUT = float(os.getenv("GITHUB_TIMEOUT", "30"))
+GITHUB_CONNECT_TIMEOUT = float(os.getenv("GITHUB_CONNECT_TIMEOUT", "10"))
+
+# GitHub rate-limit scheduler
+GITHUB_MAX_CONCURRENCY = int(os.getenv("GITHUB_MAX_CONCURRENCY", "10"))
+GITHUB_RATE_LIMIT_RESERVE = int(os.getenv("GITHUB_RATE_LIMIT_RESERVE", "20"))
+GITHUB_RATE_LIMIT_PACING = float(os.getenv("GITHUB_RATE_LIMIT_PACING", "0.2"))  # pace below 20% left
+GITHUB_RATE_LIMIT_MAX_WAIT = float(os.getenv("GITHUB_RATE_LIMIT_MAX_WAIT", "30"))
+GITHUB_MAX_RETRIES = int(os.getenv("GITHUB_MAX_RETRIES", "2"))
+
+# GitHub caps PR file listings at 3000 files (30 pages of 100)
+GITHUB_PR_FILES_MAX_PAGES = int(os.getenv("GITHUB_PR_FILES_MAX_PAGES", "30"))
+
+# GitHub payload cache — memory LRU in front of a SQLite file shared by all workers
+GITHUB_CACHE_MEMORY_BYTES = int(os.getenv("GITHUB_CACHE_MEMORY_BYTES", str(64 * 1024 * 1024)))
+GITHUB_CACHE_DISK_BYTES = int(os.getenv("GITHUB_CACHE_DISK_BYTES", str(512 * 1024 * 1024)))
+GITHUB_CACHE_PATH = os.getenv("GITHUB_CACHE_PATH", os.path.join(CACHE_DIR, "github_cache.sqlite3"))
+# Seconds a worker may serve memory-tier entries before replaying other workers' invalidations
+CACHE_INVALIDATION_CHECK_INTERVAL = float(os.getenv("CACHE_INVALIDATION_CHECK_INTERVAL", "1"))
+
+# Seconds a cached payload is served without revalidation, per endpoint.
+# Override any entry with GITHUB_CACHE_TTL_<KIND>, e.g. GITHUB_CACHE_TTL_ISSUES=30
+_DEFAULT_GITHUB_CACHE_TTLS = {
+    "repository": 6 * 3600,
+    "languages": 6 * 3600,
+    "readme": 6 * 3600,
+    "contributors": 24 * 3600,
+    "issues": 60,
+    "pulls": 60,
+    "pr_files": 600,
+}
+GITHUB_CACHE_TTLS = {
+    kind: int(os.getenv(f"GITHUB_CACHE_TTL_{kind.upper()}", default))
+    for kind, default in _DEFAULT_GITHUB_CACHE_TTLS.items()
+}
 
 # Core module paths that increase PR risk
 CORE_MODULE_PATHS = [
@@ -31,6 +151,9 @@ CORE_MODULE_PATHS = [
     "package.json",
 ]
 
+# JSON file of extra core paths per repo: {"owner/repo": ["services/billing/", ...]}
+CORE_PATHS_CONFIG = os.getenv("CORE_PATHS_CONFIG", "")
+
 # Bug indicator keywords
 BUG_KEYWORDS = [
     "bug", "fix", "error", "crash", "broken", "fail", "issue",
@@ -54,3 +177,47 @@ QUESTION_KEYWORDS = [
     "question", "how", "why", "help", "docs", "documentation",
     "clarify", "explain", "understand", "?",
 ]
+
+# Priority indicator keywords for rule-based issue classification
+HIGH_PRIORITY_KEYWORDS = ["critical", "urgent", "blocker", "asap", "production", "hotfix", "security"]
+LOW_PRIORITY_KEYWORDS = ["minor", "typo", "cosmetic", "nice to have", "low"]
+
+# Extra labels suggested when any of their keywords appear in an issue
+ISSUE_LABEL_KEYWORDS = {
+    "security": ["security"],
+    "frontend": ["ui", "frontend"],
+    "backend": ["api", "backend"],
+}
+
+# Changed-path fragments that trigger review checklist items (substring match)
+CHECKLIST_PATH_PATTERNS = {
+    "tests": [".test.", "_test.", "spec."],
+    "config": ["config", ".env", "settings"],
+    "database": ["migration", "schema", "model"],
+    "api": ["api", "route", "endpoint"],
+    "security": ["auth", "security", "token", "password"],
+}
+
+# Repository keywords (description, topics, README) → feature they suggest
+REPO_FEATURE_KEYWORDS = {
+    "api": "RESTful API",
+    "rest": "REST API",
+    "graphql": "GraphQL API",
+    "cli": "Command-line interface",
+    "web": "Web application",
+    "mobile": "Mobile support",
+    "desktop": "Desktop application",
+    "database": "Database integration",
+    "authentication": "User authentication",
+    "authorization": "Access control",
+    "testing": "Automated testing",
+    "ci-cd": "CI/CD pipeline",
+    "docker": "Docker containerization",
+    "kubernetes": "Kubernetes orchestration",
+    "microservices": "Microservices architecture",
+    "serverless": "Serverless functions",
+    "machine-learning": "Machine learning capabilities",
+    "ai": "AI-powered features",
+    "real-time": "Real-time updates",
+    "websocket": "WebSocket support",
+}
@@ -0,0 +1,125 @@
+"""Compiled multi-keyword matcher used by the rule-based agents.
+
+A text is scanned once no matter how many keyword lists are checked against
+it. In word mode the text is split into word tokens by one compiled regex and
+the distinct tokens are intersected with a memo of tokens already known to
+hit a keyword, so the cost grows with the text, not with the keyword count.
+"""
+
+import re
+from typing import Iterable
+
+_TOKEN = re.compile(r"\w+(?:-\w+)*")
+_SIMPLE = re.compile(r"^\w+(?:-\w+)*$")
+_INFLECTIONS = ("ing", "es", "ed", "s")
+
+# Token memo is dropped once it grows past this many distinct words
+_MAX_SEEN_TOKENS = 200_000
+
+
+class KeywordMatcher:
+    """Find which keyword categories occur in a text in a single pass.
+
+    ``categories`` maps a category name to its keywords; a keyword may belong
+    to several categories. Matching is case-insensitive.
+
+    With ``whole_words=True`` keywords match on word boundaries; hyphenated
+    words match as a whole ("ci-cd") and by their parts ("ui-related" → "ui").
+    Keywords of four or more characters also match as a word prefix ("fail" →
+    "failure"). Shorter ones match with a plain inflection ("fix" → "fixes")
+    or at the start of a compound whose rest is itself a keyword ("bugfix" →
+    "bug" and "fix"), but not inside other words ("prefix", "fixture").
+    Phrases and keywords with punctuation ("nice to have", "?") are matched
+    literally. With ``whole_words=False`` keywords match anywhere as
+    substrings (useful for file paths).
+    """
+
+    def __init__(self, categories: dict[str, Iterable[str]], whole_words: bool = True):
+        self._categories: dict[str, list[str]] = {}
+        for category, keywords in categories.items():
+            for kw in keywords:
+                self._categories.setdefault(kw.lower(), []).append(category)
+
+        self.whole_words = whole_words
+        if whole_words:
+            words = [kw for kw in self._categories if _SIMPLE.match(kw)]
+            literals = [kw for kw in self._categories if not _SIMPLE.match(kw)]
+            self._short = {kw for kw in words if len(kw) < 4}
+            self._short_lengths = sorted({len(kw) for kw in self._short})
+            self._long = {kw for kw in words if len(kw) >= 4}
+            self._long_lengths = sorted({len(kw) for kw in self._long}, reverse=True)
+            self._seen: set[str] = set()
+            self._token_hits: dict[str, list[str]] = {}
+        else:
+            literals = list(self._categories)
+
+        # Longest first so a keyword wins over its own prefix at the same position
+        self._literals = sorted(literals, key=len, reverse=True)
+        self._literal_regex = None
+        if self._literals:
+            parts = []
+            for kw in self._literals:
+                pattern = re.escape(kw)
+                if whole_words and re.match(r"\w", kw):
+                    pattern = r"\b" + pattern
+                if whole_words and re.search(r"\w$", kw):
+                    pattern += r"\b"
+                parts.append(f"({pattern})")
+            body = "|".join(parts)
+            if not whole_words:
+                # Lookahead reports every start position, so overlapping keywords all count
+                body = f"(?={body})"
+            self._literal_regex = re.compile(body, re.IGNORECASE)
+
+    def _keywords_in_token(self, token: str) -> list[str]:
+        found = []
+        if token in self._short or token in self._long:
+            found.append(token)
+        for suffix in _INFLECTIONS:
+            stem = token[:-len(suffix)]
+            if token.endswith(suffix) and stem in self._short:
+                found.append(stem)
+        for n in self._long_lengths:
+            if n < len(token) and token[:n] in self._long:
+                found.append(token[:n])
+        for n in self._short_lengths:
+            if n < len(token) and token[:n] in self._short:
+                rest = self._keywords_in_token(token[n:])
+                if rest:
+                    found.append(token[:n])
+                    found.extend(rest)
+        return found
+
+    def _learn(self, tokens: set[str]):
+        if len(self._seen) > _MAX_SEEN_TOKENS:
+            self._seen.clear()
+            self._token_hits.clear()
+        for token in tokens:
+            keywords = self._keywords_in_token(token)
+            if keywords:
+                self._token_hits[token] = keywords
+        self._seen |= tokens
+
+    def hits(self, text: str) -> dict[str, set[str]]:
+        """Map each category found in text to the distinct keywords that matched."""
+        matched: set[str] = set()
+        if self.whole_words:
+            tokens = set(_TOKEN.findall(text.lower()))
+            tokens.update(part for token in [t for t in tokens if "-" in t] for part in token.split("-"))
+            unseen = tokens - self._seen
+            if unseen:
+                self._learn(unseen)
+            for token in tokens & self._token_hits.keys():
+                matched.update(self._token_hits[token])
+        if self._literal_regex is not None:
+            matched.update(self._literals[m.lastindex - 1] for m in self._literal_regex.finditer(text))
+
+        found: dict[str, set[str]] = {}
+        for keyword in matched:
+            for category in self._categories[keyword]:
+                found.setdefault(category, set()).add(keyword)
+        return found
+
+    def counts(self, text: str) -> dict[str, int]:
+        """Number of distinct keywords matched per category (missing categories are absent)."""
+        return {category: len(kws) for category, kws in self.hits(text).items()}
@@ -0,0 +1,228 @@
+"""In-process metrics served in the Prometheus text format.
+
+Counters, gauges and histograms register themselves in a module-level
+registry when created; ``render`` writes every metric out for a scrape.
+Values that already live elsewhere (rate-limit budget, cache ratios) are
+filled in by collector callbacks run at scrape time, so there is no
+polling and nothing external to run.
+"""
+
+import time
+import bisect
+import logging
+import threading
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; covers cache hits (~ms) through slow LLM calls
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_metrics: list["_Metric"] = []
+_collectors: list[Callable[[], None]] = []
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", r"\\").replace("\n", r"\n").replace('"', r"\"")
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values: dict[tuple, object] = {}
+        # Model calls may finish on executor threads
+        self._lock = threading.Lock()
+        _metrics.append(self)
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(str(labels.get(name, "")) for name in self.labels)
+
+    def _label_text(self, key: tuple, extra: str = "") -> str:
+        parts = [f'{name}="{_escape(value)}"' for name, value in zip(self.labels, key)]
+        if extra:
+            parts.append(extra)
+        return "{" + ",".join(parts) + "}" if parts else ""
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+    def _samples(self) -> list[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{self._label_text(key)} {_format_value(value)}" for key, value in items]
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    """Monotonic count per label set."""
+
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def set_total(self, value: float, **labels):
+        """Set the running total from a counter kept elsewhere (for collectors)."""
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+
+class Gauge(_Metric):
+    """Current value per label set."""
+
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+
+class Histogram(_Metric):
+    """Observation counts in cumulative buckets, plus sum and count, per label set."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = (),
+                 buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # Per-bucket counts (last slot is +Inf), sum, count
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def _samples(self) -> list[str]:
+        with self._lock:
+            items = [(key, (list(counts), total, count)) for key, (counts, total, count) in self._values.items()]
+        lines = []
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                cumulative += n
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{self._label_text(key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{self._label_text(key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{self._label_text(key)} {count}")
+        return lines
+
+
+def counter(name: str, help: str, labels: tuple[str, ...] = ()) -> Counter:
+    return Counter(name, help, labels)
+
+
+def gauge(name: str, help: str, labels: tuple[str, ...] = ()) -> Gauge:
+    return Gauge(name, help, labels)
+
+
+def histogram(name: str, help: str, labels: tuple[str, ...] = (),
+              buckets: tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+    return Histogram(name, help, labels, buckets)
+
+
+def register_collector(collect: Callable[[], None]):
+    """Run ``collect`` before every scrape to refresh metrics mirrored from elsewhere."""
+    _collectors.append(collect)
+
+
+def hit_ratio(hits: float, misses: float) -> float:
+    return hits / (hits + misses) if hits + misses else 0.0
+
+
+def render() -> str:
+    """All registered metrics in the Prometheus text exposition format."""
+    for collect in _collectors:
+        try:
+            collect()
+        except Exception as e:
+            logger.warning(f"Metrics collector {getattr(collect, '__name__', collect)} failed: {e}")
+    return "\n".join(metric.render() for metric in _metrics) + "\n"
+
+
+# ---- Shared metrics ----
+
+cache_lookups = counter(
+    "devintel_cache_lookups_total", "Cache lookups by cache and result.", ("cache", "result"),
+)
+cache_hit_ratio = gauge(
+    "devintel_cache_hit_ratio", "Share of lookups answered from the cache since startup.", ("cache",),
+)
+
+
+# ---- HTTP requests ----
+
+http_request_duration = histogram(
+    "devintel_http_request_duration_seconds",
+    "Time to serve an API request, by route template (streams until the last frame).",
+    ("method", "route", "status"),
+)
+
+
+class RequestMetricsMiddleware:
+    """ASGI middleware timing every HTTP request by its route template.
+
+    Labels use the path template ("/api/ai/jobs/{job_id}"), not the raw path,
+    so series stay bounded; requests that match no route are "unmatched".
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._routes: dict | None = None
+
+    def _route_path(self, scope: dict) -> str:
+        if self._routes is None:
+            # Routes are complete once the app serves requests
+            self._routes = {}
+            for route in scope["app"].routes:
+                endpoint = getattr(route, "endpoint", None)
+                if endpoint is not None:
+                    self._routes.setdefault(endpoint, route.path)
+        return self._routes.get(scope.get("endpoint"), "unmatched")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            http_request_duration.observe(
+                time.perf_counter() - start,
+                method=scope["method"], route=self._route_path(scope), status=status,
+            )
@@ -0,0 +1,92 @@
+"""Compiled core-path matcher for PR risk scoring.
+
+Core path entries are folded into one regex anchored at path-segment starts,
+so a PR's whole file list (or many PRs' lists) is checked in a single scan:
+
+- entries ending in "/" are directories and match at any depth
+  ("lib/" matches "lib/x.py" and "pkg/lib/x.py", not "mylib/x.py");
+- other entries match the start of a file name ("docker-compose" matches
+  "deploy/docker-compose.prod.yml", ".env" matches ".env.local").
+
+Per-repo extra entries are read from the JSON file named by CORE_PATHS_CONFIG,
+e.g. ``{"acme/api": ["services/billing/", "schema.prisma"]}``.
+"""
+
+import re
+import json
+import bisect
+import logging
+from utils.constants import CORE_MODULE_PATHS, CORE_PATHS_CONFIG
+
+logger = logging.getLogger(__name__)
+
+
+class CorePathMatcher:
+    """Count core-path hits in file lists with one compiled regex."""
+
+    def __init__(self, core_paths: list[str]):
+        self.core_paths = list(dict.fromkeys(p.lower() for p in core_paths if p))
+        alternatives = []
+        # Longest first so "src/core/" wins over a shorter entry at the same segment
+        for entry in sorted(self.core_paths, key=len, reverse=True):
+            if entry.endswith("/"):
+                alternatives.append(re.escape(entry))
+            else:
+                alternatives.append(re.escape(entry) + r"[^/\n]*$")
+        # Text is lowercased before matching; IGNORECASE makes sre noticeably slower
+        self._regex = re.compile(
+            r"(?:^|/)(?=" + "|".join(alternatives) + ")", re.MULTILINE,
+        ) if alternatives else None
+
+    def count(self, file_paths: list[str]) -> int:
+        """Number of (file, core entry) hits in one file list."""
+        if self._regex is None or not file_paths:
+            return 0
+        return sum(1 for _ in self._regex.finditer("\n".join(file_paths).lower()))
+
+    def count_many(self, file_lists: list[list[str]]) -> list[int]:
+        """``count`` for many file lists, scanning all of them in one pass."""
+        counts = [0] * len(file_lists)
+        if self._regex is None:
+            return counts
+        lowered = [[p.lower() for p in paths] for paths in file_lists]
+        starts = []
+        offset = 0
+        for paths in lowered:
+            starts.append(offset)
+            offset += sum(len(p) + 1 for p in paths)
+        text = "".join(p + "\n" for paths in lowered for p in paths)
+        for m in self._regex.finditer(text):
+            counts[bisect.bisect_right(starts, m.start()) - 1] += 1
+        return counts
+
+
+_default_matcher = CorePathMatcher(CORE_MODULE_PATHS)
+_repo_matchers: dict[str, CorePathMatcher] = {}
+_repo_config: dict[str, list[str]] | None = None
+
+
+def _load_config() -> dict[str, list[str]]:
+    global _repo_config
+    if _repo_config is None:
+        _repo_config = {}
+        if CORE_PATHS_CONFIG:
+            try:
+                with open(CORE_PATHS_CONFIG) as f:
+                    _repo_config = {k.lower(): list(v) for k, v in json.load(f).items()}
+            except (OSError, ValueError, TypeError, AttributeError) as e:
+                logger.warning(f"Could not load core paths from {CORE_PATHS_CONFIG}: {e}")
+    return _repo_config
+
+
+def get_core_matcher(repo: str | None = None) -> CorePathMatcher:
+    """Matcher for the default core paths plus any configured for ``owner/repo``."""
+    if not repo:
+        return _default_matcher
+    key = repo.lower()
+    matcher = _repo_matchers.get(key)
+    if matcher is None:
+        extra = _load_config().get(key)
+        matcher = CorePathMatcher(CORE_MODULE_PATHS + extra) if extra else _default_matcher
+        _repo_matchers[key] = matcher
+    return matcher
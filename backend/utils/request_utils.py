@@ -0,0 +1,106 @@
+"""Request helpers shared by route handlers."""
+
+import json
+import asyncio
+import logging
+import httpx
+from fastapi import HTTPException, Request
+from services.rate_limiter import RateLimitExceeded
+
+logger = logging.getLogger(__name__)
+
+
+class ClientDisconnected(Exception):
+    """Raised when the HTTP client went away before the pipeline finished."""
+
+
+async def cancel_on_disconnect(request: Request, coro, poll_interval: float = 0.5):
+    """Await a pipeline coroutine, cancelling it if the client disconnects.
+
+    Cancellation propagates down to in-flight GitHub and LLM calls, so an
+    abandoned request stops consuming quota and model capacity.
+    """
+    task = asyncio.ensure_future(coro)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=poll_interval)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                task.cancel()
+                raise ClientDisconnected()
+    finally:
+        if not task.done():
+            task.cancel()
+
+
+def to_http_exception(e: Exception, owner: str, repo: str) -> HTTPException:
+    """Map a pipeline error to the HTTP error the analyze endpoints return."""
+    if isinstance(e, HTTPException):
+        return e
+    if isinstance(e, httpx.HTTPStatusError):
+        status = e.response.status_code
+        if status == 404:
+            return HTTPException(
+                status_code=404,
+                detail=f"Repository '{owner}/{repo}' not found. Please check the repository name and ensure it exists on GitHub."
+            )
+        if status == 403:
+            return HTTPException(
+                status_code=403,
+                detail="Access forbidden. The repository may be private or your GitHub token lacks permissions."
+            )
+        if status == 401:
+            return HTTPException(
+                status_code=401,
+                detail="GitHub authentication failed. Please check your GitHub token configuration."
+            )
+        return HTTPException(status_code=status, detail=f"GitHub API error: {str(e)}")
+    if isinstance(e, ClientDisconnected):
+        return HTTPException(status_code=499, detail="Client closed request")
+    if isinstance(e, RateLimitExceeded):
+        return HTTPException(
+            status_code=429,
+            detail=f"GitHub rate limit exhausted. Please retry in {int(e.retry_after)} seconds.",
+            headers={"Retry-After": str(int(e.retry_after))},
+        )
+    return HTTPException(status_code=500, detail=str(e))
+
+
+def wants_sse(request: Request) -> bool:
+    return "text/event-stream" in request.headers.get("accept", "")
+
+
+def encode_frame(event: str, data: dict, sse: bool) -> str:
+    """One NDJSON line ({"type": event, "data": data}) or one SSE event."""
+    if sse:
+        return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+    return json.dumps({"type": event, "data": data}) + "\n"
+
+
+async def open_stream(request: Request, events, owner: str, repo: str):
+    """Wait for a pipeline stream's first event and return an iterator of encoded frames.
+
+    Errors before the first event (unknown repo, bad token, rate limit) are
+    raised as HTTPException so they keep their status codes; errors after
+    that are sent as a final "error" frame.
+    """
+    sse = wants_sse(request)
+    try:
+        first = await cancel_on_disconnect(request, events.__anext__())
+    except Exception as e:
+        await events.aclose()
+        raise to_http_exception(e, owner, repo) from e
+
+    async def frames():
+        try:
+            yield encode_frame(*first, sse)
+            async for event, data in events:
+                yield encode_frame(event, data, sse)
+        except Exception as e:
+            logger.error(f"Stream for {owner}/{repo} failed: {e}")
+            yield encode_frame("error", {"detail": to_http_exception(e, owner, repo).detail}, sse)
+        finally:
+            await events.aclose()
+
+    return frames(), "text/event-stream" if sse else "application/x-ndjson"
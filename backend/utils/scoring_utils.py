@@ -2,19 +2,39 @@
 
 from utils.constants import (
     BUG_KEYWORDS, FEATURE_KEYWORDS, REFACTOR_KEYWORDS, QUESTION_KEYWORDS,
-    CORE_MODULE_PATHS, LOAD_WEIGHT_ISSUES, LOAD_WEIGHT_REVIEWS,
+    HIGH_PRIORITY_KEYWORDS, LOW_PRIORITY_KEYWORDS, ISSUE_LABEL_KEYWORDS,
+    LOAD_WEIGHT_ISSUES, LOAD_WEIGHT_REVIEWS,
 )
+from utils.keyword_matcher import KeywordMatcher
+from utils.path_matcher import get_core_matcher
+from schemas.github_models import Contributor
+
+try:
+    import numpy as np
+except ImportError:  # scoring falls back to pure Python
+    np = None
+
+# One pass over the issue text finds type, priority and label keywords together
+_ISSUE_MATCHER = KeywordMatcher({
+    "Bug": BUG_KEYWORDS,
+    "Feature": FEATURE_KEYWORDS,
+    "Refactor": REFACTOR_KEYWORDS,
+    "Question": QUESTION_KEYWORDS,
+    "priority:high": HIGH_PRIORITY_KEYWORDS,
+    "priority:low": LOW_PRIORITY_KEYWORDS,
+    **{f"label:{label}": kws for label, kws in ISSUE_LABEL_KEYWORDS.items()},
+})
 
 
 def classify_issue_rule_based(title: str, body: str) -> dict:
     """Rule-based issue classification using keyword matching."""
-    text = f"{title} {body}".lower()
+    counts = _ISSUE_MATCHER.counts(f"{title} {body}")
 
     scores = {
-        "Bug": sum(1 for kw in BUG_KEYWORDS if kw in text),
-        "Feature": sum(1 for kw in FEATURE_KEYWORDS if kw in text),
-        "Refactor": sum(1 for kw in REFACTOR_KEYWORDS if kw in text),
-        "Question": sum(1 for kw in QUESTION_KEYWORDS if kw in text),
+        "Bug": counts.get("Bug", 0),
+        "Feature": counts.get("Feature", 0),
+        "Refactor": counts.get("Refactor", 0),
+        "Question": counts.get("Question", 0),
     }
 
     classification = max(scores, key=scores.get) if max(scores.values()) > 0 else "Feature"
@@ -23,23 +43,16 @@ def classify_issue_rule_based(title: str, body: str) -> dict:
 
     # Priority heuristic
     priority = "Medium"
-    urgent_words = ["critical", "urgent", "blocker", "asap", "production", "hotfix", "security"]
-    low_words = ["minor", "typo", "cosmetic", "nice to have", "low"]
-    if any(w in text for w in urgent_words):
+    if "priority:high" in counts:
         priority = "High"
-    elif any(w in text for w in low_words):
+    elif "priority:low" in counts:
         priority = "Low"
 
     # Suggested labels
     labels = [classification.lower()]
     if priority == "High":
         labels.append("priority:high")
-    if "security" in text:
-        labels.append("security")
-    if "ui" in text or "frontend" in text:
-        labels.append("frontend")
-    if "api" in text or "backend" in text:
-        labels.append("backend")
+    labels.extend(label for label in ISSUE_LABEL_KEYWORDS if f"label:{label}" in counts)
 
     return {
         "classification": classification,
@@ -50,32 +63,74 @@ def classify_issue_rule_based(title: str, body: str) -> dict:
     }
 
 
-def score_assignee(contributor: dict, issue_labels: list[str], file_paths: list[str]) -> float:
-    """Score a contributor for issue assignment based on activity and file match."""
+def score_assignee(contributor: Contributor, ownership: float = 0.0) -> float:
+    """Score a contributor for issue assignment based on activity and ownership.
+
+    ``ownership`` is the contributor's share (0-1) of recent changes to the
+    paths the issue mentions, or of the whole repo when it mentions none.
+    """
     score = 0.0
 
     # Commit volume (normalized)
-    commits = contributor.get("total_commits", 0)
+    commits = contributor.total_commits
     score += min(commits / 50, 1.0) * 40  # max 40 pts for commit volume
 
     # Recency — recent weeks activity
-    weeks = contributor.get("weeks", [])
-    if weeks:
-        recent = weeks[-1] if len(weeks) > 0 else {}
-        recent_commits = recent.get("commits", 0)
-        score += min(recent_commits / 10, 1.0) * 30  # max 30 pts for recency
-
-    # File path match (if contributor files known)
-    contributor_files = contributor.get("files", [])
-    if contributor_files and file_paths:
-        matches = sum(1 for f in file_paths if any(cf in f for cf in contributor_files))
-        score += min(matches / len(file_paths), 1.0) * 30  # max 30 pts for file match
-
-    return round(score, 1)
-
-
-def calculate_pr_risk(files_changed: int, file_paths: list[str]) -> str:
-    """Determine PR risk level based on file count and paths."""
+    score += min(contributor.recent_commits / 10, 1.0) * 30  # max 30 pts for recency
+
+    # Ownership of the affected code
+    score += min(ownership, 1.0) * 30  # max 30 pts for ownership
+
+    # Same rounding as np.round(..., 1) in rank_assignees, so both paths rank identically
+    return round(score * 10) / 10
+
+
+def rank_assignees(contributors: list[Contributor], ownerships: list[dict[str, float]],
+                   k: int = 3) -> list[list[tuple[int, float]]]:
+    """Top-k (contributor index, score) pairs for each issue, best first.
+
+    ``ownerships[i]`` maps logins to their ownership share for issue i. All
+    issues are scored against all contributors in one matrix operation (same
+    formula as ``score_assignee``); ties keep contributor order.
+    """
+    if not contributors or not ownerships:
+        return [[] for _ in ownerships]
+    k = min(k, len(contributors))
+
+    if np is None:
+        ranked = []
+        for shares in ownerships:
+            scores = [score_assignee(c, shares.get(c.login, 0.0)) for c in contributors]
+            order = sorted(range(len(scores)), key=lambda j: scores[j], reverse=True)[:k]
+            ranked.append([(j, scores[j]) for j in order])
+        return ranked
+
+    # Per-contributor features, built once
+    commits = np.array([c.total_commits for c in contributors], dtype=float)
+    recent = np.array([c.recent_commits for c in contributors], dtype=float)
+    base = np.minimum(commits / 50, 1.0) * 40 + np.minimum(recent / 10, 1.0) * 30
+
+    # Issue × contributor ownership matrix
+    column = {c.login: j for j, c in enumerate(contributors)}
+    own = np.zeros((len(ownerships), len(contributors)))
+    for i, shares in enumerate(ownerships):
+        for login, share in shares.items():
+            j = column.get(login)
+            if j is not None:
+                own[i, j] = share
+    scores = np.round(base + np.minimum(own, 1.0) * 30, 1)
+
+    # Tiny index penalty breaks ties in contributor order, like a stable sort
+    keyed = scores - np.arange(len(contributors)) * 1e-9
+    top = np.argpartition(-keyed, k - 1, axis=1)[:, :k]
+    ranked = []
+    for i, row in enumerate(top):
+        row = row[np.argsort(-keyed[i, row])]
+        ranked.append([(int(j), float(scores[i, j])) for j in row])
+    return ranked
+
+
+def _risk_level(files_changed: int, core_hits: int) -> str:
     risk_score = 0
 
     # File count risk
@@ -87,11 +142,6 @@ def calculate_pr_risk(files_changed: int, file_paths: list[str]) -> str:
         risk_score += 1
 
     # Core module risk
-    core_hits = sum(
-        1 for fp in file_paths
-        for cp in CORE_MODULE_PATHS
-        if cp.lower() in fp.lower()
-    )
     risk_score += min(core_hits, 3)
 
     if risk_score >= 4:
@@ -101,29 +151,34 @@ def calculate_pr_risk(files_changed: int, file_paths: list[str]) -> str:
     return "Low"
 
 
-def score_reviewer(contributor: dict, changed_files: list[str]) -> float:
-    """Score a contributor as potential reviewer based on file ownership."""
+def calculate_pr_risk(files_changed: int, file_paths: list[str], repo: str | None = None) -> str:
+    """Determine PR risk level based on file count and paths (core paths may be set per repo)."""
+    return _risk_level(files_changed, get_core_matcher(repo).count(file_paths))
+
+
+def calculate_pr_risks(prs: list[tuple[int, list[str]]], repo: str | None = None) -> list[str]:
+    """Risk level for many (files_changed, file_paths) pairs, matching all paths in one pass."""
+    hits = get_core_matcher(repo).count_many([paths for _, paths in prs])
+    return [_risk_level(files_changed, n) for (files_changed, _), n in zip(prs, hits)]
+
+
+def score_reviewer(contributor: Contributor, ownership: float = 0.0) -> float:
+    """Score a contributor as potential reviewer based on file ownership.
+
+    ``ownership`` is the contributor's share (0-1) of recent changes to the
+    PR's changed paths, from the ownership index.
+    """
     score = 0.0
 
     # File ownership match
-    contributor_files = contributor.get("files", [])
-    if contributor_files and changed_files:
-        matches = sum(
-            1 for cf in changed_files
-            if any(owned in cf for owned in contributor_files)
-        )
-        ownership = matches / max(len(changed_files), 1)
-        score += ownership * 50  # max 50 pts
+    score += min(ownership, 1.0) * 50  # max 50 pts
 
     # Total commits (expertise proxy)
-    commits = contributor.get("total_commits", 0)
+    commits = contributor.total_commits
     score += min(commits / 100, 1.0) * 30  # max 30 pts
 
     # Recent activity
-    weeks = contributor.get("weeks", [])
-    if weeks:
-        recent = weeks[-1] if weeks else {}
-        score += min(recent.get("commits", 0) / 5, 1.0) * 20  # max 20 pts
+    score += min(contributor.recent_commits / 5, 1.0) * 20  # max 20 pts
 
     return round(score, 1)
 
@@ -0,0 +1,65 @@
+"""Single-flight coalescing — concurrent identical calls share one computation."""
+
+import time
+import asyncio
+
+
+class SingleFlight:
+    """Run at most one computation per key at a time.
+
+    Callers that arrive while a computation for their key is in flight await
+    the same task and all receive its result (or exception). A successful
+    result is also reused for ``reuse_seconds`` after it completes. The shared
+    task is cancelled only when every caller waiting on it has gone away.
+    """
+
+    def __init__(self, reuse_seconds: float = 0.0):
+        self.reuse_seconds = reuse_seconds
+        self._inflight: dict[tuple, list] = {}  # key -> [task, waiter count]
+        self._results: dict[tuple, tuple[float, object]] = {}
+        self.stats = {"executed": 0, "coalesced": 0, "reused": 0}
+
+    async def do(self, key: tuple, fn):
+        """Return fn()'s result, sharing it with concurrent callers of the same key."""
+        now = time.monotonic()
+        cached = self._results.get(key)
+        if cached is not None:
+            if cached[0] > now:
+                self.stats["reused"] += 1
+                return cached[1]
+            del self._results[key]
+
+        entry = self._inflight.get(key)
+        if entry is None:
+            task = asyncio.ensure_future(fn())
+            entry = self._inflight[key] = [task, 0]
+            task.add_done_callback(lambda t: self._finish(key, t))
+            self.stats["executed"] += 1
+        else:
+            self.stats["coalesced"] += 1
+
+        task = entry[0]
+        entry[1] += 1
+        try:
+            return await asyncio.shield(task)
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0 and not task.done():
+                task.cancel()
+
+    def _finish(self, key: tuple, task: asyncio.Task):
+        if self._inflight.get(key, [None])[0] is task:
+            del self._inflight[key]
+        if self.reuse_seconds > 0 and not task.cancelled() and task.exception() is None:
+            self._results[key] = (time.monotonic() + self.reuse_seconds, task.result())
+        # Drop expired results so the map stays small
+        now = time.monotonic()
+        for k in [k for k, (expires, _) in self._results.items() if expires <= now]:
+            del self._results[k]
+
+    def forget(self, predicate) -> int:
+        """Drop reusable results whose key matches predicate. Returns the count removed."""
+        keys = [k for k in self._results if predicate(k)]
+        for k in keys:
+            del self._results[k]
+        return len(keys)
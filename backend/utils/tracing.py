@@ -0,0 +1,311 @@
+"""Per-request span tracing, Server-Timing headers and opt-in profiler capture.
+
+Each HTTP request gets a root span; code marks its steps with ``span(...)``
+(planner steps, agents, GitHub and LLM calls), building a tree that follows
+asyncio tasks because the current span lives in a ContextVar. Outside a
+request (background jobs, startup) spans are no-ops.
+
+The response carries a ``Server-Timing`` header summing time per span name
+(spans finished before the headers were sent, so streams report their setup
+only). With ``X-Debug-Trace: 1`` a JSON object response also gets the whole
+tree under "debug". With ``X-Profile: 1`` the request may be run under
+cProfile (see PROFILE_SAMPLE_RATE, 0 by default); the capture id is returned
+in ``X-Profile-Id`` and the stats file is served by the admin routes.
+"""
+
+import io
+import os
+import re
+import json
+import asyncio
+import time
+import uuid
+import random
+import pstats
+import inspect
+import cProfile
+import functools
+import contextvars
+from contextlib import contextmanager
+from utils.constants import (
+    TRACING_ENABLED, TRACE_MAX_SPANS, PROFILE_SAMPLE_RATE, PROFILE_DIR, PROFILE_MAX_FILES,
+)
+
+
+class Span:
+    __slots__ = ("name", "attrs", "start", "duration", "children", "trace")
+
+    def __init__(self, name: str, attrs: dict, trace: "_Trace | None"):
+        self.name = name
+        self.attrs = attrs
+        self.start = time.perf_counter()
+        self.duration: float | None = None
+        self.children: list[Span] = []
+        self.trace = trace
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def elapsed(self) -> float:
+        return self.duration if self.duration is not None else time.perf_counter() - self.start
+
+    def to_dict(self, origin: float) -> dict:
+        node = {
+            "name": self.name,
+            "start_ms": round((self.start - origin) * 1000, 2),
+            "duration_ms": round(self.elapsed() * 1000, 2),
+        }
+        if self.duration is None:
+            node["unfinished"] = True
+        if self.attrs:
+            node["attrs"] = self.attrs
+        if self.children:
+            node["children"] = [child.to_dict(origin) for child in self.children]
+        return node
+
+
+class _NoopSpan:
+    def set(self, **attrs):
+        pass
+
+
+class _Trace:
+    __slots__ = ("root", "spans", "dropped")
+
+    def __init__(self, name: str, attrs: dict):
+        self.spans = 1
+        self.dropped = 0
+        self.root = Span(name, attrs, self)
+
+
+_NOOP = _NoopSpan()
+_current: contextvars.ContextVar[Span | None] = contextvars.ContextVar("trace_span", default=None)
+
+# Server-Timing metric names are HTTP tokens
+_UNSAFE_NAME = re.compile(r"[^A-Za-z0-9_.-]")
+_PROFILE_ID = re.compile(r"^[0-9a-f]{32}$")
+
+# Only one capture at a time: cProfile sees everything the event loop runs
+_profiling = False
+# Request line of recent captures, by id (files on disk may outlive it)
+_profiles: dict[str, dict] = {}
+
+
+@contextmanager
+def span(name: str, **attrs):
+    """Time a block as a child of the current span; yields the span (``set`` adds attributes)."""
+    parent = _current.get()
+    if parent is None:
+        yield _NOOP
+        return
+    trace = parent.trace
+    if trace.spans >= TRACE_MAX_SPANS:
+        trace.dropped += 1
+        yield _NOOP
+        return
+    trace.spans += 1
+    current = Span(name, attrs, trace)
+    parent.children.append(current)
+    token = _current.set(current)
+    try:
+        yield current
+    finally:
+        current.duration = time.perf_counter() - current.start
+        _current.reset(token)
+
+
+def traced(name: str):
+    """Decorator running a function (sync or async) inside ``span(name)``."""
+    def decorator(fn):
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with span(name):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def detached() -> contextvars.Context:
+    """A copy of the current context outside any trace, for tasks that outlive the request."""
+    context = contextvars.copy_context()
+    context.run(_current.set, None)
+    return context
+
+
+def server_timing(root: Span) -> str:
+    """Server-Timing value: total time, then summed time per span name (slowest first)."""
+    totals: dict[str, list] = {}
+
+    def walk(node: Span):
+        for child in node.children:
+            entry = totals.setdefault(child.name, [0.0, 0])
+            entry[0] += child.elapsed()
+            entry[1] += 1
+            walk(child)
+
+    walk(root)
+    parts = [f"total;dur={root.elapsed() * 1000:.1f}"]
+    for name, (seconds, count) in sorted(totals.items(), key=lambda item: -item[1][0]):
+        parts.append(f'{_UNSAFE_NAME.sub("_", name)};dur={seconds * 1000:.1f};desc="{count}x"')
+    return ", ".join(parts)
+
+
+# ---- Profiler captures ----
+
+def _profile_path(profile_id: str) -> str | None:
+    if not _PROFILE_ID.match(profile_id):
+        return None
+    return os.path.join(PROFILE_DIR, f"{profile_id}.prof")
+
+
+def _save_profile(profiler: cProfile.Profile, profile_id: str, info: dict):
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    profiler.dump_stats(_profile_path(profile_id))
+    _profiles[profile_id] = info
+    # Keep only the newest PROFILE_MAX_FILES captures
+    files = sorted(
+        (entry for entry in os.scandir(PROFILE_DIR) if entry.name.endswith(".prof")),
+        key=lambda entry: entry.stat().st_mtime, reverse=True,
+    )
+    for entry in files[PROFILE_MAX_FILES:]:
+        os.remove(entry.path)
+        _profiles.pop(entry.name.removesuffix(".prof"), None)
+
+
+def list_profiles() -> list[dict]:
+    """Stored captures, newest first."""
+    if not os.path.isdir(PROFILE_DIR):
+        return []
+    profiles = []
+    for entry in os.scandir(PROFILE_DIR):
+        if not entry.name.endswith(".prof"):
+            continue
+        profile_id = entry.name.removesuffix(".prof")
+        stat = entry.stat()
+        profiles.append({"profile_id": profile_id, "created_at": stat.st_mtime, "bytes": stat.st_size,
+                         **_profiles.get(profile_id, {})})
+    return sorted(profiles, key=lambda p: p["created_at"], reverse=True)
+
+
+def get_profile_path(profile_id: str) -> str | None:
+    """Path of a stored capture (pstats format), or None if there is no such capture."""
+    path = _profile_path(profile_id)
+    return path if path and os.path.exists(path) else None
+
+
+def profile_text(profile_id: str, limit: int = 60) -> str | None:
+    """Readable summary of a capture, sorted by cumulative time."""
+    path = get_profile_path(profile_id)
+    if path is None:
+        return None
+    out = io.StringIO()
+    pstats.Stats(path, stream=out).sort_stats("cumulative").print_stats(limit)
+    return out.getvalue()
+
+
+# ---- Middleware ----
+
+def _flag(headers: dict, name: bytes) -> bool:
+    return headers.get(name, b"").strip().lower() in (b"1", b"true", b"yes")
+
+
+class TracingMiddleware:
+    """ASGI middleware opening the root span and reporting it on the response."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        global _profiling
+        if scope["type"] != "http" or not TRACING_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        debug = _flag(headers, b"x-debug-trace")
+        profiler = None
+        profile_id = None
+        if _flag(headers, b"x-profile") and not _profiling and random.random() < PROFILE_SAMPLE_RATE:
+            _profiling = True
+            profile_id = uuid.uuid4().hex
+            profiler = cProfile.Profile()
+
+        trace = _Trace(f"{scope['method']} {scope['path']}", {})
+        root = trace.root
+        token = _current.set(root)
+        start_message = None
+        body = []
+
+        async def stop_profiler():
+            global _profiling
+            nonlocal profiler
+            if profiler is None:
+                return
+            profiler.disable()
+            capture, profiler = profiler, None
+            try:
+                # Writing the stats file is disk I/O; keep it off the event loop
+                await asyncio.to_thread(_save_profile, capture, profile_id, {
+                    "method": scope["method"], "path": scope["path"],
+                    "duration_ms": round(root.elapsed() * 1000, 2),
+                })
+            finally:
+                _profiling = False
+
+        async def send_wrapper(message):
+            nonlocal start_message
+            if message["type"] == "http.response.start":
+                extra = [(b"server-timing", server_timing(root).encode())]
+                if profile_id:
+                    extra.append((b"x-profile-id", profile_id.encode()))
+                message = {**message, "headers": [*message.get("headers", []), *extra]}
+                content_type = dict(message["headers"]).get(b"content-type", b"")
+                if debug and content_type.startswith(b"application/json"):
+                    start_message = message  # held until the body is complete
+                    return
+            elif message["type"] == "http.response.body":
+                if not message.get("more_body", False):
+                    await stop_profiler()
+                if start_message is not None:
+                    body.append(message.get("body", b""))
+                    if message.get("more_body", False):
+                        return
+                    message = {**message, "body": self._with_debug(b"".join(body), trace)}
+                    start_message["headers"] = [
+                        (k, str(len(message["body"])).encode() if k == b"content-length" else v)
+                        for k, v in start_message["headers"]
+                    ]
+                    await send(start_message)
+            await send(message)
+
+        try:
+            if profiler is not None:
+                profiler.enable()
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            root.duration = time.perf_counter() - root.start
+            _current.reset(token)
+            await stop_profiler()
+
+    @staticmethod
+    def _with_debug(body: bytes, trace: _Trace) -> bytes:
+        try:
+            data = json.loads(body)
+        except ValueError:
+            return body
+        if not isinstance(data, dict):
+            return body
+        root = trace.root
+        data["debug"] = {
+            "trace": root.to_dict(root.start),
+            "spans": trace.spans,
+            "dropped_spans": trace.dropped,
+        }
+        return json.dumps(data).encode()